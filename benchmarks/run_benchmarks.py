@@ -0,0 +1,304 @@
+# run_benchmarks.py
+
+"""
+python benchmarks/run_benchmarks.py --out bench.json
+python benchmarks/run_benchmarks.py --compare old.json new.json
+
+Benchmarks for the engine hot paths, written as machine readable JSON so engine versions can be compared.
+
+- matches:    turns/sec of headless matches, every bundled bot (mirror match) on every maps/*.txt,
+              each in a fresh process so peak RSS is per match
+- controller: calls/sec of RobotController.get_map / get_tile / move on each map
+- replay:     replay bytes/turn for the json and delta (plain and gzip) formats
+- map_load:   map files parsed + GameState built per second
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+def peak_rss_kb() -> int:
+    '''peak resident set size of this process (ru_maxrss is KB on linux, bytes on macos)'''
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+@contextlib.contextmanager
+def quiet():
+    '''engine and bots print a lot, keep it out of the timings'''
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+# ----------------------------
+# Benchmarks
+# ----------------------------
+
+def run_match(bot: str, map_path: str, turns: int, seed: int, replay_path: Optional[str] = None) -> Dict[str, Any]:
+    '''one headless mirror match, returns timing (runs in the calling process)'''
+    from game import Game
+
+    random.seed(seed)
+    with quiet():
+        g = Game(bot, bot, map_path, replay_path=replay_path, turn_limit=turns, per_turn_timeout_s=30.0)
+        t0 = time.perf_counter()
+        try:
+            g.run_game()
+        finally:
+            g.close()
+        dt = time.perf_counter() - t0
+
+    played = g.game_state.turn
+    return {
+        "bot": os.path.basename(bot),
+        "map": os.path.basename(map_path),
+        "turns": played,
+        "seconds": round(dt, 4),
+        "turns_per_sec": round(played / dt, 2) if dt > 0 else None,
+    }
+
+
+def match_worker(args) -> Dict[str, Any]:
+    '''fresh process per match so ru_maxrss belongs to that match only'''
+    res = run_match(*args)
+    res["peak_rss_kb"] = peak_rss_kb()
+    return res
+
+
+def bench_matches(bots: List[str], maps: List[str], turns: int, seed: int) -> List[Dict[str, Any]]:
+    ctx = mp.get_context("spawn")
+    results = []
+    for map_path in maps:
+        for bot in bots:
+            with ctx.Pool(1, maxtasksperchild=1) as pool:
+                res = pool.apply(match_worker, ((bot, map_path, turns, seed),))
+            print(f"[BENCH] match {res['bot']} on {res['map']}: {res['turns_per_sec']} turns/s, peak rss {res['peak_rss_kb']} KB", file=sys.stderr)
+            results.append(res)
+    return results
+
+
+def calls_per_sec(fn: Callable[[int], Any], min_time_s: float) -> float:
+    '''runs fn(i) until min_time_s has passed, returns calls/sec'''
+    n = 0
+    t0 = time.perf_counter()
+    batch = 1
+    while True:
+        for i in range(n, n + batch):
+            fn(i)
+        n += batch
+        dt = time.perf_counter() - t0
+        if dt >= min_time_s:
+            return n / dt
+        batch = min(batch * 2, 4096)
+
+
+def bench_controller(map_path: str, min_time_s: float) -> Dict[str, Any]:
+    '''RobotController read and move throughput on one map'''
+    from game import find_default_floor_spawn
+    from game_constants import Team
+    from game_state import GameState
+    from map_processor import load_two_team_maps_and_orders
+    from robot_controller import RobotController
+
+    map_red, map_blue, _, _, parsed = load_two_team_maps_and_orders(map_path)
+    gs = GameState(red_map=map_red, blue_map=map_blue)
+    rc = RobotController(Team.RED, gs)
+    x, y = parsed.spawns_red[0] if parsed.spawns_red else find_default_floor_spawn(gs.red_map)
+    bot_id = gs.add_bot(Team.RED, x, y)
+
+    #a step the bot can take and undo
+    step = None
+    for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1), (1, -1), (-1, 1)]:
+        if rc.can_move(bot_id, dx, dy):
+            step = (dx, dy)
+            break
+
+    w, h = gs.red_map.width, gs.red_map.height
+
+    def new_turn():
+        gs.turn += 1
+
+    def get_map_same_turn(i):
+        rc.get_map(Team.RED)
+
+    def get_map_new_turn(i):
+        new_turn()
+        rc.get_map(Team.RED)
+
+    def get_tile(i):
+        rc.get_tile(Team.RED, i % w, (i // w) % h)
+
+    def move(i):
+        new_turn() #one move per bot per turn
+        sign = 1 if i % 2 == 0 else -1
+        rc.move(bot_id, sign * step[0], sign * step[1])
+
+    res: Dict[str, Any] = {"map": os.path.basename(map_path)}
+    with quiet():
+        res["get_map_per_sec"] = round(calls_per_sec(get_map_same_turn, min_time_s), 1)
+        res["get_map_new_turn_per_sec"] = round(calls_per_sec(get_map_new_turn, min_time_s), 1)
+        res["get_tile_per_sec"] = round(calls_per_sec(get_tile, min_time_s), 1)
+        if step is not None:
+            res["move_per_sec"] = round(calls_per_sec(move, min_time_s), 1)
+    print(f"[BENCH] controller on {res['map']}: {res}", file=sys.stderr)
+    return res
+
+
+def bench_replay(bot: str, map_path: str, turns: int, seed: int) -> List[Dict[str, Any]]:
+    '''replay size per turn for each replay format'''
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ["replay.json", "replay.jsonl", "replay.jsonl.gz"]:
+            path = os.path.join(tmp, name)
+            res = run_match(bot, map_path, turns, seed, replay_path=path)
+            size = os.path.getsize(path)
+            results.append({
+                "format": name.split(".", 1)[1],
+                "map": os.path.basename(map_path),
+                "bot": os.path.basename(bot),
+                "turns": res["turns"],
+                "bytes": size,
+                "bytes_per_turn": round(size / max(res["turns"], 1), 1),
+                "turns_per_sec": res["turns_per_sec"],
+            })
+            print(f"[BENCH] replay {name} on {os.path.basename(map_path)}: {results[-1]['bytes_per_turn']} bytes/turn", file=sys.stderr)
+    return results
+
+
+def bench_map_load(map_path: str, min_time_s: float) -> Dict[str, Any]:
+    '''parse the map file and build the GameState'''
+    from game_state import GameState
+    from map_processor import load_two_team_maps_and_orders
+
+    def load(i):
+        map_red, map_blue, _, _, _ = load_two_team_maps_and_orders(map_path)
+        GameState(red_map=map_red, blue_map=map_blue)
+
+    return {"map": os.path.basename(map_path), "loads_per_sec": round(calls_per_sec(load, min_time_s), 1)}
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_all(bots: List[str], maps: List[str], turns: int, seed: int, min_time_s: float, replay_bot: str) -> Dict[str, Any]:
+    t0 = time.time()
+    payload = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "turns": turns,
+            "seed": seed,
+        },
+        "matches": bench_matches(bots, maps, turns, seed),
+        "controller": [bench_controller(m, min_time_s) for m in maps],
+        "replay": [r for m in maps for r in bench_replay(replay_bot, m, turns, seed)],
+        "map_load": [bench_map_load(m, min_time_s) for m in maps],
+    }
+    payload["meta"]["runner_peak_rss_kb"] = peak_rss_kb()
+    payload["meta"]["seconds"] = round(time.time() - t0, 2)
+    return payload
+
+
+#metric name -> True if higher is better
+COMPARED_METRICS = {
+    "turns_per_sec": True,
+    "peak_rss_kb": False,
+    "get_map_per_sec": True,
+    "get_map_new_turn_per_sec": True,
+    "get_tile_per_sec": True,
+    "move_per_sec": True,
+    "bytes_per_turn": False,
+    "loads_per_sec": True,
+}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> None:
+    '''prints new/old ratios for every metric both runs have'''
+    def keyed(rows: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+        return {tuple((k, r[k]) for k in ("bot", "map", "format") if k in r): r for r in rows}
+
+    print(f"old: {old['meta'].get('revision')}  new: {new['meta'].get('revision')}")
+    for section in ("matches", "controller", "replay", "map_load"):
+        old_rows, new_rows = keyed(old.get(section, [])), keyed(new.get(section, []))
+        for key, new_row in new_rows.items():
+            old_row = old_rows.get(key)
+            if old_row is None:
+                continue
+            for metric, higher_better in COMPARED_METRICS.items():
+                a, b = old_row.get(metric), new_row.get(metric)
+                if not a or b is None:
+                    continue
+                ratio = b / a
+                better = ratio >= 1 if higher_better else ratio <= 1
+                label = " ".join(str(v) for _, v in key)
+                print(f"{section:10s} {label:40s} {metric:26s} {a:>12} -> {b:>12}  x{ratio:.2f} {'' if better else '(worse)'}")
+
+
+def main():
+    '''parse and run'''
+    ap = argparse.ArgumentParser(description="engine benchmarks")
+    ap.add_argument("--bots", nargs="+", default=None, help="bot files (default: bots/*.py)")
+    ap.add_argument("--maps", nargs="+", default=None, help="map files (default: maps/*.txt)")
+    ap.add_argument("--turns", type=int, default=500, help="turn limit per match")
+    ap.add_argument("--seed", type=int, default=0, help="random seed for the bots")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds per controller micro benchmark")
+    ap.add_argument("--replay-bot", default=None, help="bot used for the replay size benchmark (default: first bot)")
+    ap.add_argument("--quick", action="store_true", help="100 turns and short micro benchmarks")
+    ap.add_argument("--out", default=None, help="write results json here (default: stdout)")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files instead of running")
+    args = ap.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f_old, open(args.compare[1], encoding="utf-8") as f_new:
+            compare(json.load(f_old), json.load(f_new))
+        return
+
+    bots = args.bots or sorted(glob.glob(os.path.join(ROOT, "bots", "*.py")))
+    maps = args.maps or sorted(glob.glob(os.path.join(ROOT, "maps", "*.txt")))
+    turns = 100 if args.quick else args.turns
+    min_time_s = 0.1 if args.quick else args.min_time
+
+    payload = run_all(bots, maps, turns, args.seed, min_time_s, args.replay_bot or bots[0])
+
+    text = json.dumps(payload, indent=2)
+    if args.out is None:
+        print(text)
+    else:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[BENCH] wrote {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
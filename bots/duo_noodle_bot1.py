@@ -50,18 +50,8 @@ class BotPlayer:
         return False 
 
     def find_nearest_tile(self, controller: RobotController, bot_x: int, bot_y: int, tile_name: str) -> Optional[Tuple[int, int]]:
-        best_dist = 9999
-        best_pos = None
         m = controller.get_map()
-        for x in range(m.width):
-            for y in range(m.height):
-                tile = m.tiles[x][y]
-                if tile.tile_name == tile_name:
-                    dist = max(abs(bot_x - x), abs(bot_y - y))
-                    if dist < best_dist:
-                        best_dist = dist
-                        best_pos = (x, y)
-        return best_pos
+        return m.find_nearest_tile(bot_x, bot_y, tile_name)
 
     def play_turn(self, controller: RobotController):
         my_bots = controller.get_team_bot_ids()
@@ -0,0 +1,337 @@
+# batch.py
+
+'''python src/batch.py --red bots/a.py bots/b.py --blue bots/a.py --maps maps/*.txt --seeds 0 1 2 --workers 8 --out results.jsonl'''
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from game_constants import GameConstants
+
+
+RESULT_FIELDS = [
+    "match_id", "red", "blue", "map", "seed", "status", "winner",
+    "red_money", "blue_money", "red_warnings", "blue_warnings", "turns", "duration_s", "attempts", "error",
+]
+
+
+# ----------------------------
+# Match specs and results
+# ----------------------------
+
+@dataclass
+class MatchSpec:
+    '''one cell of the red x blue x map x seed matrix'''
+    match_id: int
+    red: str
+    blue: str
+    map: str
+    seed: int
+    turns: int = GameConstants.TOTAL_TURNS
+    per_turn_timeout_s: float = 0.5
+    replay_path: Optional[str] = None
+    verbose: bool = False
+
+
+def build_matrix(
+    red_bots: List[str],
+    blue_bots: List[str],
+    maps: List[str],
+    seeds: List[int],
+    *,
+    turns: int = GameConstants.TOTAL_TURNS,
+    per_turn_timeout_s: float = 0.5,
+    replay_dir: Optional[str] = None,
+    verbose: bool = False,
+) -> List[MatchSpec]:
+    '''every red bot vs every blue bot on every map with every seed'''
+    specs: List[MatchSpec] = []
+    for i, (red, blue, map_path, seed) in enumerate(itertools.product(red_bots, blue_bots, maps, seeds)):
+        replay_path = None if replay_dir is None else os.path.join(replay_dir, f"match_{i:05d}.json")
+        specs.append(MatchSpec(
+            match_id=i,
+            red=red,
+            blue=blue,
+            map=map_path,
+            seed=seed,
+            turns=turns,
+            per_turn_timeout_s=per_turn_timeout_s,
+            replay_path=replay_path,
+            verbose=verbose,
+        ))
+    return specs
+
+
+def base_result(spec: MatchSpec, attempts: int) -> Dict[str, Any]:
+    '''result row with the match identity filled in and no outcome yet'''
+    return {
+        "match_id": spec.match_id,
+        "red": spec.red,
+        "blue": spec.blue,
+        "map": spec.map,
+        "seed": spec.seed,
+        "status": None,
+        "winner": None,
+        "red_money": None,
+        "blue_money": None,
+        "red_warnings": None,
+        "blue_warnings": None,
+        "turns": None,
+        "duration_s": None,
+        "attempts": attempts,
+        "error": None,
+    }
+
+
+def run_match(spec: MatchSpec, attempts: int = 1) -> Dict[str, Any]:
+    '''runs a single headless match in this process and returns its result row'''
+    from game import Game
+    from game_constants import Team
+
+    res = base_result(spec, attempts)
+    random.seed(spec.seed)
+
+    t0 = time.time()
+    try:
+        with contextlib.ExitStack() as stack:
+            #engine and bots print a lot, keep worker output quiet unless asked
+            if not spec.verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+                stack.enter_context(contextlib.redirect_stderr(devnull))
+
+            g = Game(
+                red_bot_path=spec.red,
+                blue_bot_path=spec.blue,
+                map_path=spec.map,
+                replay_path=spec.replay_path,
+                render=False,
+                turn_limit=spec.turns,
+                per_turn_timeout_s=spec.per_turn_timeout_s,
+                warnings="count",
+            )
+            try:
+                winner = g.run_game()
+            finally:
+                g.close()
+    except Exception as e:
+        res["status"] = "error"
+        res["error"] = f"{type(e).__name__}: {e}"
+        res["duration_s"] = round(time.time() - t0, 4)
+        if spec.verbose:
+            traceback.print_exc()
+        return res
+
+    res["status"] = "ok"
+    res["winner"] = None if winner is None else winner.name
+    res["red_money"] = g.game_state.get_team_money(Team.RED)
+    res["blue_money"] = g.game_state.get_team_money(Team.BLUE)
+    res["red_warnings"] = g.warnings.total(Team.RED)
+    res["blue_warnings"] = g.warnings.total(Team.BLUE)
+    res["turns"] = g.game_state.turn
+    res["duration_s"] = round(time.time() - t0, 4)
+    return res
+
+
+# ----------------------------
+# Worker pool
+# ----------------------------
+
+def worker_main(conn) -> None:
+    '''long lived worker: receive (spec, attempts), send back the result row, None means stop'''
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg is None:
+            return
+        spec, attempts = msg
+        conn.send(run_match(spec, attempts))
+
+
+class ResultWriter:
+    '''streams result rows to a jsonl or csv file as they complete'''
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.csv_writer = None
+        if self.fmt == "csv":
+            self.csv_writer = csv.DictWriter(self.f, fieldnames=RESULT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(row)
+        else:
+            self.f.write(json.dumps(row) + "\n")
+        self.f.flush() #so a killed batch still keeps everything finished so far
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class BatchRunner:
+    '''
+    runs MatchSpecs across a pool of worker processes
+
+    a worker that crashes (dies) or runs past match_timeout_s is killed and replaced,
+    the match is retried up to `retries` times and then recorded as "crashed"/"timeout"
+    '''
+    def __init__(self, workers: int = 0, retries: int = 1, match_timeout_s: Optional[float] = None):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.retries = retries
+        self.match_timeout_s = match_timeout_s
+        self.ctx = mp.get_context()
+
+    def _spawn(self) -> Tuple[Any, Any]:
+        parent_conn, child_conn = self.ctx.Pipe()
+        p = self.ctx.Process(target=worker_main, args=(child_conn,), daemon=True)
+        p.start()
+        child_conn.close()
+        return p, parent_conn
+
+    @staticmethod
+    def _kill(p, conn) -> None:
+        if p.is_alive():
+            p.terminate()
+        p.join(1.0)
+        if p.is_alive():
+            p.kill()
+            p.join()
+        conn.close()
+
+    def run(self, specs: List[MatchSpec], writer: Optional[ResultWriter] = None) -> List[Dict[str, Any]]:
+        '''run every spec; results are returned (and streamed to writer) in completion order'''
+        pending: List[Tuple[MatchSpec, int]] = [(s, 1) for s in reversed(specs)]
+        results: List[Dict[str, Any]] = []
+
+        #conn -> [process, (spec, attempts), start time]
+        busy: Dict[Any, List[Any]] = {}
+        idle: List[Tuple[Any, Any]] = [self._spawn() for _ in range(min(self.workers, len(specs)))]
+
+        def finish(row: Dict[str, Any]) -> None:
+            results.append(row)
+            if writer is not None:
+                writer.write(row)
+            print(f"[BATCH] {len(results)}/{len(specs)} match {row['match_id']}: {row['status']} winner={row['winner']}")
+
+        def fail(spec: MatchSpec, attempts: int, status: str, error: str, dt: float) -> None:
+            if attempts <= self.retries:
+                pending.append((spec, attempts + 1))
+                return
+            row = base_result(spec, attempts)
+            row["status"] = status
+            row["error"] = error
+            row["duration_s"] = round(dt, 4)
+            finish(row)
+
+        try:
+            while pending or busy:
+                #hand out work
+                while pending and idle:
+                    p, conn = idle.pop()
+                    job = pending.pop()
+                    conn.send(job)
+                    busy[conn] = [p, job, time.time()]
+
+                ready = wait(list(busy.keys()), timeout=0.25)
+                now = time.time()
+
+                for conn in ready:
+                    p, (spec, attempts), t0 = busy.pop(conn)
+                    try:
+                        row = conn.recv()
+                    except (EOFError, OSError):
+                        #the worker process died mid-match
+                        self._kill(p, conn)
+                        idle.append(self._spawn())
+                        fail(spec, attempts, "crashed", f"worker exited with code {p.exitcode}", now - t0)
+                        continue
+                    finish(row)
+                    idle.append((p, conn))
+
+                #hung matches
+                if self.match_timeout_s is not None:
+                    for conn in [c for c, (_, _, t0) in busy.items() if now - t0 > self.match_timeout_s]:
+                        p, (spec, attempts), t0 = busy.pop(conn)
+                        self._kill(p, conn)
+                        idle.append(self._spawn())
+                        fail(spec, attempts, "timeout", f"match exceeded {self.match_timeout_s:.1f}s", now - t0)
+        finally:
+            for p, conn in idle:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for p, conn in idle + [(v[0], c) for c, v in busy.items()]:
+                self._kill(p, conn)
+
+        return results
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    '''wins per bot pairing and status counts'''
+    status: Dict[str, int] = {}
+    wins: Dict[str, Dict[str, int]] = {}
+    for r in results:
+        status[r["status"]] = status.get(r["status"], 0) + 1
+        key = f"{os.path.basename(r['red'])} vs {os.path.basename(r['blue'])}"
+        w = wins.setdefault(key, {"RED": 0, "BLUE": 0, "DRAW": 0})
+        if r["status"] == "ok":
+            w[r["winner"] or "DRAW"] += 1
+    return {"matches": len(results), "status": status, "wins": wins}
+
+
+def main():
+    '''parse and run'''
+    ap = argparse.ArgumentParser(description="run a red x blue x map x seed matrix of headless matches")
+    ap.add_argument("--red", nargs="+", required=True, help="red bot python files")
+    ap.add_argument("--blue", nargs="+", required=True, help="blue bot python files")
+    ap.add_argument("--maps", nargs="+", required=True, help="map text files")
+    ap.add_argument("--seeds", nargs="+", type=int, default=[0], help="random seeds, one match per seed")
+    ap.add_argument("--out", required=True, help="results file (.jsonl or .csv)")
+    ap.add_argument("--format", choices=["jsonl", "csv"], default=None, help="override format from --out extension")
+    ap.add_argument("--workers", type=int, default=0, help="worker processes (default: cpu count)")
+    ap.add_argument("--retries", type=int, default=1, help="retries for crashed or hung matches")
+    ap.add_argument("--match-timeout", type=float, default=None, help="wall clock seconds before a match is killed")
+    ap.add_argument("--turns", type=int, default=GameConstants.TOTAL_TURNS, help="turn limit")
+    ap.add_argument("--timeout", type=float, default=0.5, help="per-turn timeout seconds per bot")
+    ap.add_argument("--replay-dir", default=None, help="optional directory to write one replay per match")
+    ap.add_argument("--verbose", action="store_true", help="keep engine and bot output from the workers")
+    args = ap.parse_args()
+
+    specs = build_matrix(
+        args.red, args.blue, args.maps, args.seeds,
+        turns=args.turns,
+        per_turn_timeout_s=args.timeout,
+        replay_dir=args.replay_dir,
+        verbose=args.verbose,
+    )
+
+    writer = ResultWriter(args.out, args.format)
+    t0 = time.time()
+    try:
+        results = BatchRunner(args.workers, args.retries, args.match_timeout).run(specs, writer)
+    finally:
+        writer.close()
+
+    print(json.dumps(summarize(results), indent=2))
+    print(f"[BATCH] {len(results)} matches in {time.time() - t0:.1f}s, results in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
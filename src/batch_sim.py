@@ -0,0 +1,1024 @@
+# batch_sim.py
+"""
+Batched simulator: N copies of one map stepped in lockstep with NumPy, for training and search.
+
+Needs numpy, which the engine itself does not (pip install numpy). The module imports without it,
+BatchSim raises BatchSimException when constructed.
+
+Every game starts as a copy of a GameState. State is struct-of-arrays with the game axis first:
+
+    money[g, team]                                  team money (team = Team.value)
+    bot_x[g, b], bot_y[g, b]                        position of bot bot_ids[b]
+    hand.*[g, b]                                    what bot b is holding
+    items.*[g, team, cell]                          item on a tile, cell = x * height + y
+    box_count, cook_progress, sink_dirty, sink_progress, sink_using, clean_plates   [g, team, cell]
+    occupancy[g, team, cell]                        bot id standing there, -1 if none
+    order_completed, order_claimed_by, order_penalized                             [g, team, order]
+
+An item slot (hand / items) is five parallel arrays: kind (NO_ITEM, FOOD, PLATE, PAN), food (the
+food, or the food in a pan, as a food code; NO_FOOD if none), dirty, and count/plate for the foods
+on a plate in the order they were added. A food code is food_id * 6 + chopped * 3 + cooked_stage,
+so sorted codes compare like the submit signatures in game_state.py.
+
+Actions mirror RobotController and run for one bot in every game at once:
+
+    sim.start_turn()
+    sim.move(bot_id, dx, dy)                    #dx/dy: int or one value per game
+    sim.pickup(bot_id, tx, ty, active=mask)     #active: which games make the call (default all)
+
+each returns a bool array with what RobotController would have returned in each game.
+
+Not covered: switch_maps (bots stay on their own map), and shop menus are read once at load.
+Check the rules still match the engine with:
+
+    python src/batch_sim.py maps/simple_map.txt --games 16 --turns 300 --bot bots/duo_noodle_bot.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import inspect
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError: #optional, only this module needs it
+    np = None
+
+from game_constants import Team, TileType, FoodType, ShopCosts, GameConstants
+from game_state import GameState
+from item import Item, Food, Plate, Pan
+from map_processor import load_two_team_maps_and_orders
+from robot_controller import RobotController
+from tiles import Box, Sink, SinkTable, Cooker, Shop
+
+
+class BatchSimException(Exception):
+    pass
+
+
+#item kinds
+NO_ITEM, FOOD, PLATE, PAN = 0, 1, 2, 3
+NO_FOOD = -1
+
+#sorts after every food code, pads plate/order signatures
+SIG_PAD = 32767
+
+#buy() item codes: food ids, then the shop items
+BUY_ITEMS: Tuple[Any, ...] = tuple(sorted(FoodType, key=lambda f: f.food_id)) + (ShopCosts.PLATE, ShopCosts.PAN)
+BUY_PLATE = BUY_ITEMS.index(ShopCosts.PLATE)
+BUY_PAN = BUY_ITEMS.index(ShopCosts.PAN)
+
+#RobotController actions BatchSim implements (besides move)
+ACTIONS: Tuple[str, ...] = (
+    "pickup", "place", "trash", "buy", "chop", "start_cook", "take_from_pan",
+    "take_clean_plate", "put_dirty_plate_in_sink", "wash_sink", "add_food_to_plate", "submit",
+)
+
+#4-neighbours in the order game_state looks for a sink / sink table next to a tile
+_NEAR = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise BatchSimException("batch_sim needs numpy (pip install numpy), the engine itself runs without it")
+
+
+def food_code(food_id: int, chopped: bool, cooked_stage: int) -> int:
+    return food_id * 6 + (3 if chopped else 0) + int(cooked_stage)
+
+
+def buy_code(item: Any) -> Any:
+    '''FoodType / ShopCosts to its buy() code, ints and arrays pass through'''
+    if isinstance(item, (FoodType, ShopCosts)):
+        return BUY_ITEMS.index(item)
+    return item
+
+
+def load_game_state(map_path: str) -> GameState:
+    '''GameState for a map set up the way Game does it (orders, switch window, spawns), without bots attached'''
+    from game import find_default_floor_spawn
+
+    map_red, map_blue, orders_red, orders_blue, parsed = load_two_team_maps_and_orders(map_path)
+    gs = GameState(red_map=map_red, blue_map=map_blue)
+    gs.switch_turn = parsed.switch_turn
+    gs.switch_duration = parsed.switch_duration
+    gs.orders[Team.RED] = orders_red
+    gs.orders[Team.BLUE] = orders_blue
+    gs.next_order_id = max((o.order_id for o in orders_red), default=0) + 1
+
+    for team, spawns in ((Team.RED, parsed.spawns_red), (Team.BLUE, parsed.spawns_blue)):
+        for (x, y) in spawns or [find_default_floor_spawn(gs.get_map(team))]:
+            gs.add_bot(team, x, y)
+    return gs
+
+
+class _Slots:
+    '''item slots (bot hands or tiles) as parallel arrays, see the module docstring'''
+    __slots__ = ("kind", "food", "dirty", "count", "plate")
+
+    def __init__(self, shape: Tuple[int, ...], plate_size: int):
+        self.kind = np.zeros(shape, np.int8)
+        self.food = np.full(shape, NO_FOOD, np.int16)
+        self.dirty = np.zeros(shape, np.bool_)
+        self.count = np.zeros(shape, np.int16)
+        self.plate = np.full(shape + (plate_size,), NO_FOOD, np.int16)
+
+    def get(self, idx: Tuple[Any, ...]) -> Tuple[Any, ...]:
+        return (self.kind[idx], self.food[idx], self.dirty[idx], self.count[idx], self.plate[idx])
+
+    def put(self, idx: Tuple[Any, ...], values: Tuple[Any, ...]) -> None:
+        self.kind[idx], self.food[idx], self.dirty[idx], self.count[idx], self.plate[idx] = values
+
+    def clear(self, idx: Tuple[Any, ...]) -> None:
+        self.kind[idx] = NO_ITEM
+        self.food[idx] = NO_FOOD
+        self.dirty[idx] = False
+        self.count[idx] = 0
+        self.plate[idx] = NO_FOOD
+
+    def arrays(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BatchSim:
+    '''N games of one map stepped in lockstep, see the module docstring'''
+
+    #fill value of each per-game array when a game is reset (0 / False otherwise)
+    _FILL = {
+        "hand_food": NO_FOOD, "hand_plate": NO_FOOD, "item_food": NO_FOOD, "item_plate": NO_FOOD,
+        "occupancy": -1, "order_completed": -1, "order_claimed_by": -1,
+    }
+
+    def __init__(self, game_state: GameState, n: int, max_plate_food: int = 8):
+        require_numpy()
+        red = game_state.red_map
+        if bytes(red.tiles.ids) != bytes(game_state.blue_map.tiles.ids):
+            raise BatchSimException("both team maps need the same layout")
+
+        self.n = n
+        self.width = red.width
+        self.height = red.height
+        cells = self.width * self.height
+
+        # ----- layout, never changes -----
+        self.tile_ids = np.frombuffer(bytes(red.tiles.ids), dtype=np.uint8).copy()
+        self.walkable = np.frombuffer(bytes(red.get_walkable_grid()), dtype=np.uint8).astype(np.bool_)
+        self.is_counter = self.tile_ids == TileType.COUNTER.tile_id
+        self.is_box = self.tile_ids == TileType.BOX.tile_id
+        self.is_sink = self.tile_ids == TileType.SINK.tile_id
+        self.is_sinktable = self.tile_ids == TileType.SINKTABLE.tile_id
+        self.is_cooker = self.tile_ids == TileType.COOKER.tile_id
+        self.is_trash = self.tile_ids == TileType.TRASH.tile_id
+        self.is_submit = self.tile_ids == TileType.SUBMIT.tile_id
+        self.is_shop = self.tile_ids == TileType.SHOP.tile_id
+
+        #where washed plates / submitted plates go, -1 if the map has nowhere to put them
+        self.sinktable_for_sink = self.__nearest_of(red, TileType.SINKTABLE, self.is_sink)
+        self.sink_for_submit = self.__nearest_of(red, TileType.SINK, self.is_submit)
+
+        self.shop_menu = np.zeros((2, cells, len(BUY_ITEMS)), np.bool_)
+        for team in Team:
+            for (x, y), tile in game_state.get_map(team).tiles.stored_tiles():
+                if isinstance(tile, Shop):
+                    for k, item in enumerate(BUY_ITEMS):
+                        self.shop_menu[team.value, x * self.height + y, k] = item in tile.shop_items
+        self.buy_cost = np.array([item.buy_cost for item in BUY_ITEMS], np.int64)
+
+        #per food code
+        codes = range(len(FoodType) * 6)
+        self.code_can_chop = np.array([BUY_ITEMS[c // 6].can_chop for c in codes], np.bool_)
+        self.code_can_cook = np.array([BUY_ITEMS[c // 6].can_cook for c in codes], np.bool_)
+        self.stage_progress = np.array([0, GameConstants.COOK_PROGRESS, GameConstants.BURN_PROGRESS], np.int32)
+
+        # ----- bots -----
+        self.bot_ids: List[int] = sorted(game_state.bots)
+        self.bot_index: Dict[int, int] = {bot_id: b for b, bot_id in enumerate(self.bot_ids)}
+        self.bot_team: List[int] = [game_state.bots[bot_id].team.value for bot_id in self.bot_ids]
+
+        # ----- orders, only their progress changes -----
+        orders = [game_state.orders[team] for team in Team]
+        self.max_plate_food = max([max_plate_food] + [len(o.required) for team_orders in orders for o in team_orders])
+        k = self.max_plate_food
+        n_orders = max(1, max(len(team_orders) for team_orders in orders))
+        never = np.iinfo(np.int32).max
+
+        self.order_ids: List[List[int]] = [[o.order_id for o in team_orders] for team_orders in orders]
+        self.order_created = np.full((2, n_orders), never, np.int32) #padding orders are never active
+        self.order_expires = np.full((2, n_orders), never, np.int32)
+        self.order_reward = np.zeros((2, n_orders), np.int64)
+        self.order_penalty = np.zeros((2, n_orders), np.int64)
+        self.order_sig = np.full((2, n_orders, k), SIG_PAD, np.int16)
+        for t, team_orders in enumerate(orders):
+            for i, o in enumerate(team_orders):
+                self.order_created[t, i] = o.created_turn
+                self.order_expires[t, i] = o.expires_turn
+                self.order_reward[t, i] = o.reward
+                self.order_penalty[t, i] = o.penalty
+                sig = sorted(food_code(ft.food_id, ft.can_chop, 1 if ft.can_cook else 0) for ft in o.required)
+                self.order_sig[t, i, :len(sig)] = sig
+
+        # ----- per game state -----
+        shape = (n, 2, cells)
+        bots = len(self.bot_ids)
+        self.turn = game_state.turn
+        self.money = np.zeros((n, 2), np.int64)
+        self.bot_x = np.zeros((n, bots), np.int32)
+        self.bot_y = np.zeros((n, bots), np.int32)
+        self.moves_left = np.ones((n, bots), np.int8)
+        self.actions_left = np.ones((n, bots), np.int8)
+        self.hand = _Slots((n, bots), k)
+        self.items = _Slots(shape, k)
+        self.box_count = np.zeros(shape, np.int32)
+        self.cook_progress = np.zeros(shape, np.int32)
+        self.sink_dirty = np.zeros(shape, np.int32)
+        self.sink_progress = np.zeros(shape, np.int32)
+        self.sink_using = np.zeros(shape, np.bool_)
+        self.clean_plates = np.zeros(shape, np.int32)
+        self.occupancy = np.full(shape, -1, np.int32)
+        self.order_completed = np.full((n, 2, n_orders), -1, np.int32)
+        self.order_claimed_by = np.full((n, 2, n_orders), -1, np.int32)
+        self.order_penalized = np.zeros((n, 2, n_orders), np.bool_)
+
+        self.__games = np.arange(n)
+
+        #every game starts as the same state
+        if n:
+            self.load_game(0, game_state)
+            for arr in self.state_arrays().values():
+                arr[1:] = arr[0]
+
+    def __nearest_of(self, m: Any, tile_type: TileType, sources: Any) -> Any:
+        '''for each source cell, a tile_type cell next to it, else the first one on the map (-1 if none)'''
+        out = np.full(self.width * self.height, -1, np.int32)
+        anywhere = m.get_tile_locations(tile_type)
+        for c in np.flatnonzero(sources):
+            x, y = divmod(int(c), self.height)
+            near = [(x + dx, y + dy) for dx, dy in _NEAR if m.in_bounds(x + dx, y + dy) and m.tiles.tile_type_at(x + dx, y + dy) == tile_type]
+            pos = near[0] if near else (anywhere[0] if anywhere else None)
+            if pos is not None:
+                out[c] = pos[0] * self.height + pos[1]
+        return out
+
+    # ----------------------------
+    # Loading and reading state
+    # ----------------------------
+
+    def state_arrays(self) -> Dict[str, Any]:
+        '''every per-game array by name, game axis first'''
+        d = {
+            "money": self.money,
+            "bot_x": self.bot_x,
+            "bot_y": self.bot_y,
+            "moves_left": self.moves_left,
+            "actions_left": self.actions_left,
+        }
+        d.update({"hand_" + name: arr for name, arr in self.hand.arrays().items()})
+        d.update({"item_" + name: arr for name, arr in self.items.arrays().items()})
+        d.update({
+            "box_count": self.box_count,
+            "cook_progress": self.cook_progress,
+            "sink_dirty": self.sink_dirty,
+            "sink_progress": self.sink_progress,
+            "sink_using": self.sink_using,
+            "clean_plates": self.clean_plates,
+            "occupancy": self.occupancy,
+            "order_completed": self.order_completed,
+            "order_claimed_by": self.order_claimed_by,
+            "order_penalized": self.order_penalized,
+        })
+        return d
+
+    def load_game(self, g: int, game_state: GameState) -> None:
+        '''overwrite game g with a GameState on the same map and turn (move/action budgets start fresh)'''
+        if game_state.turn != self.turn:
+            raise BatchSimException(f"game state is on turn {game_state.turn}, the batch is on turn {self.turn}")
+
+        for name, arr in self.state_arrays().items():
+            arr[g] = self._FILL.get(name, 0)
+        self.moves_left[g] = 1
+        self.actions_left[g] = 1
+
+        for team in Team:
+            t = team.value
+            m = game_state.get_map(team)
+            if bytes(m.tiles.ids) != self.tile_ids.tobytes():
+                raise BatchSimException(f"{team.name} map has a different layout")
+
+            self.money[g, t] = game_state.get_team_money(team)
+            for (x, y), tile in m.tiles.stored_tiles():
+                c = x * self.height + y
+                self.__write_item(self.items, (g, t, c), tile.item)
+                if isinstance(tile, Box):
+                    self.box_count[g, t, c] = tile.count
+                elif isinstance(tile, Cooker):
+                    self.cook_progress[g, t, c] = tile.cook_progress
+                elif isinstance(tile, Sink):
+                    self.sink_dirty[g, t, c] = tile.num_dirty_plates
+                    self.sink_progress[g, t, c] = tile.curr_dirty_plate_progress
+                    self.sink_using[g, t, c] = tile.using
+                elif isinstance(tile, SinkTable):
+                    self.clean_plates[g, t, c] = tile.num_clean_plates
+
+            team_orders = game_state.orders[team]
+            if [o.order_id for o in team_orders] != self.order_ids[t]:
+                raise BatchSimException(f"{team.name} orders differ from the ones the batch was built with")
+            for i, o in enumerate(team_orders):
+                self.order_completed[g, t, i] = -1 if o.completed_turn is None else o.completed_turn
+                self.order_claimed_by[g, t, i] = -1 if o.claimed_by is None else o.claimed_by
+                self.order_penalized[g, t, i] = o.penalized
+
+        for b, bot_id in enumerate(self.bot_ids):
+            bot = game_state.bots.get(bot_id)
+            if bot is None or bot.team.value != self.bot_team[b]:
+                raise BatchSimException(f"bot {bot_id} is missing or changed team")
+            if bot.map_team != bot.team:
+                raise BatchSimException(f"bot {bot_id} switched maps, BatchSim does not support switching")
+            self.bot_x[g, b] = bot.x
+            self.bot_y[g, b] = bot.y
+            self.__write_item(self.hand, (g, b), bot.holding)
+            self.occupancy[g, self.bot_team[b], bot.x * self.height + bot.y] = bot_id
+
+    def __write_item(self, slots: _Slots, idx: Tuple[int, ...], item: Optional[Item]) -> None:
+        slots.clear(idx)
+        if item is None:
+            return
+        if isinstance(item, Food):
+            slots.kind[idx] = FOOD
+            slots.food[idx] = food_code(item.food_id, item.chopped, item.cooked_stage)
+        elif isinstance(item, Plate):
+            if len(item.food) > self.max_plate_food:
+                raise BatchSimException(f"plate holds {len(item.food)} foods, max_plate_food is {self.max_plate_food}")
+            slots.kind[idx] = PLATE
+            slots.dirty[idx] = item.dirty
+            slots.count[idx] = len(item.food)
+            for i, f in enumerate(item.food):
+                slots.plate[idx + (i,)] = food_code(f.food_id, f.chopped, f.cooked_stage)
+        elif isinstance(item, Pan):
+            slots.kind[idx] = PAN
+            if item.food is not None:
+                slots.food[idx] = food_code(item.food.food_id, item.food.chopped, item.food.cooked_stage)
+        else:
+            raise BatchSimException(f"can't encode item {type(item).__name__}")
+
+    # ----------------------------
+    # Turn mechanics
+    # ----------------------------
+
+    def start_turn(self) -> None:
+        '''GameState.start_turn for every game: money, cooking, washing, order expiry, fresh budgets'''
+        self.turn += 1
+        self.money += GameConstants.MONEY_PER_TURN
+
+        #cookers with food in the pan cook, and burn
+        items = self.items
+        cooking = self.is_cooker & (items.kind == PAN) & (items.food != NO_FOOD)
+        self.cook_progress += cooking
+        stage = items.food % 3
+        cooked = cooking & (self.cook_progress == GameConstants.COOK_PROGRESS) & (stage == 0)
+        burnt = cooking & ~cooked & (self.cook_progress >= GameConstants.BURN_PROGRESS)
+        items.food += cooked
+        np.copyto(items.food, items.food - stage + 2, where=burnt)
+
+        #sinks wash one plate step per turn a bot kept washing
+        washing = self.sink_using & (self.sink_dirty > 0)
+        self.sink_progress += washing
+        done = washing & (self.sink_progress >= GameConstants.PLATE_WASH_PROGRESS)
+        self.sink_progress[done] = 0
+        self.sink_dirty -= done
+        g, t, c = np.nonzero(done)
+        table = self.sinktable_for_sink[c]
+        has = table >= 0
+        np.add.at(self.clean_plates, (g[has], t[has], table[has]), 1)
+        self.sink_using.fill(False)
+
+        #orders that ran out unfilled cost their penalty once
+        expired = (self.order_completed < 0) & (self.turn > self.order_expires) & ~self.order_penalized
+        self.money -= (expired * self.order_penalty).sum(axis=2)
+        self.order_penalized |= expired
+
+        self.moves_left.fill(1)
+        self.actions_left.fill(1)
+
+    # ----------------------------
+    # Helpers
+    # ----------------------------
+
+    def __vector(self, v: Any) -> Any:
+        return np.broadcast_to(np.asarray(v, dtype=np.int64), (self.n,))
+
+    def __active(self, active: Any) -> Any:
+        return np.ones(self.n, np.bool_) if active is None else np.array(active, dtype=np.bool_)
+
+    def __bot(self, bot_id: int) -> Tuple[int, int]:
+        b = self.bot_index.get(bot_id)
+        if b is None:
+            raise BatchSimException(f"unknown bot_id {bot_id}")
+        return b, self.bot_team[b]
+
+    def __begin_action(self, bot_id: int, active: Any, tx: Any, ty: Any) -> Tuple[int, int, Any, Any]:
+        '''
+        uses up the bot's action where it has one and resolves the target like RobotController:
+        defaults to the bot's cell, must be within Chebyshev distance 1 and in bounds
+
+        returns (bot index, map team, games where the call can go on, target cell)
+        '''
+        b, t = self.__bot(bot_id)
+        ok = self.__active(active) & (self.actions_left[:, b] > 0)
+        self.actions_left[ok, b] -= 1
+
+        x, y = self.bot_x[:, b], self.bot_y[:, b]
+        tx = x if tx is None else self.__vector(tx)
+        ty = y if ty is None else self.__vector(ty)
+        inside = (tx >= 0) & (tx < self.width) & (ty >= 0) & (ty < self.height)
+        ok &= inside & (np.maximum(np.abs(tx - x), np.abs(ty - y)) <= 1)
+        return b, t, ok, np.where(inside, tx * self.height + ty, 0)
+
+    def __can_cook(self, food: Any) -> Any:
+        return (food != NO_FOOD) & self.code_can_cook[np.maximum(food, 0)]
+
+    def __fill_pan(self, g: Any, b: int, t: int, cell: Any) -> None:
+        '''held food into the empty pan at cell, cooking resumes at the start of the food's stage'''
+        at = (g, t, cell[g])
+        food = self.hand.food[g, b]
+        self.items.food[at] = food
+        self.hand.clear((g, b))
+        self.cook_progress[at] = self.stage_progress[food % 3]
+
+    def __append_food(self, slots: _Slots, idx: Tuple[Any, ...], food: Any) -> None:
+        count = slots.count[idx]
+        if (count >= self.max_plate_food).any():
+            raise BatchSimException(f"a plate went over max_plate_food={self.max_plate_food}")
+        slots.plate[idx + (count,)] = food
+        slots.count[idx] = count + 1
+
+    # ----------------------------
+    # Movement
+    # ----------------------------
+
+    def move(self, bot_id: int, dx: Any, dy: Any, active: Any = None) -> Any:
+        b, t = self.__bot(bot_id)
+        ok = self.__active(active) & (self.moves_left[:, b] > 0)
+        self.moves_left[ok, b] -= 1
+
+        dx, dy = self.__vector(dx), self.__vector(dy)
+        nx, ny = self.bot_x[:, b] + dx, self.bot_y[:, b] + dy
+        inside = (nx >= 0) & (nx < self.width) & (ny >= 0) & (ny < self.height)
+        cell = np.where(inside, nx * self.height + ny, 0)
+        ok &= (np.maximum(np.abs(dx), np.abs(dy)) <= 1) & ((dx != 0) | (dy != 0)) & inside
+        ok &= self.walkable[cell] & (self.occupancy[self.__games, t, cell] < 0)
+
+        g = np.flatnonzero(ok)
+        self.occupancy[g, t, self.bot_x[g, b] * self.height + self.bot_y[g, b]] = -1
+        self.occupancy[g, t, cell[g]] = bot_id
+        self.bot_x[g, b] = nx[g]
+        self.bot_y[g, b] = ny[g]
+        return ok
+
+    # ----------------------------
+    # Inventory
+    # ----------------------------
+
+    def pickup(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= self.hand.kind[:, b] == NO_ITEM
+        kind = self.items.kind[self.__games, t, cell]
+        box = ok & self.is_box[cell]
+        stocked = box & (self.box_count[self.__games, t, cell] > 0) & (kind != NO_ITEM)
+
+        #empty box: enforce the invariant
+        g = np.flatnonzero(box & ~stocked)
+        self.box_count[g, t, cell[g]] = 0
+        self.items.clear((g, t, cell[g]))
+
+        #a box hands out a copy of what it stores
+        g = np.flatnonzero(stocked)
+        at = (g, t, cell[g])
+        self.hand.put((g, b), self.items.get(at))
+        self.box_count[at] -= 1
+        g = g[self.box_count[at] <= 0]
+        self.box_count[g, t, cell[g]] = 0
+        self.items.clear((g, t, cell[g]))
+
+        #anything else is taken off the tile
+        plain = ok & ~self.is_box[cell] & (kind != NO_ITEM)
+        g = np.flatnonzero(plain)
+        at = (g, t, cell[g])
+        self.hand.put((g, b), self.items.get(at))
+        self.items.clear(at)
+        return stocked | plain
+
+    def place(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        games = self.__games
+        held = self.hand.kind[:, b].copy()
+        ok &= held != NO_ITEM
+        kind = self.items.kind[games, t, cell]
+        food = self.items.food[games, t, cell]
+        cooker = ok & self.is_cooker[cell]
+
+        #cooker: swap pans, unless the one on it has food
+        swap = cooker & (held == PAN) & ~((kind == PAN) & (food != NO_FOOD))
+        g = np.flatnonzero(swap)
+        at = (g, t, cell[g])
+        old = self.items.get(at)
+        self.items.put(at, self.hand.get((g, b)))
+        self.hand.clear((g, b))
+        had_pan = old[0] == PAN
+        self.hand.put((g[had_pan], b), tuple(v[had_pan] for v in old))
+        pan_food = self.items.food[at]
+        self.cook_progress[at] = np.where(self.__can_cook(pan_food), self.stage_progress[pan_food % 3], 0)
+
+        #cooker: cookable food into its empty pan
+        into_pan = cooker & (held == FOOD) & (kind == PAN) & (food == NO_FOOD) & self.__can_cook(self.hand.food[:, b])
+        self.__fill_pan(np.flatnonzero(into_pan), b, t, cell)
+
+        #box: enforce the invariant, then an empty box takes anything and a stocked one only the same item
+        box = ok & self.is_box[cell]
+        count = self.box_count[games, t, cell]
+        g = np.flatnonzero(box & (count <= 0))
+        self.box_count[g, t, cell[g]] = 0
+        self.items.clear((g, t, cell[g]))
+
+        count = self.box_count[games, t, cell]
+        kind = self.items.kind[games, t, cell]
+        empty = box & ((count == 0) | (kind == NO_ITEM))
+        g = np.flatnonzero(empty)
+        at = (g, t, cell[g])
+        self.items.put(at, self.hand.get((g, b)))
+        self.box_count[at] = 1
+        self.hand.clear((g, b))
+
+        h = self.hand.get((games, b))
+        it = self.items.get((games, t, cell))
+        same_item = (h[0] == it[0]) & (h[1] == it[1]) & (h[2] == it[2]) & (h[3] == it[3]) & (h[4] == it[4]).all(axis=1)
+        same = box & ~empty & same_item
+        g = np.flatnonzero(same)
+        self.box_count[g, t, cell[g]] += 1
+        self.hand.clear((g, b))
+
+        #any other tile holds one item
+        plain = ok & ~self.is_cooker[cell] & ~self.is_box[cell] & (kind == NO_ITEM)
+        g = np.flatnonzero(plain)
+        at = (g, t, cell[g])
+        self.items.put(at, self.hand.get((g, b)))
+        self.hand.clear((g, b))
+        return swap | into_pan | empty | same | plain
+
+    def trash(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        held = self.hand.kind[:, b].copy()
+        ok &= (held != NO_ITEM) & self.is_trash[cell]
+
+        #plates and pans are kept, emptied (a trashed plate comes back clean)
+        g = np.flatnonzero(ok)
+        self.hand.clear((g, b))
+        self.hand.kind[g, b] = np.where((held[g] == PLATE) | (held[g] == PAN), held[g], NO_ITEM)
+        return ok
+
+    # ----------------------------
+    # Shop
+    # ----------------------------
+
+    def buy(self, bot_id: int, item: Any, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        '''item: FoodType / ShopCosts, or buy codes (index into BUY_ITEMS) per game'''
+        codes = self.__vector(buy_code(item))
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        valid = (codes >= 0) & (codes < len(BUY_ITEMS))
+        codes = np.where(valid, codes, 0)
+        cost = self.buy_cost[codes]
+        ok &= self.is_shop[cell] & (self.hand.kind[:, b] == NO_ITEM) & valid & self.shop_menu[t, cell, codes]
+        ok &= self.money[:, t] >= cost
+
+        g = np.flatnonzero(ok)
+        self.money[g, t] -= cost[g]
+        c = codes[g]
+        self.hand.kind[g, b] = np.where(c == BUY_PLATE, PLATE, np.where(c == BUY_PAN, PAN, FOOD))
+        self.hand.food[g, b] = np.where(c < BUY_PLATE, c * 6, NO_FOOD)
+        return ok
+
+    # ----------------------------
+    # Food processing
+    # ----------------------------
+
+    def chop(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        food = self.items.food[self.__games, t, cell]
+        ok &= self.is_counter[cell] & (self.hand.kind[:, b] == NO_ITEM)
+        ok &= (self.items.kind[self.__games, t, cell] == FOOD) & self.code_can_chop[np.maximum(food, 0)]
+
+        g = np.flatnonzero(ok)
+        chopped = (food[g] // 3) % 2 == 1
+        self.items.food[g, t, cell[g]] = np.where(chopped, food[g], food[g] + 3)
+        return ok
+
+    def start_cook(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= self.is_cooker[cell] & (self.items.kind[self.__games, t, cell] == PAN)
+        ok &= (self.items.food[self.__games, t, cell] == NO_FOOD)
+        ok &= (self.hand.kind[:, b] == FOOD) & self.__can_cook(self.hand.food[:, b])
+        self.__fill_pan(np.flatnonzero(ok), b, t, cell)
+        return ok
+
+    def take_from_pan(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= (self.hand.kind[:, b] == NO_ITEM) & self.is_cooker[cell]
+        ok &= (self.items.kind[self.__games, t, cell] == PAN) & (self.items.food[self.__games, t, cell] != NO_FOOD)
+
+        g = np.flatnonzero(ok)
+        at = (g, t, cell[g])
+        self.hand.kind[g, b] = FOOD
+        self.hand.food[g, b] = self.items.food[at]
+        self.items.food[at] = NO_FOOD
+        self.cook_progress[at] = 0
+        return ok
+
+    # ----------------------------
+    # Plates and sinks
+    # ----------------------------
+
+    def take_clean_plate(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= (self.hand.kind[:, b] == NO_ITEM) & self.is_sinktable[cell]
+        ok &= self.clean_plates[self.__games, t, cell] > 0
+
+        g = np.flatnonzero(ok)
+        self.clean_plates[g, t, cell[g]] -= 1
+        self.hand.kind[g, b] = PLATE
+        return ok
+
+    def put_dirty_plate_in_sink(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= (self.hand.kind[:, b] == PLATE) & self.hand.dirty[:, b] & self.is_sink[cell]
+
+        g = np.flatnonzero(ok)
+        self.sink_dirty[g, t, cell[g]] += 1
+        self.hand.clear((g, b))
+        return ok
+
+    def wash_sink(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= self.is_sink[cell] & (self.sink_dirty[self.__games, t, cell] > 0)
+
+        g = np.flatnonzero(ok)
+        self.sink_using[g, t, cell[g]] = True
+        return ok
+
+    def add_food_to_plate(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        games = self.__games
+        held = self.hand.kind[:, b].copy()
+        kind = self.items.kind[games, t, cell]
+
+        #holding a clean plate, food on the tile
+        onto_held = ok & (held == PLATE) & ~self.hand.dirty[:, b] & (kind == FOOD)
+        g = np.flatnonzero(onto_held)
+        at = (g, t, cell[g])
+        self.__append_food(self.hand, (g, b), self.items.food[at])
+        self.items.clear(at)
+
+        #holding food, clean plate on the tile
+        onto_tile = ok & (held == FOOD) & (kind == PLATE) & ~self.items.dirty[games, t, cell]
+        g = np.flatnonzero(onto_tile)
+        self.__append_food(self.items, (g, t, cell[g]), self.hand.food[g, b])
+        self.hand.clear((g, b))
+        return onto_held | onto_tile
+
+    # ----------------------------
+    # Submit
+    # ----------------------------
+
+    def submit(self, bot_id: int, tx: Any = None, ty: Any = None, active: Any = None) -> Any:
+        '''first active order on the bot's map matching the held clean plate pays its reward to that map's team'''
+        b, t, ok, cell = self.__begin_action(bot_id, active, tx, ty)
+        ok &= self.is_submit[cell] & (self.hand.kind[:, b] == PLATE) & ~self.hand.dirty[:, b]
+
+        g = np.flatnonzero(ok)
+        plate = self.hand.plate[g, b]
+        sig = np.sort(np.where(plate == NO_FOOD, SIG_PAD, plate), axis=1)
+        live = (self.order_created[t] <= self.turn) & (self.turn <= self.order_expires[t])
+        match = (sig[:, None, :] == self.order_sig[t][None]).all(axis=2) & live & (self.order_completed[g, t] < 0)
+        found = match.any(axis=1)
+        first = match.argmax(axis=1)[found]
+        g = g[found]
+
+        self.order_completed[g, t, first] = self.turn
+        self.order_claimed_by[g, t, first] = bot_id
+        self.money[g, t] += self.order_reward[t, first]
+
+        #the plate goes dirty into a sink on that map
+        sink = self.sink_for_submit[cell[g]]
+        has = sink >= 0
+        self.sink_dirty[g[has], t, sink[has]] += 1
+        self.hand.clear((g, b))
+
+        res = np.zeros(self.n, np.bool_)
+        res[g] = True
+        return res
+
+
+# ----------------------------
+# Parity check against GameState / RobotController
+# ----------------------------
+
+class _RecordingController:
+    '''forwards to a RobotController and records each move/action call as (name, args, returned)'''
+
+    def __init__(self, rc: RobotController):
+        self.__rc = rc
+        self.calls: List[Tuple[str, Tuple[Any, ...], Any]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.__rc, name)
+        if name == "switch_maps":
+            def switch() -> bool:
+                if attr():
+                    raise BatchSimException("the bot switched maps, BatchSim does not support switching")
+                return False
+            return switch
+        if name != "move" and name not in ACTIONS:
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            res = attr(*args, **kwargs)
+            bound = inspect.signature(attr).bind(*args, **kwargs)
+            bound.apply_defaults()
+            self.calls.append((name, tuple(bound.arguments.values()), res))
+            return res
+        return call
+
+
+#actions that can work for what a bot holds, and the tile each action wants
+_LIKELY_ACTIONS: Dict[Optional[str], Tuple[str, ...]] = {
+    None: ("pickup", "buy", "chop", "take_from_pan", "take_clean_plate", "wash_sink"),
+    "Food": ("place", "start_cook", "add_food_to_plate", "trash"),
+    "Plate": ("add_food_to_plate", "submit", "put_dirty_plate_in_sink", "place", "trash"),
+    "Pan": ("place", "trash"),
+}
+_ACTION_TILES: Dict[str, Tuple[TileType, ...]] = {
+    "pickup": (TileType.COUNTER, TileType.COOKER, TileType.BOX), "place": (TileType.COUNTER, TileType.COOKER, TileType.BOX),
+    "add_food_to_plate": (TileType.COUNTER, TileType.COOKER, TileType.BOX), "buy": (TileType.SHOP,),
+    "chop": (TileType.COUNTER,), "start_cook": (TileType.COOKER,), "take_from_pan": (TileType.COOKER,),
+    "take_clean_plate": (TileType.SINKTABLE,), "wash_sink": (TileType.SINK,), "put_dirty_plate_in_sink": (TileType.SINK,),
+    "submit": (TileType.SUBMIT,), "trash": (TileType.TRASH,),
+}
+
+
+def _station_targets(sim: BatchSim) -> Dict[Tuple[int, int], List[Tuple[int, int, int]]]:
+    '''cell -> (x, y, tile id) of the non floor/wall cells within reach of it'''
+    plain = (TileType.FLOOR.tile_id, TileType.WALL.tile_id)
+    out: Dict[Tuple[int, int], List[Tuple[int, int, int]]] = {}
+    for x in range(sim.width):
+        for y in range(sim.height):
+            out[(x, y)] = [
+                (nx, ny, int(sim.tile_ids[nx * sim.height + ny]))
+                for nx in range(max(x - 1, 0), min(x + 2, sim.width))
+                for ny in range(max(y - 1, 0), min(y + 2, sim.height))
+                if sim.tile_ids[nx * sim.height + ny] not in plain
+            ]
+    return out
+
+
+def _random_turn(rc: Any, rng: random.Random, stations: Dict[Tuple[int, int], List[Tuple[int, int, int]]]) -> None:
+    '''one move and one action per bot, mostly ones that fit what it holds and what is in reach, some illegal on purpose'''
+    for bot_id in rc.get_team_bot_ids(rc.get_team()):
+        if rng.random() < 0.9:
+            rc.move(bot_id, rng.randint(-1, 1), rng.randint(-1, 1))
+        else:
+            rc.move(bot_id, rng.randint(-2, 2), rng.randint(-2, 2))
+
+        for _ in range(2 if rng.random() < 0.05 else 1):
+            state = rc.get_bot_state(bot_id)
+            x, y = state["x"], state["y"]
+            held = state["holding"]["type"] if state["holding"] else None
+            name = rng.choice(_LIKELY_ACTIONS[held] if rng.random() < 0.8 else ACTIONS)
+
+            near = stations[(x, y)]
+            wanted = [s for s in near if any(s[2] == t.tile_id for t in _ACTION_TILES[name])]
+            r = rng.random()
+            if r < 0.1:
+                target: Tuple[int, ...] = ()
+            elif r < 0.85 and (wanted or near):
+                target = rng.choice(wanted or near)[:2]
+            else:
+                target = (x + rng.randint(-2, 2), y + rng.randint(-2, 2))
+            args = (bot_id, rng.choice(BUY_ITEMS)) if name == "buy" else (bot_id,)
+            getattr(rc, name)(*(args + target))
+
+
+def _random_item(rng: random.Random) -> Optional[Item]:
+    def food() -> Food:
+        f = Food(rng.choice(BUY_ITEMS[:BUY_PLATE]))
+        f.chopped = f.can_chop and rng.random() < 0.5
+        f.cooked_stage = rng.randint(0, 2) if f.can_cook else 0
+        return f
+
+    r = rng.random()
+    if r < 0.3:
+        return None
+    if r < 0.6:
+        return food()
+    if r < 0.85:
+        return Plate([food() for _ in range(rng.randint(0, 2))], dirty=rng.random() < 0.2)
+    return Pan(food() if rng.random() < 0.5 else None)
+
+
+def _scramble(gs: GameState, rng: random.Random) -> None:
+    '''fills stations and hands with random contents so every rule gets exercised early'''
+    for team in Team:
+        gs.add_team_money(team, 1000)
+        m = gs.get_map(team)
+        for (x, y), tile in list(m.tiles.stored_tiles()):
+            tile = m.tiles[x][y]
+            if isinstance(tile, Sink):
+                tile.num_dirty_plates = rng.randint(0, 3)
+                if tile.num_dirty_plates:
+                    gs.mark_timed_tile(team, x, y)
+            elif isinstance(tile, SinkTable):
+                tile.num_clean_plates = rng.randint(0, 3)
+            elif isinstance(tile, Cooker):
+                food = _random_item(rng)
+                if isinstance(food, Food) and food.can_cook:
+                    tile.item.food = food
+                    tile.cook_progress = rng.randint(0, 45)
+                    gs.mark_timed_tile(team, x, y)
+            elif isinstance(tile, Box):
+                tile.item = _random_item(rng)
+                tile.count = rng.randint(1, 3) if tile.item is not None else 0
+            elif tile.tile_name == TileType.COUNTER.tile_name:
+                tile.item = _random_item(rng)
+    for bot in gs.bots.values():
+        bot.holding = _random_item(rng)
+
+
+def replay_calls(sim: BatchSim, calls: Sequence[List[Tuple[str, Tuple[Any, ...], Any]]]) -> None:
+    '''
+    runs calls[g] (recorded controller calls) on game g of sim, all games in lockstep,
+    raises BatchSimException where sim returns something else than the recorded call did
+    '''
+    n = sim.n
+    k = 0
+    while True:
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        for g, game_calls in enumerate(calls):
+            if k < len(game_calls):
+                name, args, _ = game_calls[k]
+                groups.setdefault((name, args[0]), []).append(g)
+        if not groups:
+            return
+
+        for (name, bot_id), games in groups.items():
+            active = np.zeros(n, np.bool_)
+            active[games] = True
+            b = sim.bot_index[bot_id]
+            item = np.zeros(n, np.int64)
+            a0 = np.zeros(n, np.int64)
+            a1 = np.zeros(n, np.int64)
+            for g in games:
+                args = calls[g][k][1][1:]
+                if name == "buy":
+                    item[g] = buy_code(args[0])
+                    args = args[1:]
+                a0[g] = sim.bot_x[g, b] if args[0] is None else args[0]
+                a1[g] = sim.bot_y[g, b] if args[1] is None else args[1]
+
+            if name == "buy":
+                res = sim.buy(bot_id, item, a0, a1, active=active)
+            else:
+                res = getattr(sim, name)(bot_id, a0, a1, active=active)
+
+            for g in games:
+                if bool(res[g]) != bool(calls[g][k][2]):
+                    raise BatchSimException(
+                        f"turn {sim.turn} game {g}: {name}{calls[g][k][1]} returned {bool(res[g])}, engine returned {calls[g][k][2]}"
+                    )
+        k += 1
+
+
+def compare_states(sim: BatchSim, expected: BatchSim) -> Optional[str]:
+    '''first difference between two batches (budgets aside), None if equal'''
+    other = expected.state_arrays()
+    for name, arr in sim.state_arrays().items():
+        if name in ("moves_left", "actions_left"):
+            continue
+        if not np.array_equal(arr, other[name]):
+            diff = (arr != other[name]).reshape(sim.n, -1).any(axis=1)
+            return f"{name} differs in game {int(np.flatnonzero(diff)[0])}"
+    return None
+
+
+def check_parity(map_path: str, games: int = 8, turns: int = 200, seed: int = 0, bot_path: Optional[str] = None) -> Dict[str, int]:
+    '''
+    runs `games` engine games (GameState + RobotController) next to one BatchSim and compares
+    every call result and, after each turn, the full state
+
+    games play random actions, odd ones from scrambled stations; with bot_path the even games are
+    played by that bot on both teams
+    returns how many calls of each kind succeeded, raises BatchSimException on the first mismatch
+    '''
+    from game import import_file
+
+    refs = [load_game_state(map_path) for _ in range(games)]
+    rngs = [random.Random(seed * 100003 + g) for g in range(games)]
+
+    #odd games start from scrambled stations (plates in sinks, food cooking, ...)
+    for g in range(1, games, 2):
+        _scramble(refs[g], rngs[g])
+    sim = BatchSim(refs[0], games)
+    for g in range(1, games, 2):
+        sim.load_game(g, refs[g])
+    mirror = BatchSim(refs[0], games)
+    stations = _station_targets(sim)
+    controllers = [{team: RobotController(team, gs, verbose=False) for team in Team} for gs in refs]
+
+    players: List[Dict[Team, Any]] = [{} for _ in range(games)]
+    if bot_path is not None:
+        module = import_file(os.path.basename(bot_path).rsplit(".", 1)[0], bot_path)
+        for g in range(0, games, 2):
+            players[g] = {team: module.BotPlayer(copy.deepcopy(refs[g].get_map(team))) for team in Team}
+
+    succeeded: Dict[str, int] = {}
+    for _ in range(turns):
+        for gs in refs:
+            gs.start_turn()
+        sim.start_turn()
+
+        #same order as Game.run_game
+        for team in (Team.BLUE, Team.RED):
+            calls = []
+            for g in range(games):
+                rec = _RecordingController(controllers[g][team])
+                if team in players[g]:
+                    players[g][team].play_turn(rec)
+                else:
+                    _random_turn(rec, rngs[g], stations)
+                calls.append(rec.calls)
+                for name, _, res in rec.calls:
+                    if res:
+                        succeeded[name] = succeeded.get(name, 0) + 1
+            replay_calls(sim, calls)
+
+        mirror.turn = sim.turn
+        for g, gs in enumerate(refs):
+            mirror.load_game(g, gs)
+        diff = compare_states(sim, mirror)
+        if diff is not None:
+            raise BatchSimException(f"turn {sim.turn}: {diff}")
+
+    return succeeded
+
+
+def bench(map_path: str, games: int, turns: int, seed: int = 0) -> float:
+    '''game turns per second of BatchSim with random moves and actions for every bot'''
+    sim = BatchSim(load_game_state(map_path), games)
+    rng = np.random.default_rng(seed)
+    t0 = time.perf_counter()
+    for _ in range(turns):
+        sim.start_turn()
+        for b, bot_id in enumerate(sim.bot_ids):
+            sim.move(bot_id, rng.integers(-1, 2, games), rng.integers(-1, 2, games))
+            tx = sim.bot_x[:, b] + rng.integers(-1, 2, games)
+            ty = sim.bot_y[:, b] + rng.integers(-1, 2, games)
+            chosen = rng.integers(0, len(ACTIONS), games)
+            for a, name in enumerate(ACTIONS):
+                active = chosen == a
+                if name == "buy":
+                    sim.buy(bot_id, rng.integers(0, len(BUY_ITEMS), games), tx, ty, active=active)
+                else:
+                    getattr(sim, name)(bot_id, tx, ty, active=active)
+    return games * turns / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="check BatchSim against the engine rules, or time it")
+    parser.add_argument("map", help="map file")
+    parser.add_argument("--games", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bot", default=None, help="bot that plays the even games (both teams), the rest play randomly")
+    parser.add_argument("--bench", action="store_true", help="time BatchSim instead of checking parity")
+    args = parser.parse_args()
+
+    require_numpy()
+    if args.bench:
+        rate = bench(args.map, args.games, args.turns, args.seed)
+        print(f"{args.games} games x {args.turns} turns: {rate:,.0f} game turns/s")
+        return
+
+    try:
+        succeeded = check_parity(args.map, args.games, args.turns, args.seed, args.bot)
+    except BatchSimException as e:
+        print(f"MISMATCH: {e}")
+        sys.exit(1)
+    print(f"parity OK: {args.games} games x {args.turns} turns")
+    for name in sorted(succeeded):
+        print(f"  {name:<24} {succeeded[name]} succeeded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# bot_capture.py
+"""
+Opt-in cProfile / tracemalloc capture of one team's play_turn calls.
+
+    python src/game.py ... --cprofile RED --tracemalloc RED --capture-turns 240:280 --capture-dir profiles
+
+A TurnCapture is handed to the team's bot worker, which runs every play_turn through it. Turns in
+the capture range run with a cProfile.Profile enabled (one profile accumulated over the range)
+and/or tracemalloc tracing; other turns run untouched. Files written to capture_dir:
+
+    <name>.pstats               cProfile data, open with pstats / snakeviz
+    <name>.pstats.txt           top functions by cumulative time
+    <name>.tracemalloc.txt      per turn peak, then the top allocation sites summed over the turns
+                                (bytes allocated during a turn and still alive when it returned)
+
+Thread bots are captured on their worker thread, including a turn that timed out. Process bots
+capture in their own process and rewrite the files after every captured turn, so a bot that is
+killed later still leaves the turns before.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class TurnCapture:
+    '''profiles play_turn for turns first_turn..last_turn (inclusive, None = open ended)'''
+
+    def __init__(
+        self,
+        name: str,
+        out_dir: str,
+        cprofile: bool = False,
+        trace_malloc: bool = False,
+        first_turn: Optional[int] = None,
+        last_turn: Optional[int] = None,
+        top: int = 30,
+        frames: int = 1,
+    ):
+        self.name = name
+        self.out_dir = out_dir
+        self.cprofile = cprofile
+        self.trace_malloc = trace_malloc
+        self.first_turn = first_turn
+        self.last_turn = last_turn
+        self.top = top
+        self.frames = frames
+
+        #built lazily, so the object pickles cleanly into a bot process
+        self.__profile: Optional[cProfile.Profile] = None
+        self.__peaks: List[Tuple[int, int]] = []
+        self.__sites: Dict[str, List[int]] = {} #"file:line" -> [bytes, blocks]
+        self.captured = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        state["_TurnCapture__profile"] = None
+        return state
+
+    def in_range(self, turn: int) -> bool:
+        return (self.first_turn is None or turn >= self.first_turn) and (self.last_turn is None or turn <= self.last_turn)
+
+    def run(self, turn: int, play_turn: Callable[[Any], Any], controller: Any) -> Any:
+        '''play_turn(controller), captured if turn is in range'''
+        if not self.in_range(turn):
+            return play_turn(controller)
+
+        self.captured += 1
+        if self.cprofile and self.__profile is None:
+            self.__profile = cProfile.Profile()
+        if self.trace_malloc:
+            tracemalloc.start(self.frames)
+        if self.__profile is not None:
+            self.__profile.enable()
+        try:
+            return play_turn(controller)
+        finally:
+            if self.__profile is not None:
+                self.__profile.disable()
+            if self.trace_malloc:
+                self.__take_snapshot(turn)
+
+    def __take_snapshot(self, turn: int) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.__peaks.append((turn, peak))
+        for stat in snapshot.statistics("lineno")[: self.top * 4]:
+            frame = stat.traceback[0]
+            site = self.__sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+            site[0] += stat.size
+            site[1] += stat.count
+
+    # ----------------------------
+    # Output
+    # ----------------------------
+
+    def write(self) -> List[str]:
+        '''writes the report files, returns their paths (nothing if no turn was captured)'''
+        if not self.captured:
+            return []
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, self.name)
+        paths = []
+
+        if self.__profile is not None:
+            self.__profile.dump_stats(base + ".pstats")
+            buf = io.StringIO()
+            pstats.Stats(self.__profile, stream=buf).sort_stats("cumulative").print_stats(self.top)
+            with open(base + ".pstats.txt", "w", encoding="utf-8") as f:
+                f.write(buf.getvalue())
+            paths += [base + ".pstats", base + ".pstats.txt"]
+
+        if self.__peaks:
+            with open(base + ".tracemalloc.txt", "w", encoding="utf-8") as f:
+                f.write(f"# {self.name}: {len(self.__peaks)} turns traced\n\n")
+                f.write("# turn  peak bytes\n")
+                for turn, peak in self.__peaks:
+                    f.write(f"{turn:6d}  {peak:>10d}\n")
+                f.write(f"\n# top {self.top} allocation sites (bytes alive at the end of each turn, summed)\n")
+                sites = sorted(self.__sites.items(), key=lambda kv: -kv[1][0])[: self.top]
+                for site, (size, count) in sites:
+                    f.write(f"{size:>12d} B {count:>8d} blocks  {site}\n")
+            paths.append(base + ".tracemalloc.txt")
+        return paths
+
+
+def parse_turn_range(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    '''"240:280" -> (240, 280), "240:" / ":280" are open ended, "250" is a single turn'''
+    if not text:
+        return None, None
+    if ":" not in text:
+        return int(text), int(text)
+    a, b = text.split(":", 1)
+    return (int(a) if a else None), (int(b) if b else None)
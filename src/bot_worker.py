@@ -0,0 +1,368 @@
+# bot_worker.py
+"""
+Long-lived workers that run a BotPlayer's play_turn for the engine.
+
+One worker per bot for the whole match: the engine sends a turn request and waits for the answer.
+- ThreadBotWorker: bot runs on a thread in the engine process, timeout is wall clock.
+- ProcessBotWorker: bot runs in its own process and drives the real RobotController over a pipe (RPC).
+  Turns are timed in CPU seconds of the bot process, with an optional cumulative time bank.
+
+A bot that times out has its controller revoked (every further action fails) and is stopped.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional, Tuple
+
+
+class BotKilled(BaseException):
+    '''raised inside a timed out bot thread to unwind it; BaseException so bots can't catch it with except Exception'''
+    pass
+
+
+class BotInitError(Exception):
+    '''the bot file could not be imported or BotPlayer.__init__ failed'''
+    pass
+
+
+class TurnResult:
+    '''outcome of one play_turn call; cpu_s is only measured by ProcessBotWorker'''
+    def __init__(self, ok: bool, timed_out: bool = False, error: Optional[BaseException] = None, tb: str = "", cpu_s: Optional[float] = None):
+        self.ok = ok
+        self.timed_out = timed_out
+        self.error = error
+        self.tb = tb
+        self.cpu_s = cpu_s
+
+
+class ThreadBotWorker:
+    '''runs play_turn on one persistent daemon thread, fed through a request queue'''
+
+    def __init__(self, name: str, player: Any, controller: Any, capture: Any = None, bot_controller: Any = None):
+        self.name = name
+        self.player = player
+        self.controller = controller
+        self.bot_controller = bot_controller if bot_controller is not None else controller #what play_turn gets (ie a profiling proxy)
+        self.capture = capture #optional bot_capture.TurnCapture
+
+        self.__requests: "queue.Queue[Optional[int]]" = queue.Queue()
+        self.__results: "queue.Queue[Tuple[int, bool, Optional[BaseException], str]]" = queue.Queue()
+        self.__seq = 0
+        self.alive = True
+
+        self.__thread = threading.Thread(target=self.__loop, name=f"bot-{name}", daemon=True)
+        self.__thread.start()
+
+    def __loop(self) -> None:
+        '''worker side: wait for a turn, run it, report back'''
+        while True:
+            seq = self.__requests.get()
+            if seq is None:
+                return
+            try:
+                if self.capture is not None:
+                    self.capture.run(self.controller.get_turn(), self.player.play_turn, self.bot_controller)
+                else:
+                    self.player.play_turn(self.bot_controller)
+                self.__results.put((seq, True, None, ""))
+            except BotKilled:
+                return
+            except BaseException as e:
+                self.__results.put((seq, False, e, traceback.format_exc()))
+
+    def play_turn(self, timeout_s: float) -> TurnResult:
+        '''engine side: run one turn, wait at most timeout_s'''
+        if not self.alive:
+            return TurnResult(False, timed_out=True)
+
+        self.__seq += 1
+        self.__requests.put(self.__seq)
+        deadline = time.monotonic() + timeout_s
+
+        while True:
+            try:
+                seq, ok, err, tb = self.__results.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.kill()
+                return TurnResult(False, timed_out=True)
+
+            #drop answers from an earlier turn that came back late
+            if seq == self.__seq:
+                return TurnResult(ok, error=err, tb=tb)
+
+    def kill(self) -> None:
+        '''stop the bot for real: revoke its controller, then unwind the thread'''
+        self.alive = False
+        revoke = getattr(self.controller, "revoke", None)
+        if revoke is not None:
+            revoke()
+
+        #revoke waited for any action in progress, so BotKilled can't land in the middle of one;
+        #deliver it in the bot thread the next time it runs python code
+        ident = self.__thread.ident
+        if ident is not None and self.__thread.is_alive():
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), ctypes.py_object(BotKilled))
+
+    def close(self) -> None:
+        '''ask the thread to exit after its current turn'''
+        if self.alive:
+            self.__requests.put(None)
+        self.alive = False
+
+
+# ----------------------------
+# Subprocess bots
+# ----------------------------
+
+def controller_rpc_methods() -> frozenset:
+    '''public RobotController methods a bot process may call'''
+    from robot_controller import RobotController
+    names = {n for n in dir(RobotController) if not n.startswith("_") and callable(getattr(RobotController, n))}
+    names.discard("revoke")
+    return frozenset(names)
+
+
+class RemoteController:
+    '''
+    bot-side stand-in for RobotController, every public method is forwarded to the engine
+
+    get_map/get_tile answers are cached for the turn (and dropped after any action),
+    the same way RobotController caches its snapshots, so BFS loops don't pay a round trip per call
+    '''
+    def __init__(self, conn, team: Any, methods: frozenset):
+        self.__conn = conn
+        self.__team = team
+        self.__methods = methods
+        self.__turn = 0
+        self.__cache: Dict[Tuple, Any] = {}
+
+    def _start_turn(self, turn: int) -> None:
+        self.__turn = turn
+        self.__cache.clear()
+
+    def __call(self, name: str, args: tuple, kwargs: dict) -> Any:
+        self.__conn.send(("call", name, args, kwargs))
+        kind, value = self.__conn.recv()
+        if kind == "err":
+            raise value
+        return value
+
+    def get_turn(self) -> int:
+        return self.__turn
+
+    def get_team(self) -> Any:
+        return self.__team
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in self.__methods:
+            raise AttributeError(f"RobotController has no public method {name!r}")
+
+        cached = name in ("get_map", "get_tile")
+        readonly = name.startswith("get_") or name.startswith("can_") or name == "item_to_public_dict"
+
+        def method(*args, **kwargs):
+            if cached:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                if key not in self.__cache:
+                    self.__cache[key] = self.__call(name, args, kwargs)
+                return self.__cache[key]
+            if not readonly:
+                self.__cache.clear() #an action may change tiles
+            return self.__call(name, args, kwargs)
+
+        method.__name__ = name
+        return method
+
+
+def bot_process_main(conn, bot_path: str, map_copy: Any, team: Any, capture: Any = None) -> None:
+    '''entry point of a bot process: build the BotPlayer, then serve turn requests until told to stop'''
+    from game import import_file
+
+    try:
+        name = os.path.basename(bot_path).rsplit(".", 1)[0]
+        player = import_file(name, bot_path).BotPlayer(map_copy)
+    except BaseException as e:
+        conn.send(("init_failed", f"{type(e).__name__}: {e}", traceback.format_exc()))
+        return
+
+    controller = RemoteController(conn, team, controller_rpc_methods())
+    conn.send(("ready",))
+
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg is None:
+            return
+
+        _, seq, turn = msg
+        controller._start_turn(turn)
+
+        #cpu time of this process only, so the other bot and the engine can't slow our clock
+        t0 = time.process_time()
+        try:
+            if capture is not None:
+                capture.run(turn, player.play_turn, controller)
+            else:
+                player.play_turn(controller)
+            ok, err, tb = True, None, ""
+        except BaseException as e:
+            ok, err, tb = False, f"{type(e).__name__}: {e}", traceback.format_exc()
+        conn.send(("done", seq, ok, err, tb, time.process_time() - t0))
+
+        #rewrite the capture files now, this process may be killed before the match ends
+        if capture is not None and capture.in_range(turn):
+            capture.write()
+
+
+class ProcessBotWorker:
+    '''
+    runs a bot in its own process, the engine serves its controller calls while the turn runs
+
+    per turn the bot may use per_turn_timeout_s of CPU; anything above that is taken from
+    time_bank_s, and the bot times out once the bank is empty. A wall clock guard of
+    wall_slack x (turn budget) catches bots that block or sleep instead of computing.
+    '''
+
+    def __init__(
+        self,
+        name: str,
+        bot_path: str,
+        map_copy: Any,
+        controller: Any,
+        time_bank_s: float = 0.0,
+        wall_slack: float = 3.0,
+        init_timeout_s: float = 10.0,
+        start_method: str = "spawn",
+        capture: Any = None,
+        bot_controller: Any = None,
+    ):
+        self.name = name
+        self.controller = controller
+        self.bot_controller = bot_controller if bot_controller is not None else controller #serves the bot's calls (ie a profiling proxy)
+        self.time_bank_s = time_bank_s
+        self.wall_slack = wall_slack
+        self.methods = controller_rpc_methods()
+
+        #stats
+        self.cpu_total_s = 0.0
+        self.cpu_max_turn_s = 0.0
+        self.turns = 0
+
+        self.__seq = 0
+        self.alive = True
+
+        ctx = mp.get_context(start_method)
+        self.__conn, child_conn = ctx.Pipe()
+        self.__proc = ctx.Process(
+            target=bot_process_main,
+            args=(child_conn, bot_path, map_copy, controller.get_team(), capture),
+            name=f"bot-{name}",
+            daemon=True,
+        )
+        self.__proc.start()
+        child_conn.close()
+
+        #wait for BotPlayer.__init__ in the child
+        if not self.__conn.poll(init_timeout_s):
+            self.kill()
+            raise BotInitError(f"bot did not finish __init__ within {init_timeout_s:.1f}s")
+        try:
+            msg = self.__conn.recv()
+        except EOFError:
+            self.kill()
+            raise BotInitError(f"bot process exited with code {self.__proc.exitcode}")
+        if msg[0] != "ready":
+            self.kill()
+            print(msg[2], end="")
+            raise BotInitError(msg[1])
+
+    def __serve_call(self, name: str, args: tuple, kwargs: dict) -> None:
+        '''run one controller call for the bot and send back the answer'''
+        if name not in self.methods:
+            self.__conn.send(("err", AttributeError(f"RobotController has no public method {name!r}")))
+            return
+        try:
+            value = getattr(self.bot_controller, name)(*args, **kwargs)
+            self.__conn.send(("ret", value))
+        except Exception as e:
+            try:
+                self.__conn.send(("err", e))
+            except Exception:
+                self.__conn.send(("err", RuntimeError(repr(e))))
+
+    def play_turn(self, timeout_s: float) -> TurnResult:
+        '''engine side: run one turn, serving controller calls until the bot reports back'''
+        if not self.alive:
+            return TurnResult(False, timed_out=True)
+
+        self.__seq += 1
+        self.__conn.send(("turn", self.__seq, self.controller.get_turn()))
+        deadline = time.monotonic() + self.wall_slack * (timeout_s + max(self.time_bank_s, 0.0))
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.__conn.poll(remaining):
+                self.kill()
+                return TurnResult(False, timed_out=True)
+            try:
+                msg = self.__conn.recv()
+            except EOFError:
+                self.kill()
+                return TurnResult(False, error=RuntimeError(f"bot process exited with code {self.__proc.exitcode}"))
+
+            if msg[0] == "call":
+                self.__serve_call(msg[1], msg[2], msg[3])
+                continue
+
+            _, seq, ok, err, tb, cpu_s = msg
+            if seq != self.__seq:
+                continue
+
+            self.turns += 1
+            self.cpu_total_s += cpu_s
+            self.cpu_max_turn_s = max(self.cpu_max_turn_s, cpu_s)
+
+            #over the per-turn budget: pay from the bank
+            if cpu_s > timeout_s:
+                self.time_bank_s -= cpu_s - timeout_s
+                if self.time_bank_s < 0:
+                    self.kill()
+                    return TurnResult(False, timed_out=True, cpu_s=cpu_s)
+
+            return TurnResult(ok, error=None if ok else RuntimeError(err), tb=tb, cpu_s=cpu_s)
+
+    def kill(self) -> None:
+        '''revoke the controller and terminate the bot process'''
+        self.alive = False
+        revoke = getattr(self.controller, "revoke", None)
+        if revoke is not None:
+            revoke()
+        if self.__proc.is_alive():
+            self.__proc.terminate()
+        self.__proc.join(1.0)
+        if self.__proc.is_alive():
+            self.__proc.kill()
+            self.__proc.join()
+
+    def close(self) -> None:
+        '''ask the process to exit, kill it if it does not'''
+        if self.alive:
+            try:
+                self.__conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.__proc.join(1.0)
+        self.alive = False
+        if self.__proc.is_alive():
+            self.__proc.kill()
+            self.__proc.join()
+        self.__conn.close()
@@ -0,0 +1,220 @@
+# env.py
+"""
+Gym-style environment: one team is driven by step(actions), the other by an optional bot.
+
+Needs numpy (pip install numpy), like batch_sim.py.
+
+    env = CookoffEnv(team=Team.RED, opponent="bots/duo_noodle_bot.py")
+    obs, info = env.reset("maps/map1.txt", seed=0)
+    while True:
+        obs, reward, terminated, truncated, info = env.step([("move", 0, 1, 0), ("pickup", 0, 3, 4)])
+        if terminated:
+            break
+
+A step is one engine turn: GameState.start_turn, then blue and red play (the same order as
+Game.run_game). Actions are controller calls (method_name, *args) as in Sandbox.simulate, run
+through the real RobotController, and info["results"] has what each returned. The reward is the
+change in the team's money over the step.
+
+Observations are numpy planes indexed [map team, x, y] (map team = Team.value):
+
+    tiles           tile id
+    item_kind       item on the tile: batch_sim.NO_ITEM / FOOD / PLATE / PAN
+    item_food       food code (batch_sim.food_code) of the food or of the food in the pan, -1 if none
+    item_count      foods on a plate, box count, dirty plates in a sink, clean plates on a sink table
+    cook_progress   cooker progress
+    bots            1 for a bot of this team, 2 for an enemy bot, 0 if empty
+    bot_holding     item kind held by the bot standing there
+
+plus bot_state[i] = (x, y, map team, held kind, held food code) for bot_ids[i], money[team] and turn.
+The arrays are allocated once and overwritten in place every reset/step, copy what you keep.
+The opponent bot runs in this thread without a time limit.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from batch_sim import np, require_numpy, load_game_state, food_code, NO_ITEM, FOOD, PLATE, PAN, NO_FOOD
+from game_constants import Team, GameConstants
+from game_state import GameState
+from item import Item, Food, Plate, Pan
+from robot_controller import RobotController
+from sandbox import run_actions
+from tiles import Box, Sink, SinkTable, Cooker
+
+
+def _item_code(item: Optional[Item]) -> Tuple[int, int, int]:
+    '''(kind, food code, foods on it) of an item'''
+    if isinstance(item, Food):
+        return FOOD, food_code(item.food_id, item.chopped, item.cooked_stage), 0
+    if isinstance(item, Plate):
+        return PLATE, NO_FOOD, len(item.food)
+    if isinstance(item, Pan):
+        f = item.food
+        return PAN, (NO_FOOD if f is None else food_code(f.food_id, f.chopped, f.cooked_stage)), 0
+    return NO_ITEM, NO_FOOD, 0
+
+
+class CookoffEnv:
+    '''reset(map, seed) / step(actions) over GameState + RobotController, see the module docstring'''
+
+    def __init__(
+        self,
+        map_path: Optional[str] = None,
+        team: Team = Team.RED,
+        opponent: Optional[str] = None,
+        turn_limit: int = GameConstants.TOTAL_TURNS,
+        verbose: bool = False,
+    ):
+        require_numpy()
+        self.map_path = map_path
+        self.team = team
+        self.opponent_path = opponent
+        self.turn_limit = turn_limit
+        self.verbose = verbose
+
+        self.game_state: Optional[GameState] = None
+        self.controllers: Dict[Team, RobotController] = {}
+        self.opponent: Any = None
+        self.bot_ids: List[int] = []
+        self.obs: Dict[str, Any] = {}
+        self.__shape: Optional[Tuple[int, int, int]] = None
+        self.__money = 0
+
+    # ----------------------------
+    # Gym surface
+    # ----------------------------
+
+    def reset(self, map_path: Optional[str] = None, seed: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        '''starts a new game on map_path (or the last map), seed seeds random for the opponent bot'''
+        if map_path is not None:
+            self.map_path = map_path
+        if self.map_path is None:
+            raise ValueError("reset() needs a map_path")
+        if seed is not None:
+            random.seed(seed)
+
+        gs = load_game_state(self.map_path)
+        self.game_state = gs
+        self.controllers = {team: RobotController(team, gs, verbose=self.verbose) for team in Team}
+        self.bot_ids = sorted(gs.bots)
+
+        self.opponent = None
+        if self.opponent_path is not None:
+            from game import import_file
+
+            enemy = gs.other_team(self.team)
+            name = os.path.basename(self.opponent_path).rsplit(".", 1)[0]
+            self.opponent = import_file(name, self.opponent_path).BotPlayer(copy.deepcopy(gs.get_map(enemy)))
+
+        self.__allocate(gs)
+        self.__money = gs.get_team_money(self.team)
+        self.__observe()
+        return self.obs, self.__info([])
+
+    def step(self, actions: Iterable[Sequence[Any]]) -> Tuple[Dict[str, Any], int, bool, bool, Dict[str, Any]]:
+        '''one turn with actions for this team's bots, returns (obs, reward, terminated, truncated, info)'''
+        gs = self.game_state
+        if gs is None:
+            raise RuntimeError("call reset() before step()")
+        if gs.turn >= self.turn_limit:
+            raise RuntimeError("the game is over, call reset()")
+
+        gs.start_turn()
+        results: List[Any] = []
+        for team in (Team.BLUE, Team.RED):
+            if team == self.team:
+                results = run_actions(self.controllers[team], actions)
+            elif self.opponent is not None:
+                self.opponent.play_turn(self.controllers[team])
+
+        money = gs.get_team_money(self.team)
+        reward = money - self.__money
+        self.__money = money
+        self.__observe()
+        return self.obs, reward, gs.turn >= self.turn_limit, False, self.__info(results)
+
+    def controller(self, team: Optional[Team] = None) -> RobotController:
+        '''the RobotController of a team (this env's team by default), for read calls between steps'''
+        return self.controllers[self.team if team is None else team]
+
+    def __info(self, results: List[Any]) -> Dict[str, Any]:
+        gs = self.game_state
+        return {
+            "turn": gs.turn,
+            "results": results,
+            "team_money": {team.name: gs.get_team_money(team) for team in Team},
+        }
+
+    # ----------------------------
+    # Observations
+    # ----------------------------
+
+    def __allocate(self, gs: GameState) -> None:
+        '''(re)allocates the planes, only when the map size or bot count changes'''
+        shape = (2, gs.red_map.width, gs.red_map.height)
+        if shape != self.__shape or len(self.obs.get("bot_state", ())) != len(self.bot_ids):
+            self.__shape = shape
+            self.obs = {
+                "tiles": np.zeros(shape, np.uint8),
+                "item_kind": np.zeros(shape, np.int8),
+                "item_food": np.zeros(shape, np.int16),
+                "item_count": np.zeros(shape, np.int16),
+                "cook_progress": np.zeros(shape, np.int16),
+                "bots": np.zeros(shape, np.int8),
+                "bot_holding": np.zeros(shape, np.int8),
+                "bot_state": np.zeros((len(self.bot_ids), 5), np.int16),
+                "money": np.zeros(2, np.int64),
+                "turn": np.zeros(1, np.int32),
+            }
+
+        #tile kinds never change within a game
+        for team in Team:
+            m = gs.get_map(team)
+            self.obs["tiles"][team.value] = np.frombuffer(bytes(m.tiles.ids), np.uint8).reshape(m.width, m.height)
+
+    def __observe(self) -> None:
+        gs = self.game_state
+        obs = self.obs
+        item_kind, item_food, item_count = obs["item_kind"], obs["item_food"], obs["item_count"]
+        cook, bots, holding = obs["cook_progress"], obs["bots"], obs["bot_holding"]
+        item_kind.fill(NO_ITEM)
+        item_food.fill(NO_FOOD)
+        item_count.fill(0)
+        cook.fill(0)
+        bots.fill(0)
+        holding.fill(NO_ITEM)
+
+        #only cells with a tile object can have anything on them
+        for team in Team:
+            t = team.value
+            for (x, y), tile in gs.get_map(team).tiles.stored_tiles():
+                kind, food, count = _item_code(tile.item)
+                item_kind[t, x, y] = kind
+                item_food[t, x, y] = food
+                if isinstance(tile, Box):
+                    count = tile.count
+                elif isinstance(tile, Sink):
+                    count = tile.num_dirty_plates
+                elif isinstance(tile, SinkTable):
+                    count = tile.num_clean_plates
+                elif isinstance(tile, Cooker):
+                    cook[t, x, y] = tile.cook_progress
+                item_count[t, x, y] = count
+
+        state = obs["bot_state"]
+        for i, bot_id in enumerate(self.bot_ids):
+            b = gs.bots[bot_id]
+            t = b.map_team.value
+            kind, food, _ = _item_code(b.holding)
+            bots[t, b.x, b.y] = 1 if b.team == self.team else 2
+            holding[t, b.x, b.y] = kind
+            state[i] = (b.x, b.y, t, kind, food)
+
+        for team in Team:
+            obs["money"][team.value] = gs.get_team_money(team)
+        obs["turn"][0] = gs.turn
@@ -10,15 +10,19 @@ import os
 import sys
 import time
 import traceback
-from threading import Thread
 from typing import Optional, Any, Dict, List, Tuple
 
 from game_constants import Team, GameConstants
 from game_state import GameState
 from robot_controller import RobotController
+from bot_worker import ThreadBotWorker, ProcessBotWorker
+from replay import ReplayWriter
+from replay_binary import write_binary_replay
+from warning_log import WarningLog
+from match_profile import MatchProfiler
+from bot_capture import TurnCapture, parse_turn_range
 
 from map_processor import load_two_team_maps_and_orders
-from render import Renderer
 
 
 def import_file(module_name: str, file_path: str):
@@ -34,6 +38,14 @@ def import_file(module_name: str, file_path: str):
 
 
 
+def load_renderer():
+    '''Renderer class for --render, RenderException if pygame is missing'''
+    from render import Renderer, require_pygame
+
+    require_pygame()
+    return Renderer
+
+
 def find_default_floor_spawn(m, prefer_center=True) -> Tuple[int, int]:
     '''if map has no red, blue spawn markers, find the centermost walkable spawn'''
     if prefer_center:
@@ -42,11 +54,11 @@ def find_default_floor_spawn(m, prefer_center=True) -> Tuple[int, int]:
             for dx in range(-r, r + 1):
                 for dy in range(-r, r + 1):
                     x, y = cx + dx, cy + dy
-                    if m.in_bounds(x, y) and getattr(m.tiles[x][y], "is_walkable", False):
+                    if m.is_tile_walkable(x, y):
                         return (x, y)
     for y in range(m.height):
         for x in range(m.width):
-            if getattr(m.tiles[x][y], "is_walkable", False):
+            if m.is_tile_walkable(x, y):
                 return (x, y)
     return (0, 0)
 
@@ -62,16 +74,44 @@ class Game:
         turn_limit: int = GameConstants.TOTAL_TURNS,
         per_turn_timeout_s: float = 0.5,
         fps_cap: int = 30,
+        bot_mode: str = "thread",
+        time_bank_s: float = 0.0,
+        replay_format: Optional[str] = None,
+        warnings: Optional[str] = None,
+        warnings_log: Optional[str] = None,
+        profile: bool = False,
+        profile_path: Optional[str] = None,
+        captures: Optional[Dict[Team, TurnCapture]] = None,
     ):
         self.render_enabled = render
         self.turn_limit = turn_limit
         self.per_turn_timeout_s = per_turn_timeout_s
         self.fps_cap = fps_cap
 
+        #"thread": bots run in this process (wall clock timeout)
+        #"process": each bot in its own process (cpu time timeout + time bank)
+        if bot_mode not in ("thread", "process"):
+            raise ValueError(f"unknown bot_mode {bot_mode!r}")
+        self.bot_mode = bot_mode
+        self.time_bank_s = time_bank_s
+
         self.replay_path = replay_path
         if replay_path is not None:
             os.makedirs(os.path.dirname(replay_path) or ".", exist_ok=True)
 
+        #"json": whole match dumped at the end, "delta": streamed per turn (see replay.py),
+        #"binary": the json payload in the compact replay_binary.py encoding
+        if replay_format is None:
+            if replay_path is not None and replay_path.endswith((".jsonl", ".jsonl.gz")):
+                replay_format = "delta"
+            elif replay_path is not None and replay_path.endswith(".bin"):
+                replay_format = "binary"
+            else:
+                replay_format = "json"
+        if replay_format not in ("json", "delta", "binary"):
+            raise ValueError(f"unknown replay_format {replay_format!r}")
+        self.replay_format = replay_format
+
         #load the maps
         map_red, map_blue, orders_red, orders_blue, parsed = load_two_team_maps_and_orders(map_path)
 
@@ -94,30 +134,35 @@ class Game:
             max_id = max(max_id, o.order_id)
         self.game_state.next_order_id = max_id + 1
 
-        #import bots, need the play turn mechanic
-        self.red_failed_init = False
-        self.blue_failed_init = False
-
-        #try to import
-        try:
-            red_name = os.path.basename(red_bot_path).rsplit(".", 1)[0]
-            self.red_player = import_file(red_name, red_bot_path).BotPlayer(copy.deepcopy(self.game_state.red_map))
-        except Exception as e:
-            self.red_failed_init = True
-            print(f"[INIT] Red bot failed: {e}")
-            traceback.print_exc()
-
-        try:
-            blue_name = os.path.basename(blue_bot_path).rsplit(".", 1)[0]
-            self.blue_player = import_file(blue_name, blue_bot_path).BotPlayer(copy.deepcopy(self.game_state.blue_map))
-        except Exception as e:
-            self.blue_failed_init = True
-            print(f"[INIT] Blue bot failed: {e}")
-            traceback.print_exc()
+        #rejected bot actions, shared by both controllers (see warning_log.py)
+        #default: a few lines per turn when watching, counts only (summary at game over) when headless
+        if warnings is None:
+            warnings = "summary" if render else "count"
+        self.warnings = WarningLog(warnings, log_path=warnings_log)
 
         #generate the controllers
-        self.red_controller = RobotController(Team.RED, self.game_state)
-        self.blue_controller = RobotController(Team.BLUE, self.game_state)
+        self.red_controller = RobotController(Team.RED, self.game_state, warnings=self.warnings)
+        self.blue_controller = RobotController(Team.BLUE, self.game_state, warnings=self.warnings)
+
+        #per-turn phase timings and controller method stats, only with profile=True (see match_profile.py)
+        self.profiler: Optional[MatchProfiler] = None
+        self.profile_path = profile_path
+        self.bot_controllers: Dict[Team, Any] = {} #what each bot gets instead of its controller, if anything
+        if profile:
+            self.profiler = MatchProfiler()
+            self.bot_controllers[Team.RED] = self.profiler.instrument(Team.RED, self.red_controller)
+            self.bot_controllers[Team.BLUE] = self.profiler.instrument(Team.BLUE, self.blue_controller)
+            if profile_path is None and replay_path is not None:
+                self.profile_path = replay_path + ".profile.json"
+
+        #cProfile / tracemalloc of a team's play_turn, run by its worker (see bot_capture.py)
+        self.captures: Dict[Team, TurnCapture] = dict(captures or {})
+
+        #import bots, need the play turn mechanic
+        #one long-lived worker per bot that runs play_turn on request
+        self.workers: Dict[Team, Any] = {}
+        self.red_failed_init = not self.start_worker(Team.RED, red_bot_path, self.game_state.red_map, self.red_controller)
+        self.blue_failed_init = not self.start_worker(Team.BLUE, blue_bot_path, self.game_state.blue_map, self.blue_controller)
 
         #put the bots in the parsed map
         if parsed.spawns_red:
@@ -136,52 +181,65 @@ class Game:
 
         #replay
         self.replay: List[Dict[str, Any]] = []
-
-        #renderer if available
-        self.renderer = Renderer(self.game_state) if self.render_enabled else None
+        self.replay_writer: Optional[ReplayWriter] = None
+        if self.replay_path is not None and self.replay_format == "delta":
+            self.replay_writer = ReplayWriter(
+                self.replay_path,
+                switch_turn_start=self.game_state.switch_turn,
+                switch_turn_end=self.game_state.switch_turn + self.game_state.switch_duration,
+            )
+
+        #renderer plugin, imported here so headless runs and bot workers never load pygame
+        self.renderer = None
+        if self.render_enabled:
+            self.renderer = load_renderer()(self.game_state)
+
+    def start_worker(self, team: Team, bot_path: str, team_map, controller: RobotController) -> bool:
+        '''import the bot and start its worker, False if the bot failed to initialize'''
+        label = "Red" if team == Team.RED else "Blue"
+        try:
+            if self.bot_mode == "process":
+                self.workers[team] = ProcessBotWorker(team.name, bot_path, team_map, controller, time_bank_s=self.time_bank_s, capture=self.captures.get(team), bot_controller=self.bot_controllers.get(team))
+            else:
+                name = os.path.basename(bot_path).rsplit(".", 1)[0]
+                player = import_file(name, bot_path).BotPlayer(copy.deepcopy(team_map))
+                self.workers[team] = ThreadBotWorker(team.name, player, controller, capture=self.captures.get(team), bot_controller=self.bot_controllers.get(team))
+        except Exception as e:
+            print(f"[INIT] {label} bot failed: {e}")
+            traceback.print_exc()
+            return False
+        return True
 
     def call_player(self, team: Team) -> bool:
         '''calls the player run code'''
-        if team == Team.RED:
-            if self.red_failed_init:
-                return False
-            player = self.red_player
-            controller = self.red_controller
-        else:
-            if self.blue_failed_init:
-                return False
-            player = self.blue_player
-            controller = self.blue_controller
-
-        ok = True
-        exc: Optional[BaseException] = None
-
-        def runner():
-            nonlocal ok, exc
-            #try it
-            try:
-                player.play_turn(controller)
-            except BaseException as e:
-                ok = False
-                exc = e
-
-        t0 = time.time()
-        th = Thread(target=runner, daemon=True) #run in a separate thread
-        th.start()
-        th.join(self.per_turn_timeout_s)
-        dt = time.time() - t0
-
-        if th.is_alive():
+        if team == Team.RED and self.red_failed_init:
+            return False
+        if team == Team.BLUE and self.blue_failed_init:
+            return False
+
+        t0 = time.perf_counter()
+        res = self.workers[team].play_turn(self.per_turn_timeout_s) #runs on the bot's own worker thread
+        dt = time.perf_counter() - t0
+        if self.profiler is not None:
+            self.profiler.record(f"play_turn.{team.name}", int(dt * 1e9))
+
+        if res.timed_out:
             print(f"[TURN RUNNER] {team.name} timed out ({dt:.3f}s > {self.per_turn_timeout_s:.3f}s)")
             return False
-        if not ok:
-            print(f"[TURN REUNNER] {team.name} crashed: {exc}")
-            traceback.print_exc()
+        if not res.ok:
+            print(f"[TURN REUNNER] {team.name} crashed: {res.error}")
+            print(res.tb, end="")
             return False
         return True
 
     def record_turn(self):
-        self.replay.append(self.game_state.to_dict()) #for the replay rile
+        '''for the replay file, nothing is kept when there is no replay path'''
+        if self.replay_path is None:
+            return
+        if self.replay_writer is not None:
+            self.replay_writer.write_turn(self.game_state.to_dict())
+        else:
+            self.replay.append(self.game_state.to_dict())
 
     def render(self) -> bool:
         '''render ONLY IF we want to render'''
@@ -201,17 +259,32 @@ class Game:
         if not self.render():
             return None
 
+        prof = self.profiler
         for _ in range(self.turn_limit):
+            turn_t0 = t = time.perf_counter_ns() if prof is not None else 0
+
             #start turn (money + environment + expirations)
             self.game_state.start_turn()
+            if prof is not None:
+                prof.lap("start_turn", t)
 
             #call blue then red
             blue_ok = self.call_player(Team.BLUE)
             red_ok = self.call_player(Team.RED)
 
             #record and render
+            self.warnings.end_turn()
+            if prof is not None:
+                t = time.perf_counter_ns()
             self.record_turn()
-            if not self.render():
+            if prof is not None:
+                t = prof.lap("record_turn", t)
+            rendered = self.render()
+            if prof is not None:
+                if self.render_enabled:
+                    prof.lap("render", t)
+                prof.end_turn(self.game_state.turn, turn_t0)
+            if not rendered:
                 break
 
             #if one side crashes, then the other side wins by default
@@ -234,6 +307,9 @@ class Game:
         blue_money = self.game_state.get_team_money(Team.BLUE)
         
         print(f"[GAME OVER] money scores: RED=${red_money}, BLUE=${blue_money}")
+        self.print_time_usage()
+        if self.warnings.mode in ("summary", "count"):
+            self.warnings.print_summary()
 
         if red_money > blue_money:
             print(f"[RESULT] RED WINS by ${red_money - blue_money}!")
@@ -246,24 +322,61 @@ class Game:
             winner = None
 
         self.export_replay(winner)
-        return None
+        return winner
+
+    def print_time_usage(self):
+        '''cpu time per bot, only measured in process mode'''
+        for team, worker in self.workers.items():
+            if isinstance(worker, ProcessBotWorker) and worker.turns > 0:
+                print(
+                    f"[TIME] {team.name} cpu={worker.cpu_total_s:.3f}s "
+                    f"avg={worker.cpu_total_s / worker.turns * 1000:.2f}ms max={worker.cpu_max_turn_s * 1000:.2f}ms "
+                    f"bank_left={max(worker.time_bank_s, 0.0):.3f}s"
+                )
+
+    def export_profile(self):
+        '''prints the profile summary and writes it next to the replay (or to profile_path)'''
+        if self.profiler is None:
+            return
+        self.profiler.print_summary()
+        if self.profile_path is not None:
+            self.profiler.write(self.profile_path)
+            print(f"[PROFILE] wrote {self.profile_path}")
 
     def export_replay(self, winner: Optional[Team]):
-        '''json dump'''
+        '''json/binary dump, or finish the streamed delta replay'''
+        self.export_profile()
         if self.replay_path is None:
             return
+        if self.replay_writer is not None:
+            self.replay_writer.close(None if winner is None else winner.name, warnings=self.warnings.summary())
+            print(f"[REPLAY] wrote {self.replay_path}")
+            return
         payload = {
             "winner": None if winner is None else winner.name,
             "turns": len(self.replay),
             "switch_turn_start": self.game_state.switch_turn,
             "switch_turn_end": self.game_state.switch_turn + self.game_state.switch_duration, 
+            "warnings": self.warnings.summary(),
             "replay": self.replay,
         }
-        with open(self.replay_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+        if self.replay_format == "binary":
+            write_binary_replay(self.replay_path, payload)
+        else:
+            with open(self.replay_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, indent=2)
         print(f"[REPLAY] wrote {self.replay_path}")
 
     def close(self):
+        for worker in self.workers.values():
+            worker.close()
+        self.warnings.close()
+        for team, capture in self.captures.items():
+            #process bots already wrote theirs
+            for path in capture.write():
+                print(f"[CAPTURE] {team.name} wrote {path}")
+        if self.replay_writer is not None:
+            self.replay_writer.close()
         if self.renderer is not None:
             self.renderer.close()
 
@@ -275,12 +388,40 @@ def main():
     ap.add_argument("--blue", required=True, help="path to blue bot python file (defines BotPlayer)")
     ap.add_argument("--map", required=True, help="path to map text file (layout + optional ORDERS:)")
     ap.add_argument("--replay", default=None, help="optional output replay json path")
+    ap.add_argument("--replay-format", choices=["json", "delta", "binary"], default=None, help="replay format (default: delta for .jsonl/.jsonl.gz paths, binary for .bin, else json)")
     ap.add_argument("--render", action="store_true", help="enable pygame rendering")
     ap.add_argument("--turns", type=int, default=GameConstants.TOTAL_TURNS, help="turn limit")
     ap.add_argument("--timeout", type=float, default=0.5, help="per-turn timeout seconds per bot")
     ap.add_argument("--fps", type=int, default=30, help="fps cap when rendering")
+    ap.add_argument("--bot-mode", choices=["thread", "process"], default="thread", help="run bots on threads or in their own processes (cpu timed)")
+    ap.add_argument("--time-bank", type=float, default=0.0, help="process mode: extra cpu seconds a bot may spend over the match")
+    ap.add_argument("--warnings", choices=["full", "summary", "count", "off"], default=None, help="rejected action warnings: print all, at most a few per team per turn, only a summary at game over, or none (default: summary with --render, else count)")
+    ap.add_argument("--warnings-log", default=None, help="optional json lines file with every rejected action")
+    ap.add_argument("--profile", action="store_true", help="time engine phases and controller calls per turn, summary written next to the replay")
+    ap.add_argument("--profile-out", default=None, help="profile summary json path (default: <replay>.profile.json)")
+    ap.add_argument("--cprofile", choices=["RED", "BLUE", "both"], default=None, help="cProfile a team's play_turn calls, dumps .pstats files")
+    ap.add_argument("--tracemalloc", choices=["RED", "BLUE", "both"], default=None, help="trace a team's play_turn allocations, writes a top allocation report")
+    ap.add_argument("--capture-turns", default=None, help="turn range for --cprofile/--tracemalloc, ie 240:280 (default: every turn)")
+    ap.add_argument("--capture-dir", default="profiles", help="output directory for --cprofile/--tracemalloc")
     args = ap.parse_args()
 
+    first_turn, last_turn = parse_turn_range(args.capture_turns)
+    captures = {}
+    for team in Team:
+        cprof = args.cprofile in (team.name, "both")
+        tmalloc = args.tracemalloc in (team.name, "both")
+        if cprof or tmalloc:
+            captures[team] = TurnCapture(team.name, args.capture_dir, cprofile=cprof, trace_malloc=tmalloc, first_turn=first_turn, last_turn=last_turn)
+
+    if args.render:
+        #fail before any bot is started
+        from render import RenderException
+
+        try:
+            load_renderer()
+        except RenderException as e:
+            ap.error(str(e))
+
     g = Game(
         red_bot_path=args.red,
         blue_bot_path=args.blue,
@@ -290,6 +431,14 @@ def main():
         turn_limit=args.turns,
         per_turn_timeout_s=args.timeout,
         fps_cap=args.fps,
+        bot_mode=args.bot_mode,
+        time_bank_s=args.time_bank,
+        replay_format=args.replay_format,
+        warnings=args.warnings,
+        warnings_log=args.warnings_log,
+        profile=args.profile or args.profile_out is not None,
+        profile_path=args.profile_out,
+        captures=captures,
     )
     try:
         g.run_game()
@@ -4,13 +4,16 @@ Game state that keeps track of teams, bots, maps, team money, bot items, and ord
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Any
+import copy
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Any
 
 from game_constants import Team, TileType, FoodType, GameConstants
 from map import Map
-from tiles import Tile, Floor, Wall, Counter, Sink, SinkTable, Cooker, Trash, Submit, Shop, Box
+from tiles import Tile, Sink, SinkTable, Cooker, Submit
 from item import Item, Food, Plate, Pan
+from tile_grid import TileGrid, new_tile
 
 
 # -----------------------
@@ -25,7 +28,7 @@ class GameStateException(Exception):
 # Orders
 # -----------------------
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     '''Order class that is based on order type in game constants'''
     order_id: int
@@ -37,6 +40,10 @@ class Order:
     claimed_by: Optional[int] = None
     completed_turn: Optional[int] = None
     penalized: bool = False 
+    signature: Tuple[Tuple[int, bool, int], ...] = field(init=False, repr=False, compare=False) #what a plate has to match, set once
+
+    def __post_init__(self) -> None:
+        self.signature = tuple(order_signature(self.required))
 
     def is_expired(self, turn: int) -> bool:
         return turn > self.expires_turn
@@ -44,22 +51,19 @@ class Order:
     def is_active(self, turn: int) -> bool:
         return self.created_turn <= turn <= self.expires_turn and self.completed_turn is None
 
+    def __copy__(self) -> "Order":
+        return Order(self.order_id, self.required, self.created_turn, self.expires_turn, self.reward, self.penalty, self.claimed_by, self.completed_turn, self.penalized)
 
-def plate_food_signature(plate: Plate) -> List[Tuple[int, bool, int]]:
-    '''Helper that basically creates a unique signature for each user plated food'''
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Order":
+        #FoodType members are singletons, only the list needs copying
+        new = Order(self.order_id, list(self.required), self.created_turn, self.expires_turn, self.reward, self.penalty, self.claimed_by, self.completed_turn, self.penalized)
+        memo[id(self)] = new
+        return new
 
-    sig: List[Tuple[int, bool, int]] = [] #unique plate signature exists as a list of tuples
-
-    for f in plate.food:
-        if isinstance(f, Food):
-            sig.append((f.food_id, bool(getattr(f, "chopped", False)), int(getattr(f, "cooked_stage", 0))))
-        elif isinstance(f, FoodType):
-            sig.append((f.food_id, False, 0))
-        else:
-            sig.append((-1, False, 0))
 
-    sig.sort()
-    return sig
+def plate_food_signature(plate: Plate) -> List[Tuple[int, bool, int]]:
+    '''Helper that basically creates a unique signature for each user plated food'''
+    return list(plate.signature) #the plate keeps it sorted and cached
 
 
 def order_signature(req: List[FoodType]) -> List[Tuple[int, bool, int]]:
@@ -72,14 +76,101 @@ def order_signature(req: List[FoodType]) -> List[Tuple[int, bool, int]]:
 
 def plate_matches_order(plate: Plate, order: Order) -> bool:
     '''Sees if the plate matches the order'''
-    return plate_food_signature(plate) == order_signature(order.required)
+    return plate.signature == order.signature
+
+
+class OrderIndex:
+    '''
+    lookup structures over one team's order list, so per-turn upkeep and submissions don't scan the history
+
+    upcoming: heap of (created_turn, position) for orders that haven't opened yet
+    expiring: heap of (expires_turn, position) for orders that can still be penalized
+    active:   positions of the open, unfilled orders
+    by_signature: order signature -> heap of active positions, the lowest (earliest in the list) wins like the old scan
+
+    positions index into the list it was built from; entries that went stale (filled, expired) are
+    dropped lazily when they reach the top of a heap
+    '''
+
+    def __init__(self, orders: List[Order]):
+        self.orders = orders
+        self.size = 0
+        self.upcoming: List[Tuple[int, int]] = []
+        self.expiring: List[Tuple[int, int]] = []
+        self.active: Set[int] = set()
+        self.signatures: List[Tuple[Tuple[int, bool, int], ...]] = []
+        self.by_signature: Dict[Tuple[Tuple[int, bool, int], ...], List[int]] = {}
+        self.extend()
+
+    def extend(self) -> None:
+        '''index orders appended to the list since the last call'''
+        for i in range(self.size, len(self.orders)):
+            o = self.orders[i]
+            self.signatures.append(o.signature)
+            if o.completed_turn is None and not o.penalized:
+                heapq.heappush(self.upcoming, (o.created_turn, i))
+                heapq.heappush(self.expiring, (o.expires_turn, i))
+        self.size = len(self.orders)
+
+    def copy_for(self, orders: List[Order]) -> "OrderIndex":
+        '''the same index over a copy of the order list (GameState.clone)'''
+        new = OrderIndex.__new__(OrderIndex)
+        new.orders = orders
+        new.size = self.size
+        new.upcoming = list(self.upcoming)
+        new.expiring = list(self.expiring)
+        new.active = set(self.active)
+        new.signatures = list(self.signatures)
+        new.by_signature = {sig: list(heap) for sig, heap in self.by_signature.items()}
+        return new
+
+    def open_orders(self, turn: int) -> None:
+        '''moves orders whose created_turn has come into the active set'''
+        upcoming = self.upcoming
+        while upcoming and upcoming[0][0] <= turn:
+            _, i = heapq.heappop(upcoming)
+            o = self.orders[i]
+            if o.completed_turn is None and not o.is_expired(turn):
+                self.active.add(i)
+                heapq.heappush(self.by_signature.setdefault(self.signatures[i], []), i)
+
+    def pop_expired(self, turn: int) -> List[Order]:
+        '''unfilled orders that expired by turn and were not penalized yet, each returned once'''
+        self.open_orders(turn)
+        expired = []
+        expiring = self.expiring
+        while expiring and expiring[0][0] < turn:
+            _, i = heapq.heappop(expiring)
+            self.active.discard(i)
+            o = self.orders[i]
+            if o.completed_turn is None and not o.penalized:
+                expired.append(o)
+        return expired
+
+    def find(self, signature: Tuple[Tuple[int, bool, int], ...], turn: int) -> Optional[int]:
+        '''position of the first active order with this signature, None if there is none'''
+        self.open_orders(turn)
+        heap = self.by_signature.get(signature)
+        while heap:
+            i = heap[0]
+            if i in self.active and self.orders[i].is_active(turn):
+                return i
+
+            #filled or expired, which is for good
+            heapq.heappop(heap)
+            self.active.discard(i)
+        return None
+
+    def complete(self, i: int) -> None:
+        '''call after filling the order at position i (from find)'''
+        self.active.discard(i)
 
 
 # -----------------------
 # Bots
 # -----------------------
 
-@dataclass
+@dataclass(slots=True)
 class BotState:
     '''For each bot, they have their bot state to keep track of'''
     bot_id: int
@@ -94,6 +185,15 @@ class BotState:
         '''Helper that gets their position'''
         return (self.x, self.y)
 
+    def __copy__(self) -> "BotState":
+        return BotState(self.bot_id, self.team, self.x, self.y, self.holding, self.map_team)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "BotState":
+        holding = None if self.holding is None else copy.deepcopy(self.holding, memo)
+        new = BotState(self.bot_id, self.team, self.x, self.y, holding, self.map_team)
+        memo[id(self)] = new
+        return new
+
 
 # -----------------------
 # Tile factory and map normalization
@@ -101,50 +201,61 @@ class BotState:
 
 def tile_factory(tile_type: TileType) -> Tile:
     '''Converst tile type to a tile class'''
-    if tile_type == TileType.FLOOR:
-        return Floor()
-    if tile_type == TileType.WALL:
-        return Wall()
-    if tile_type == TileType.COUNTER:
-        return Counter()
-    if tile_type == TileType.SINK:
-        return Sink()
-    if tile_type == TileType.SINKTABLE:
-        return SinkTable()
-    if tile_type == TileType.COOKER:
-        return Cooker()
-    if tile_type == TileType.TRASH:
-        return Trash()
-    if tile_type == TileType.SUBMIT:
-        return Submit()
-    if tile_type == TileType.SHOP:
-        return Shop()
-    return Tile(tile_type)
-
-
-def normalize_map_tiles(m: Map) -> None:
-    '''It converts map tiles from tile type to actual tiles that are interactable IF NEEDED (at the beginning especially)'''
-    if m.tiles is None:
-        m.tiles = [[tile_factory(TileType.FLOOR) for _ in range(m.height)] for _ in range(m.width)]
-        return
+    return new_tile(tile_type)
 
-    sample = m.tiles[0][0] #assume tiles is either all tile type or tiles
-    if isinstance(sample, TileType):
-        m.tiles = [[tile_factory(cell) for cell in col] for col in m.tiles]  # m.tiles is [x][y]
 
-    #do nothing
-    elif isinstance(sample, Tile):
-        return
-    
-    #error 
-    else:
-        raise GameStateException(f"cannot recognize map tile type: {type(sample)}")
+def has_timed_state(tile: Tile) -> bool:
+    '''True if the tile changes on its own every turn (cooker with food in the pan, sink with dirty plates)'''
+    if isinstance(tile, Cooker):
+        pan = tile.item
+        return isinstance(pan, Pan) and isinstance(pan.food, Food)
+    if isinstance(tile, Sink):
+        return tile.num_dirty_plates > 0 or tile.using
+    return False
+
+
+def normalize_map_tiles(m: Map) -> Set[Tuple[int, int]]:
+    '''
+    It converts map tiles from tile type to actual tiles that are interactable IF NEEDED (at the beginning especially)
+
+    returns the (x, y) of every tile that already has timed state, to seed GameState.timed_tiles
+    '''
+    if m.tiles is None:
+        m.tiles = TileGrid(m.width, m.height)
+        return set()
+
+    #Map.tiles is always a TileGrid (lists of Tile or TileType are converted on assignment),
+    #only tiles with an object can have state
+    return {pos for pos, tile in m.tiles.stored_tiles() if has_timed_state(tile)}
 
 
 # -----------------------
 # GameState
 # -----------------------
 
+def item_snapshot(it: Optional[Item]) -> Any:
+    '''json friendly dict of a held item, like Item.to_dict with plate foods always as Food'''
+    if it is None:
+        return None
+    if isinstance(it, Food):
+        return {
+            "type": "Food",
+            "food_name": it.food_name,
+            "food_id": it.food_id,
+            "chopped": it.chopped,
+            "cooked_stage": it.cooked_stage,
+        }
+    if isinstance(it, Plate):
+        return {
+            "type": "Plate",
+            "dirty": it.dirty,
+            "food": [item_snapshot(f if isinstance(f, Food) else Food(f)) for f in it.food],
+        }
+    if isinstance(it, Pan):
+        return {"type": "Pan", "food": item_snapshot(it.food)}
+    return {"type": type(it).__name__}
+
+
 class GameState:
     '''Game state class that keeps track of the state at each turn'''
     def __init__(self, red_map: Map, blue_map: Map):
@@ -153,6 +264,8 @@ class GameState:
 
         self.turn = 0
         self.bots: Dict[int, BotState] = {}
+        self.dirty_bots: Set[int] = set() #bots handed out through get_bot (or moved here) since the last to_dict
+        self.__snapshot: Dict[Any, Any] = {} #previous to_dict parts, see to_dict
         
         #shared team money
         self.team_money: Dict[Team, int] = {Team.RED: 150, Team.BLUE: 150}
@@ -163,20 +276,58 @@ class GameState:
         
         self.next_order_id = 1
 
+        #lookup index per team over self.orders, (re)built lazily by order_index()
+        self.order_indexes: Dict[Team, Optional[OrderIndex]] = {Team.RED: None, Team.BLUE: None}
+
         #switching states
         self.switch_turn = GameConstants.MIDGAME_SWITCH_TURN
         self.switch_duration = GameConstants.MIDGAME_SWITCH_DURATION
         self.switched = {Team.RED: False, Team.BLUE: False}
 
-        #init map tiles
-        normalize_map_tiles(self.red_map)
-        normalize_map_tiles(self.blue_map)
+        #init map tiles, and index the tiles tick_environment has to visit
+        self.timed_tiles: Dict[Team, Set[Tuple[int, int]]] = {
+            Team.RED: normalize_map_tiles(self.red_map),
+            Team.BLUE: normalize_map_tiles(self.blue_map),
+        }
 
         #occ maps
         self.occupancy = {
             Team.RED: [[None for _ in range(self.red_map.height)] for _ in range(self.red_map.width)],
             Team.BLUE: [[None for _ in range(self.blue_map.height)] for _ in range(self.blue_map.width)],
         }
+        self.occupancy_version = 0 #bumped whenever a bot is placed or moves, for caches keyed on occupancy
+
+    def clone(self) -> "GameState":
+        '''
+        independent copy for lookahead, much cheaper than copy.deepcopy
+
+        the maps are copy-on-write (tile layout and indexes are shared, a station tile is only copied
+        once either side fetches it through tiles[x][y]); bots, orders, money and occupancy are copied
+        '''
+        new = GameState.__new__(GameState)
+        new.red_map = self.red_map.cow_copy()
+        new.blue_map = self.blue_map.cow_copy()
+
+        new.turn = self.turn
+        new.bots = {bot_id: copy.deepcopy(b) for bot_id, b in self.bots.items()}
+        new.dirty_bots = set()
+        new.__snapshot = {}
+        new.team_money = dict(self.team_money)
+        new.orders = {team: [copy.deepcopy(o) for o in orders] for team, orders in self.orders.items()}
+        new.next_order_id = self.next_order_id
+        new.order_indexes = {
+            team: (idx.copy_for(new.orders[team]) if idx is not None and idx.orders is self.orders[team] else None)
+            for team, idx in self.order_indexes.items()
+        }
+
+        new.switch_turn = self.switch_turn
+        new.switch_duration = self.switch_duration
+        new.switched = dict(self.switched)
+
+        new.timed_tiles = {team: set(timed) for team, timed in self.timed_tiles.items()}
+        new.occupancy = {team: [col[:] for col in grid] for team, grid in self.occupancy.items()}
+        new.occupancy_version = self.occupancy_version
+        return new
 
 
     # -------------
@@ -194,8 +345,10 @@ class GameState:
 
     def is_walkable(self, team: Team, x: int, y: int) -> bool:
         '''helper for movement'''
-        t = self.get_tile(team, x, y)
-        return bool(getattr(t, "is_walkable", False)) #we will use getattr because it has a default functionality
+        m = self.get_map(team)
+        if not m.in_bounds(x, y):
+            raise GameStateException(f"out of bounds error: ({x},{y}) for team {team.name}")
+        return m.tiles.is_walkable_at(x, y)
 
     # -------------
     # Money helpers
@@ -227,12 +380,14 @@ class GameState:
         #start off at the beginning with current map team
         self.bots[bot_id] = BotState(bot_id=bot_id, team=team, x=x, y=y, holding=None, map_team=team)
         self.occupancy[team][x][y] = bot_id
+        self.occupancy_version += 1
         return bot_id
 
     def get_bot(self, bot_id: int) -> BotState:
         '''Get the bot class'''
         if bot_id not in self.bots:
             raise GameStateException(f"Invalid bot_id: {bot_id}")
+        self.dirty_bots.add(bot_id) #the caller may move it or change what it holds
         return self.bots[bot_id]
 
     # -------------
@@ -268,52 +423,58 @@ class GameState:
             nx, ny = x + dx, y + dy
             if not m.in_bounds(nx, ny):
                 continue
-            t = m.tiles[nx][ny]
+            if isinstance(m.tiles.peek(nx, ny), SinkTable):
+                m.tiles[nx][ny].num_clean_plates += 1
+                return
+
+        #if there is no sink table near us in the common cas , we put the clean plates in the first sink table we see location
+        for (ix, iy) in m.get_tile_locations(TileType.SINKTABLE):
+            t = m.tiles[ix][iy]
             if isinstance(t, SinkTable):
                 t.num_clean_plates += 1
                 return
 
-        #if there is no sink table near us in the common cas , we put the clean plates in the first sink table we see location
-        for ix in range(m.width):
-            for iy in range(m.height):
-                t = m.tiles[ix][iy]
-                if isinstance(t, SinkTable):
-                    t.num_clean_plates += 1
-                    return
+    def mark_timed_tile(self, team: Team, x: int, y: int) -> None:
+        '''call when a cooker pan gets food or a sink gets plates so tick_environment visits it'''
+        self.timed_tiles[team].add((x, y))
 
     def tick_environment(self, team: Team) -> None:
         '''cooking ticks helper that basically cooks if pan is in the food or wash if the dishes are washing'''
         m = self.get_map(team)
+        timed = self.timed_tiles[team]
 
-        for x in range(m.width):
-            for y in range(m.height):
+        #only visit the indexed tiles, in the same x-major order as a full scan
+        for (x, y) in sorted(timed):
+
+            #get the tile
+            tile = m.tiles[x][y]
 
-                #get the tile
-                tile = m.tiles[x][y]
+            #if the tile is a cooker, then we auto cook it through ticking
+            if isinstance(tile, Cooker):
+                pan = tile.item
+                if isinstance(pan, Pan) and isinstance(pan.food, Food):
+                    tile.cook_progress += 1
+                    if tile.cook_progress == GameConstants.COOK_PROGRESS and pan.food.cooked_stage == 0:
+                        pan.food.cooked_stage = 1
+                    elif tile.cook_progress >= GameConstants.BURN_PROGRESS:
+                        pan.food.cooked_stage = 2
 
-                #if the tile is a cooker, then we auto cook it through ticking
-                if isinstance(tile, Cooker):
-                    pan = tile.item
-                    if isinstance(pan, Pan) and isinstance(pan.food, Food):
-                        tile.cook_progress += 1
-                        if tile.cook_progress == GameConstants.COOK_PROGRESS and pan.food.cooked_stage == 0:
-                            pan.food.cooked_stage = 1
-                        elif tile.cook_progress >= GameConstants.BURN_PROGRESS:
-                            pan.food.cooked_stage = 2
+            #if the tile is a sink, then if we are washing, then we clean it
+            if isinstance(tile, Sink):
 
-                #if the tile is a sink, then if we are washing, then we clean it
-                if isinstance(tile, Sink):
+                if tile.using and tile.num_dirty_plates > 0:
+                    tile.curr_dirty_plate_progress += 1
 
-                    if tile.using and tile.num_dirty_plates > 0:
-                        tile.curr_dirty_plate_progress += 1
+                    if tile.curr_dirty_plate_progress >= GameConstants.PLATE_WASH_PROGRESS:
+                        tile.curr_dirty_plate_progress = 0
+                        tile.num_dirty_plates -= 1
+                        self.add_clean_plate_to_sinktable_near(team, x, y)
 
-                        if tile.curr_dirty_plate_progress >= GameConstants.PLATE_WASH_PROGRESS:
-                            tile.curr_dirty_plate_progress = 0
-                            tile.num_dirty_plates -= 1
-                            self.add_clean_plate_to_sinktable_near(team, x, y)
+                # reset the tile each turn so the user needs ot keep washing
+                tile.using = False
 
-                    # reset the tile each turn so the user needs ot keep washing
-                    tile.using = False
+        #drop the tiles that went idle (food taken out, pan removed, sink emptied)
+        timed.difference_update([pos for pos in timed if not has_timed_state(m.tiles.peek(pos[0], pos[1]))])
 
     def expire_orders(self) -> None:
         '''
@@ -321,21 +482,32 @@ class GameState:
         Keeps all orders in the history, only marks them as penalized.
         '''
         for team in [Team.RED, Team.BLUE]:
-            
-            # We iterate through the existing list without creating a filtered copy
-            for o in self.orders.get(team, []):
-
-                # Check if order is expired, not completed, and hasn't been penalized yet
-                if o.completed_turn is None and o.is_expired(self.turn):
-                    if not o.penalized:
-                        self.add_team_money(team, -o.penalty)
-                        o.penalized = True
+
+            #the expiry heap only hands back orders that just ran out, not the whole history
+            for o in self.order_index(team).pop_expired(self.turn):
+                self.add_team_money(team, -o.penalty)
+                o.penalized = True
             
 
     # -------------
     # Orders
     # -------------
 
+    def order_index(self, team: Team) -> OrderIndex:
+        '''
+        the OrderIndex over self.orders[team]; rebuilt when the list is replaced, extended when it grew
+
+        orders should only change through GameState (submit_plate, expire_orders, spawn_order)
+        '''
+        orders = self.orders.setdefault(team, [])
+        idx = self.order_indexes.get(team)
+        if idx is None or idx.orders is not orders or idx.size > len(orders):
+            idx = OrderIndex(orders)
+            self.order_indexes[team] = idx
+        elif idx.size < len(orders):
+            idx.extend()
+        return idx
+
     def spawn_order(self, required: List[FoodType], delta_time: int = 20, reward: int = 5, penalty: int = 2) -> int:
         '''
         creates an order for both teams
@@ -371,18 +543,18 @@ class GameState:
             nx, ny = x + dx, y + dy
             if not m.in_bounds(nx, ny):
                 continue
-            t = m.tiles[nx][ny]
-            if isinstance(t, Sink):
-                t.num_dirty_plates += 1
+            if isinstance(m.tiles.peek(nx, ny), Sink):
+                m.tiles[nx][ny].num_dirty_plates += 1
+                self.mark_timed_tile(team, nx, ny)
                 return
 
         # the first sink anywhere
-        for ix in range(m.width):
-            for iy in range(m.height):
-                t = m.tiles[ix][iy]
-                if isinstance(t, Sink):
-                    t.num_dirty_plates += 1
-                    return
+        for (ix, iy) in m.get_tile_locations(TileType.SINK):
+            t = m.tiles[ix][iy]
+            if isinstance(t, Sink):
+                t.num_dirty_plates += 1
+                self.mark_timed_tile(team, ix, iy)
+                return
 
     def submit_plate(self, bot_id: int, target_x: int, target_y: int) -> bool:
         '''logic to submit the plate, will go to MAP team not the team that submitted'''
@@ -396,21 +568,24 @@ class GameState:
             return False
 
         order_team = bot.map_team #MAP OWNER, not the submission team
-        for o in self.orders.get(order_team, []):
-            if o.is_active(self.turn) and plate_matches_order(bot.holding, o):
-                o.claimed_by = bot_id
-                o.completed_turn = self.turn
+        idx = self.order_index(order_team)
+        i = idx.find(bot.holding.signature, self.turn)
+        if i is None:
+            return False
 
-                #reward map owner
-                self.add_team_money(order_team, o.reward)
+        o = idx.orders[i]
+        idx.complete(i)
+        o.claimed_by = bot_id
+        o.completed_turn = self.turn
 
-                #dirty plate goes into sink on that map specifically
-                self.add_dirty_plate_to_sink_near(order_team, target_x, target_y)
+        #reward map owner
+        self.add_team_money(order_team, o.reward)
 
-                bot.holding = None #lets go of jitem
-                return True
+        #dirty plate goes into sink on that map specifically
+        self.add_dirty_plate_to_sink_near(order_team, target_x, target_y)
 
-        return False
+        bot.holding = None #lets go of jitem
+        return True
 
 
     # -----------------------
@@ -433,6 +608,7 @@ class GameState:
 
         self.occupancy[bot.map_team][bot.x][bot.y] = None
         self.occupancy[bot.map_team][new_x][new_y] = bot_id
+        self.occupancy_version += 1
 
         bot.x, bot.y = new_x, new_y
         return True
@@ -462,8 +638,7 @@ class GameState:
 
     def is_walkable_on_map(self, map_team: Team, x: int, y: int) -> bool:
         '''map-based walkability dependent on input team'''
-        t = self.get_tile(map_team, x, y)
-        return bool(getattr(t, "is_walkable", False))
+        return self.is_walkable(map_team, x, y)
 
     def find_free_spawn_near(self, map_team: Team, prefer_x: int, prefer_y: int) -> Tuple[int, int]:
         '''
@@ -486,7 +661,7 @@ class GameState:
                     x, y = prefer_x + dx, prefer_y + dy
                     if not can_spawn(x, y):
                         continue
-                    if getattr(m.tiles[x][y], "tile_name", "") == "FLOOR":
+                    if m.tiles.tile_type_at(x, y) == TileType.FLOOR:
                         return (x, y)
 
         #look around for walkable
@@ -521,6 +696,7 @@ class GameState:
 
         #clear the occupancy first in previous map
         bot_ids = [bid for bid, b in self.bots.items() if b.team == team]
+        self.dirty_bots.update(bot_ids)
         for bid in bot_ids:
             b = self.bots[bid]
             self.occupancy[b.map_team][b.x][b.y] = None
@@ -535,6 +711,7 @@ class GameState:
 
         #set state
         self.switched[team] = True
+        self.occupancy_version += 1
         return True
 
     def return_team_home_if_switched(self, team: Team) -> None:
@@ -544,6 +721,7 @@ class GameState:
             return
 
         bot_ids = [bid for bid, b in self.bots.items() if b.team == team]
+        self.dirty_bots.update(bot_ids)
 
         #clear current occupancy
         for bid in bot_ids:
@@ -559,6 +737,7 @@ class GameState:
             self.occupancy[team][spawn_x][spawn_y] = bid
 
         self.switched[team] = False
+        self.occupancy_version += 1
 
 
     # -----------------------
@@ -566,55 +745,59 @@ class GameState:
     # -----------------------
 
     def to_dict(self) -> Dict[str, Any]:
-        def item_to_dict(it: Optional[Item]) -> Any:
-            if it is None:
-                return None
-            if isinstance(it, Food):
-                return {
-                    "type": "Food",
-                    "food_name": it.food_name,
-                    "food_id": it.food_id,
-                    "chopped": it.chopped,
-                    "cooked_stage": it.cooked_stage,
-                }
-            if isinstance(it, Plate):
-                return {
-                    "type": "Plate",
-                    "dirty": it.dirty,
-                    "food": [item_to_dict(f if isinstance(f, Food) else Food(f)) for f in it.food],
-                }
-            if isinstance(it, Pan):
-                return {"type": "Pan", "food": item_to_dict(it.food)}
-            return {"type": type(it).__name__}
-
-        bots_payload = [
-            {
-                "bot_id": bot_id,
-                "team": b.team.name,
-                "x": b.x,
-                "y": b.y,
-                "holding": item_to_dict(b.holding),
-                "map_team": getattr(b, "map_team", b.team).name,
-            }
-            for bot_id, b in self.bots.items()
-        ]
-
-        orders_payload = {
-            Team.RED.name: [
-                {
-                    "order_id": o.order_id,
-                    "required": [ft.food_name for ft in o.required],
-                    "created_turn": o.created_turn,
-                    "expires_turn": o.expires_turn,
-                    "reward": o.reward,
-                    "penalty": o.penalty,
-                    "claimed_by": o.claimed_by,
-                    "completed_turn": o.completed_turn,
+        '''
+        json friendly snapshot, built incrementally: tiles not fetched through tiles[x][y] and bots
+        not fetched through get_bot since the last call, unchanged orders and money reuse the dicts
+        of the previous snapshot; whatever changed is a new object, so earlier snapshots stay as they
+        were (ReplayWriter diffs against the previous one). Never mutate a snapshot.
+        '''
+        cache = self.__snapshot
+        return {
+            "turn": self.turn,
+            "team_money": self.__money_snapshot(cache),
+            "bots": self.__bots_snapshot(cache),
+            "orders": {team.name: self.__orders_snapshot(cache, team) for team in (Team.RED, Team.BLUE)},
+            "red_map": self.__map_snapshot(cache, "red_map", self.red_map),
+            "blue_map": self.__map_snapshot(cache, "blue_map", self.blue_map),
+        }
+
+    def __money_snapshot(self, cache: Dict[str, Any]) -> Dict[str, int]:
+        money = {Team.RED.name: self.get_team_money(Team.RED), Team.BLUE.name: self.get_team_money(Team.BLUE)}
+        prev = cache.get("team_money")
+        if prev == money:
+            return prev
+        cache["team_money"] = money
+        return money
+
+    def __bots_snapshot(self, cache: Dict[str, Any]) -> List[Dict[str, Any]]:
+        prev: Dict[int, Dict[str, Any]] = cache.get("bots", {})
+        dirty = self.dirty_bots
+        bots: Dict[int, Dict[str, Any]] = {}
+        for bot_id, b in self.bots.items():
+            d = prev.get(bot_id)
+            if d is None or bot_id in dirty:
+                d = {
+                    "bot_id": bot_id,
+                    "team": b.team.name,
+                    "x": b.x,
+                    "y": b.y,
+                    "holding": item_snapshot(b.holding),
+                    "map_team": getattr(b, "map_team", b.team).name,
                 }
-                for o in self.orders.get(Team.RED, [])
-            ],
-            Team.BLUE.name: [
-                {
+            bots[bot_id] = d
+        cache["bots"] = bots
+        self.dirty_bots = set()
+        return list(bots.values())
+
+    def __orders_snapshot(self, cache: Dict[str, Any], team: Team) -> List[Dict[str, Any]]:
+        #only claimed_by / completed_turn change after an order is created
+        prev: Dict[int, Tuple[Order, Optional[int], Optional[int], Dict[str, Any]]] = cache.get(("orders", team), {})
+        entries = {}
+        out = []
+        for o in self.orders.get(team, []):
+            entry = prev.get(o.order_id)
+            if entry is None or entry[0] is not o or entry[1] != o.claimed_by or entry[2] != o.completed_turn:
+                entry = (o, o.claimed_by, o.completed_turn, {
                     "order_id": o.order_id,
                     "required": [ft.food_name for ft in o.required],
                     "created_turn": o.created_turn,
@@ -623,17 +806,31 @@ class GameState:
                     "penalty": o.penalty,
                     "claimed_by": o.claimed_by,
                     "completed_turn": o.completed_turn,
-                }
-                for o in self.orders.get(Team.BLUE, [])
-            ],
-        }
-
-
-        return {
-            "turn": self.turn,
-            "team_money": {Team.RED.name: self.get_team_money(Team.RED), Team.BLUE.name: self.get_team_money(Team.BLUE)},
-            "bots": bots_payload,
-            "orders": orders_payload,
-            "red_map": self.red_map.to_2d_list(),
-            "blue_map": self.blue_map.to_2d_list(),
-        }
\ No newline at end of file
+                })
+            entries[o.order_id] = entry
+            out.append(entry[3])
+        cache[("orders", team)] = entries
+        return out
+
+    def __map_snapshot(self, cache: Dict[str, Any], key: str, m: Map) -> List[List[Dict[str, Any]]]:
+        grid = m.tiles
+        prev = cache.get(key)
+        if prev is None or prev[0] is not grid:
+            grid.take_dirty()
+            columns = grid.to_2d_list()
+        else:
+            columns = prev[1]
+            dirty = grid.take_dirty()
+            if dirty:
+                #copy only the columns with a changed cell, the rest are shared with the previous snapshot
+                columns = list(columns)
+                copied: Set[int] = set()
+                h = grid.height
+                for i in dirty:
+                    x, y = divmod(i, h)
+                    if x not in copied:
+                        columns[x] = list(columns[x])
+                        copied.add(x)
+                    columns[x][y] = grid.peek(x, y).to_dict()
+        cache[key] = (grid, columns)
+        return columns
\ No newline at end of file
@@ -1,21 +1,46 @@
 '''item.py File that provides Enums for Food and Food Container Item classes.'''
 
 from abc import ABC
+import bisect
 from enum import Enum, auto
-from typing import List, Optional, Any
+from functools import lru_cache
+from typing import List, Optional, Any, Tuple
 from game_constants import FoodType
+import copy
+
+
+@lru_cache(maxsize=None)
+def all_slots(cls: type) -> Tuple[str, ...]:
+    '''every __slots__ name of cls and its bases, for the hand written copies'''
+    names: List[str] = []
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get("__slots__", ()):
+            if name not in names:
+                names.append(name)
+    return tuple(names)
+
 
 class Item(ABC):
     '''Generic Item Class'''
+    __slots__ = ()
+
     def __init__(self):
         pass
 
+    def __copy__(self):
+        new = object.__new__(type(self))
+        for name in all_slots(type(self)):
+            object.__setattr__(new, name, getattr(self, name))
+        return new
+
     def to_dict(self) -> Any:
         '''dictionary serialization for purposes of JSON'''
         return {"type": type(self).__name__}
 
 
 class Food(Item):
+    __slots__ = ("food_name", "food_id", "can_chop", "can_cook", "buy_cost", "chopped", "cooked_stage")
+
     def __init__(self, food_type: FoodType):
         self.food_name = food_type.food_name
         self.food_id = food_type.food_id
@@ -35,11 +60,74 @@ class Food(Item):
             "cooked_stage": self.cooked_stage,
         }
 
+    def __deepcopy__(self, memo):
+        #every field is immutable, so a deep copy is a field copy
+        new = object.__new__(Food)
+        memo[id(self)] = new
+        new.food_name = self.food_name
+        new.food_id = self.food_id
+        new.can_chop = self.can_chop
+        new.can_cook = self.can_cook
+        new.buy_cost = self.buy_cost
+        new.chopped = self.chopped
+        new.cooked_stage = self.cooked_stage
+        return new
+
+def food_signature(f: Any) -> Tuple[int, bool, int]:
+    '''(food_id, chopped, cooked_stage) of a plated food, what submit matching and box stacking compare'''
+    if isinstance(f, Food):
+        return (f.food_id, bool(f.chopped), int(f.cooked_stage))
+    if isinstance(f, FoodType):
+        return (f.food_id, False, 0)
+    return (-1, False, 0)
+
+
 class Plate(Item):
-    def __init__(self, food: List[Item] = [], dirty: bool = False):
+    __slots__ = ("food", "dirty", "_food_sigs", "_signature", "_sig_food")
+
+    def __init__(self, food: Optional[List[Item]] = None, dirty: bool = False):
         self.food = food if food is not None else [] #what food is on the plate, can have multiple foods on the plate
         self.dirty = dirty #if the plate is dirty, no food should be on it
 
+        #cached signatures of the list _sig_food, kept up to date by add_food
+        self._food_sigs: Tuple[Tuple[int, bool, int], ...] = ()
+        self._signature: Tuple[Tuple[int, bool, int], ...] = ()
+        self._sig_food: Optional[List[Item]] = None
+
+    def __signature_fresh(self) -> bool:
+        '''cache still describes self.food: same list object (not reassigned) and nothing appended behind add_food'''
+        return self._sig_food is self.food and len(self._food_sigs) == len(self.food)
+
+    def add_food(self, food: Item) -> None:
+        '''put food on the plate, updating the cached signatures instead of recomputing them'''
+        fresh = self.__signature_fresh()
+        self.food.append(food)
+        if not fresh:
+            return
+        s = food_signature(food)
+        self._food_sigs += (s,)
+        i = bisect.bisect(self._signature, s)
+        self._signature = self._signature[:i] + (s,) + self._signature[i:]
+
+    def __refresh_signature(self) -> None:
+        self._food_sigs = tuple(food_signature(f) for f in self.food)
+        self._signature = tuple(sorted(self._food_sigs))
+        self._sig_food = self.food
+
+    @property
+    def signature(self) -> Tuple[Tuple[int, bool, int], ...]:
+        '''sorted food signatures, compared against Order.signature on submit'''
+        if not self.__signature_fresh():
+            self.__refresh_signature()
+        return self._signature
+
+    @property
+    def food_signatures(self) -> Tuple[Tuple[int, bool, int], ...]:
+        '''food signatures in the order the food was added, for box stacking'''
+        if not self.__signature_fresh():
+            self.__refresh_signature()
+        return self._food_sigs
+
     def to_dict(self):
         return {
             "type": "Plate",
@@ -48,7 +136,19 @@ class Plate(Item):
             "food": [f.to_dict() for f in self.food], 
         }
 
+    def __deepcopy__(self, memo):
+        new = object.__new__(Plate)
+        memo[id(self)] = new
+        new.food = [copy.deepcopy(f, memo) for f in self.food]
+        new.dirty = self.dirty
+        new._food_sigs = self._food_sigs
+        new._signature = self._signature
+        new._sig_food = new.food if self._sig_food is self.food else None
+        return new
+
 class Pan(Item):
+    __slots__ = ("food",)
+
     def __init__(self, food: Optional[Food] = None):
         self.food = food #what food is on the pan, only 1 food at at a time on the pan
 
@@ -56,4 +156,10 @@ class Pan(Item):
         return {
             "type": "Pan",
             "food": self.food.to_dict() if self.food else None
-        }
\ No newline at end of file
+        }
+
+    def __deepcopy__(self, memo):
+        new = object.__new__(Pan)
+        memo[id(self)] = new
+        new.food = None if self.food is None else copy.deepcopy(self.food, memo)
+        return new
\ No newline at end of file
@@ -1,8 +1,12 @@
 '''map.py'''
 
+import copy
+
 from game_constants import TileType, Team
 from tiles import Tile
-from typing import List, Tuple
+from pathfinding import DistanceTables
+from tile_grid import TileGrid, WALKABLE_BY_ID
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 class Map:
     '''
@@ -36,7 +40,7 @@ class Map:
         self.height = height
         self.tiles = tiles
         if self.tiles is None:
-            self.tiles=[[Tile(TileType.FLOOR) for x in range(self.height)] for x in range(self.width)]
+            self.tiles = TileGrid(self.width, self.height)
 
         self.team = team
 
@@ -44,8 +48,61 @@ class Map:
         if self.orders is None:
             self.orders = []
 
+        #tile name -> positions, built lazily by get_tile_locations (tile kinds never change mid game)
+        self.tile_locations: Optional[Dict[str, Tuple[Tuple[int, int], ...]]] = None
+        self.tile_locations_src: Optional[TileGrid] = None
+
+        #flat walkability grid (index x * height + y), built lazily by get_walkable_grid
+        self.walkable_grid: Optional[bytes] = None
+        self.walkable_grid_src: Optional[TileGrid] = None
+
+        #static walking distances, set by map_processor at load (shared by both team maps, read-only)
+        self.distance_tables: Optional[DistanceTables] = None
+
+
+    @property
+    def tiles(self) -> Optional[TileGrid]:
+        '''
+        the tile grid, indexed self.tiles[x][y] like a list of lists
+
+        assigning a [x][y] list of lists (of Tile or TileType) converts it to a TileGrid
+        '''
+        return self.__tiles
+
+    @tiles.setter
+    def tiles(self, tiles) -> None:
+        if tiles is not None and not isinstance(tiles, TileGrid):
+            tiles = TileGrid.from_columns(tiles)
+        self.__tiles = tiles
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Map":
+        '''copies the tiles and orders; the indexes are immutable (tile kinds never change) and only their dict is copied'''
+        new = type(self).__new__(type(self))
+        memo[id(self)] = new
+        new.width = self.width
+        new.height = self.height
+        new.tiles = copy.deepcopy(self.tiles, memo)
+        new.team = self.team
+        new.orders = copy.deepcopy(self.orders, memo)
+        new.tile_locations = None if self.tile_locations is None else dict(self.tile_locations)
+        new.tile_locations_src = new.tiles if self.tile_locations_src is self.tiles else None
+        new.walkable_grid = self.walkable_grid
+        new.walkable_grid_src = new.tiles if self.walkable_grid_src is self.tiles else None
+        new.distance_tables = self.distance_tables
+        return new
+
+    def cow_copy(self) -> "Map":
+        '''like deepcopy, but the tiles are copy-on-write (see TileGrid.cow_copy)'''
+        new = copy.copy(self)
+        new.tiles = self.tiles.cow_copy()
+        new.orders = list(self.orders)
+        new.tile_locations = None if self.tile_locations is None else dict(self.tile_locations)
+        if self.tile_locations_src is self.tiles:
+            new.tile_locations_src = new.tiles
+        if self.walkable_grid_src is self.tiles:
+            new.walkable_grid_src = new.tiles
+        return new
 
-    
     def in_bounds(self, x: int, y: int) -> bool:
         '''
         checks if self.tiles[x][y] is in bounds,
@@ -59,38 +116,77 @@ class Map:
         if not self.in_bounds(x, y):
             return False
         
-        return self.tiles[x][y].tile_name == tile_name
+        return self.tiles.tile_type_at(x, y).tile_name == tile_name
     
     def is_tile_walkable(self, x: int, y: int) -> bool:
         '''checks if location (x, y) is walkable'''
         if not self.in_bounds(x, y):
             return False
         
-        return self.tiles[x][y].is_walkable
+        return self.tiles.is_walkable_at(x, y)
 
     def is_tile_dangerous(self, x: int, y: int) -> bool:
         '''checks if location (x, y) is dangerous'''
         if not self.in_bounds(x, y):
             return False
         
-        return self.tiles[x][y].is_dangerous
+        return self.tiles.tile_type_at(x, y).is_dangerous
 
     def is_tile_placeable(self, x: int, y: int) -> bool:
         '''checks if location (x, y) is placeable'''
         if not self.in_bounds(x, y):
             return False
         
-        return self.tiles[x][y].is_placeable
+        return self.tiles.tile_type_at(x, y).is_placeable
     
     def is_tile_interactable(self, x: int, y: int) -> bool:
         '''checks if location (x, y) is interactable'''
         if not self.in_bounds(x, y):
             return False
         
-        return self.tiles[x][y].is_interactable
+        return self.tiles.tile_type_at(x, y).is_interactable
     
+    def get_tile_locations(self, tile_name: Union[str, TileType]) -> Tuple[Tuple[int, int], ...]:
+        '''
+        returns every (x, y) of a tile kind (ie "SINKTABLE" or TileType.SINKTABLE) in x-major order
+
+        the index is built once per map and reused, so it is a tuple (sort a list(...) of it instead)
+        '''
+        if self.tile_locations is None or self.tile_locations_src is not self.tiles:
+            index: Dict[str, List[Tuple[int, int]]] = {}
+            for x in range(self.width):
+                for y in range(self.height):
+                    index.setdefault(self.tiles.tile_type_at(x, y).tile_name, []).append((x, y))
+            self.tile_locations = {name: tuple(locs) for name, locs in index.items()}
+            self.tile_locations_src = self.tiles
+
+        name = getattr(tile_name, "tile_name", tile_name)
+        return self.tile_locations.get(name, ())
+
+    def get_walkable_grid(self) -> bytes:
+        '''
+        flat grid, 1 where the tile is walkable, indexed x * height + y
+
+        built once per map like get_tile_locations (immutable bytes, copy it into a bytearray to edit)
+        '''
+        if self.walkable_grid is None or self.walkable_grid_src is not self.tiles:
+            self.walkable_grid = bytes(self.tiles.ids.translate(WALKABLE_BY_ID))
+            self.walkable_grid_src = self.tiles
+        return self.walkable_grid
+
+    def find_nearest_tile(self, x: int, y: int, tile_name: Union[str, TileType]) -> Optional[Tuple[int, int]]:
+        '''nearest tile of a kind from (x, y) by chebyshev distance, ties go to the first in x-major order'''
+        best_dist = None
+        best_pos = None
+        for (tx, ty) in self.get_tile_locations(tile_name):
+            dist = max(abs(x - tx), abs(y - ty))
+            if best_dist is None or dist < best_dist:
+                best_dist = dist
+                best_pos = (tx, ty)
+        return best_pos
+
     def to_2d_list(self):
         '''
         converts the map into a 2D list of tile dictionaries containing full state
         '''
-        return [[tile.to_dict() for tile in row] for row in self.tiles]
\ No newline at end of file
+        return self.tiles.to_2d_list()
\ No newline at end of file
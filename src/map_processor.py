@@ -10,6 +10,7 @@ from game_constants import Team, FoodType, GameConstants
 from map import Map
 from tiles import Tile, Floor, Wall, Counter, Sink, SinkTable, Cooker, Trash, Submit, Shop, Box
 from game_state import Order
+from pathfinding import build_distance_tables
 
 
 # ----------------------------
@@ -280,6 +281,11 @@ def load_two_team_maps_and_orders(path: str, default_reward: int = 5, default_pe
         orders=[],
     )
 
+    #both maps have the same layout, so they share one set of distance tables
+    tables = build_distance_tables(map_red)
+    map_red.distance_tables = tables
+    map_blue.distance_tables = tables
+
     orders_red = parsed.orders
     orders_blue = copy.deepcopy(parsed.orders)
 
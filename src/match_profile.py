@@ -0,0 +1,232 @@
+# match_profile.py
+"""
+Per-turn timing for Game.run_game (python src/game.py ... --profile).
+
+A MatchProfiler records, every turn, the wall time of each engine phase:
+
+    start_turn          GameState.start_turn (money, cooking, washing, order expiry)
+    play_turn.RED       the bot's play_turn, as seen by the engine (worker round trip included)
+    play_turn.BLUE
+    record_turn         replay serialization
+    render              pygame frame (only with --render)
+    turn                the whole turn
+
+plus, per team, the call count and cumulative time of every RobotController method the bot used.
+The bot's worker is handed a TimedController in front of the real controller, so only calls the bot
+makes are counted (not the engine's own get_turn/get_team, nor calls a method makes internally),
+and only the outermost call is timed, so total_us never counts the same time twice.
+Each phase goes into a Histogram (HDR style: log-linear buckets with a bounded relative error, so
+p99/p99.9 stay meaningful for long matches) and into a per-turn list to find the slow turns.
+
+At the end of the match the summary is written as json next to the replay (<replay>.profile.json)
+and a short table is printed. Without --profile nothing here runs.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from game_constants import Team
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class Histogram:
+    '''
+    HDR style histogram of non negative ints (microseconds here)
+
+    values below 2 * 2**sub_bits are exact, larger ones land in buckets 1/2**sub_bits of their
+    magnitude wide, so a 7 bit histogram is within ~0.8% everywhere with a few hundred buckets
+    '''
+
+    def __init__(self, sub_bits: int = 7):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def __index(self, v: int) -> int:
+        if v < 2 * self.sub_count:
+            return v
+        shift = v.bit_length() - (self.sub_bits + 1)
+        return shift * self.sub_count + (v >> shift)
+
+    def bucket_range(self, i: int) -> Tuple[int, int]:
+        '''(lowest, highest) value that falls into bucket i'''
+        if i < 2 * self.sub_count:
+            return i, i
+        shift = i // self.sub_count - 1
+        low = (i - shift * self.sub_count) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, v: int) -> None:
+        v = max(int(v), 0)
+        i = self.__index(v)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.count += 1
+        self.total += v
+        self.min = v if self.min is None or v < self.min else self.min
+        self.max = v if self.max is None or v > self.max else self.max
+
+    def percentile(self, p: float) -> int:
+        '''highest value equivalent to the p-th percentile (HDR convention), 0 when empty'''
+        if self.count == 0:
+            return 0
+        rank = max(1, int(p / 100.0 * self.count + 0.5))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(self.bucket_range(i)[1], self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "count": self.count,
+            "total": self.total,
+            "mean": round(self.total / self.count, 1) if self.count else 0.0,
+            "min": self.min or 0,
+            "max": self.max or 0,
+        }
+        for p in PERCENTILES:
+            out[f"p{p:g}"] = self.percentile(p)
+        #[lowest value, count] of every non empty bucket
+        out["buckets"] = [[self.bucket_range(i)[0], self.counts[i]] for i in sorted(self.counts)]
+        return out
+
+
+class TimedController:
+    '''
+    stands in for a RobotController on the bot's side and times its public methods into stats
+    (method -> [calls, total ns]); anything else is read through to the controller
+
+    calls made while another timed call is running (the bot calling back in) are passed
+    through untimed, so per method totals add up to the time the bot spent in the controller
+    '''
+
+    def __init__(self, controller: Any, stats: Dict[str, List[int]]):
+        self.__controller = controller
+        self.__depth = 0
+        for name in dir(type(controller)):
+            if name.startswith("_") or name == "revoke":
+                continue
+            fn = getattr(controller, name)
+            if callable(fn):
+                setattr(self, name, self.__timed(fn, stats.setdefault(name, [0, 0])))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__controller, name)
+
+    def __timed(self, fn: Callable[..., Any], stat: List[int]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            if self.__depth:
+                return fn(*args, **kwargs)
+            self.__depth += 1
+            t0 = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stat[0] += 1
+                stat[1] += time.perf_counter_ns() - t0
+                self.__depth -= 1
+        return timed
+
+
+class MatchProfiler:
+    '''phase histograms + controller method stats for one match, see the module docstring'''
+
+    PHASES = ("start_turn", "play_turn.RED", "play_turn.BLUE", "record_turn", "render", "turn")
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {name: Histogram() for name in self.PHASES}
+        self.per_turn: Dict[str, array] = {name: array("q") for name in self.PHASES}
+        self.turns = array("q")
+        #team -> method -> [calls, total ns]
+        self.methods: Dict[Team, Dict[str, List[int]]] = {team: {} for team in Team}
+
+    # ----------------------------
+    # Recording
+    # ----------------------------
+
+    def record(self, phase: str, ns: int) -> None:
+        us = ns // 1000
+        self.histograms[phase].record(us)
+        self.per_turn[phase].append(us)
+
+    def lap(self, phase: str, t0: int) -> int:
+        '''records the time since t0 (perf_counter_ns) under phase and returns now'''
+        now = time.perf_counter_ns()
+        self.record(phase, now - t0)
+        return now
+
+    def end_turn(self, turn: int, t0: int) -> None:
+        self.turns.append(turn)
+        self.lap("turn", t0)
+
+    def instrument(self, team: Team, controller: Any) -> "TimedController":
+        '''the object to hand the team's bot instead of controller; the engine keeps using controller'''
+        return TimedController(controller, self.methods[team])
+
+    # ----------------------------
+    # Output
+    # ----------------------------
+
+    def summary(self, slowest: int = 10) -> Dict[str, Any]:
+        '''json friendly match summary, times in microseconds'''
+        phases = {name: h.to_dict() for name, h in self.histograms.items() if h.count}
+
+        controller: Dict[str, Any] = {}
+        for team, stats in self.methods.items():
+            used = {name: s for name, s in stats.items() if s[0]}
+            controller[team.name] = {
+                "total_us": sum(s[1] for s in used.values()) // 1000,
+                "methods": {
+                    name: {"calls": s[0], "total_us": s[1] // 1000, "mean_us": round(s[1] / s[0] / 1000, 2)}
+                    for name, s in sorted(used.items(), key=lambda kv: -kv[1][1])
+                },
+            }
+
+        turn_times = self.per_turn["turn"]
+        order = sorted(range(len(turn_times)), key=lambda i: -turn_times[i])[:slowest]
+        slow = [
+            {"turn": self.turns[i], **{name: self.per_turn[name][i] for name in self.PHASES if len(self.per_turn[name]) == len(turn_times)}}
+            for i in order
+        ]
+
+        return {
+            "unit": "us",
+            "turns": len(self.turns),
+            "phases": phases,
+            "controller": controller,
+            "slowest_turns": slow,
+            "per_turn": {name: list(v) for name, v in self.per_turn.items() if v},
+        }
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def print_summary(self) -> None:
+        print(f"[PROFILE] {'phase':<16}{'count':>7}{'total ms':>11}{'mean us':>10}{'p50':>8}{'p99':>8}{'p99.9':>8}{'max':>8}")
+        for name, h in self.histograms.items():
+            if not h.count:
+                continue
+            print(
+                f"[PROFILE] {name:<16}{h.count:>7}{h.total / 1000:>11.1f}{h.total / h.count:>10.1f}"
+                f"{h.percentile(50):>8}{h.percentile(99):>8}{h.percentile(99.9):>8}{h.max:>8}"
+            )
+        for team, stats in self.methods.items():
+            used = sorted(((s[1], s[0], name) for name, s in stats.items() if s[0]), reverse=True)
+            if used:
+                top = ", ".join(f"{name} {calls}x {ns / 1e6:.1f}ms" for ns, calls, name in used[:5])
+                print(f"[PROFILE] {team.name} controller: {top}")
@@ -0,0 +1,310 @@
+# pathfinding.py
+"""
+Grid pathfinding used by the RobotController path API and the map distance tables.
+
+Movement is 8-connected: one step of Chebyshev distance 1 per turn, like RobotController.move.
+Grids are flat lists/bytes indexed x * height + y, the same layout as Map.get_walkable_grid.
+
+DistanceTables are built once per layout by map_processor (bot occupancy is ignored there) and
+shared read-only by both team maps, the engine, and the map copies handed to bots.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from game_constants import TileType
+
+#same neighbour order as the bundled bots' BFS (dx in [0, -1, 1], dy in [0, -1, 1]) so ties resolve the same way
+STEPS: Tuple[Tuple[int, int], ...] = tuple(
+    (dx, dy) for dx in (0, -1, 1) for dy in (0, -1, 1) if (dx, dy) != (0, 0)
+)
+
+UNREACHABLE = -1
+
+#tiles bots walk up to and use
+STATION_TILE_TYPES: Tuple[TileType, ...] = tuple(t for t in TileType if t.is_placeable or t.is_interactable)
+
+#layouts with at most this many walkable cells keep every cell to cell row once it was asked for
+ALL_PAIRS_MAX_CELLS = 1024
+
+
+class DistanceField:
+    '''
+    BFS result from one start cell
+
+    dist[i]:  steps to reach cell i, UNREACHABLE if it can't be reached
+    first[i]: index into STEPS of the first move on a shortest path to cell i (-1 for the start)
+    rank[i]:  order in which the BFS reached cell i, used to break ties between equally far goals
+    '''
+
+    def __init__(self, width: int, height: int, start: Tuple[int, int], dist: List[int], first: List[int], rank: List[int]):
+        self.width = width
+        self.height = height
+        self.start = start
+        self.dist = dist
+        self.first = first
+        self.rank = rank
+
+    def distance(self, x: int, y: int) -> Optional[int]:
+        '''steps to stand on (x, y), None if out of bounds or unreachable'''
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        d = self.dist[x * self.height + y]
+        return None if d == UNREACHABLE else d
+
+    def __goals(self, x: int, y: int, adjacent: bool) -> Iterable[int]:
+        if not adjacent:
+            if 0 <= x < self.width and 0 <= y < self.height:
+                yield x * self.height + y
+            return
+        for gx in range(max(x - 1, 0), min(x + 2, self.width)):
+            for gy in range(max(y - 1, 0), min(y + 2, self.height)):
+                yield gx * self.height + gy
+
+    def nearest_goal(self, x: int, y: int, adjacent: bool = True) -> Optional[int]:
+        '''
+        flat index of the closest cell to stand on for target (x, y), None if unreachable
+
+        adjacent=True: any cell within Chebyshev distance 1 of the target (where actions can reach it),
+        adjacent=False: the target cell itself
+        '''
+        best = None
+        for i in self.__goals(x, y, adjacent):
+            if self.dist[i] == UNREACHABLE:
+                continue
+            if best is None or (self.dist[i], self.rank[i]) < (self.dist[best], self.rank[best]):
+                best = i
+        return best
+
+    def distance_to(self, x: int, y: int, adjacent: bool = True) -> Optional[int]:
+        '''steps until the target is reached (see nearest_goal), None if unreachable'''
+        goal = self.nearest_goal(x, y, adjacent)
+        return None if goal is None else self.dist[goal]
+
+    def next_step(self, x: int, y: int, adjacent: bool = True) -> Optional[Tuple[int, int]]:
+        '''(dx, dy) to take now towards the target, (0, 0) if already there, None if unreachable'''
+        goal = self.nearest_goal(x, y, adjacent)
+        if goal is None:
+            return None
+        k = self.first[goal]
+        return (0, 0) if k < 0 else STEPS[k]
+
+
+def bfs(walkable: bytes, width: int, height: int, start: Tuple[int, int], blocked: Optional[Set[int]] = None) -> DistanceField:
+    '''
+    breadth first search from start over walkable cells, skipping the flat indices in blocked
+
+    the start cell is always expanded even if it is not walkable or is blocked
+    '''
+    n = width * height
+    dist = [UNREACHABLE] * n
+    first = [-1] * n
+    rank = [0] * n
+    blocked = blocked or set()
+
+    sx, sy = start
+    if not (0 <= sx < width and 0 <= sy < height):
+        return DistanceField(width, height, start, dist, first, rank)
+
+    s = sx * height + sy
+    dist[s] = 0
+    order = [s]
+    head = 0
+    while head < len(order):
+        i = order[head]
+        head += 1
+        x, y = divmod(i, height)
+        d = dist[i] + 1
+        for k, (dx, dy) in enumerate(STEPS):
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            j = nx * height + ny
+            if dist[j] != UNREACHABLE or not walkable[j] or j in blocked:
+                continue
+            dist[j] = d
+            first[j] = k if i == s else first[i]
+            rank[j] = len(order)
+            order.append(j)
+
+    return DistanceField(width, height, start, dist, first, rank)
+
+
+def station_distances(field: DistanceField, stations: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], int]:
+    '''steps until each station is within reach, unreachable stations are left out'''
+    res: Dict[Tuple[int, int], int] = {}
+    for (x, y) in stations:
+        d = field.distance_to(x, y, adjacent=True)
+        if d is not None:
+            res[(x, y)] = d
+    return res
+
+
+def bfs_distances(walkable: bytes, width: int, height: int, sources: Iterable[int]) -> List[int]:
+    '''multi source BFS over walkable cells, sources are flat indices at distance 0'''
+    dist = [UNREACHABLE] * (width * height)
+    order = []
+    for s in sources:
+        if dist[s] == UNREACHABLE:
+            dist[s] = 0
+            order.append(s)
+
+    head = 0
+    while head < len(order):
+        i = order[head]
+        head += 1
+        x, y = divmod(i, height)
+        d = dist[i] + 1
+        for dx, dy in STEPS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            j = nx * height + ny
+            if dist[j] == UNREACHABLE and walkable[j]:
+                dist[j] = d
+                order.append(j)
+    return dist
+
+
+class DistanceTables:
+    '''
+    static walking distances for one map layout, ignoring bots
+
+    cell_index[x * height + y]:   compact index of a walkable cell, -1 otherwise
+    station_dist[s * cells + c]:  moves from walkable cell c until station s is within reach
+
+    UNREACHABLE (-1) means no path. One object is shared by both team maps, the engine and every
+    map copy, so it is immutable: the tables are tuples / bytes behind read-only properties.
+
+    station_dist is built up front; cell to cell distances are one BFS per start cell on demand,
+    kept (as the rows of an all pairs table) when the layout has at most all_pairs_max_cells cells.
+    '''
+
+    def __init__(self, width: int, height: int, cell_index: Iterable[int], cells: Iterable[Tuple[int, int]], stations: Iterable[Tuple[int, int]], station_dist: Iterable[int], walkable: bytes, all_pairs_max_cells: int = ALL_PAIRS_MAX_CELLS):
+        self.__width = width
+        self.__height = height
+        self.__cell_index = tuple(cell_index)
+        self.__cells = tuple(cells)
+        self.__stations = tuple(stations)
+        self.__station_index: Dict[Tuple[int, int], int] = {pos: s for s, pos in enumerate(self.__stations)}
+        self.__station_dist = tuple(station_dist)
+        self.__walkable = bytes(walkable)
+        self.__all_pairs_max_cells = all_pairs_max_cells
+        self.__rows: Dict[int, Tuple[int, ...]] = {} #start cell -> distances to every cell, filled on first use
+
+    #immutable and shared, so copying (ie get_map snapshots, map_copy for bots) keeps the same tables
+    def __copy__(self) -> "DistanceTables":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "DistanceTables":
+        return self
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @property
+    def height(self) -> int:
+        return self.__height
+
+    @property
+    def cell_index(self) -> Tuple[int, ...]:
+        return self.__cell_index
+
+    @property
+    def cells(self) -> Tuple[Tuple[int, int], ...]:
+        return self.__cells
+
+    @property
+    def stations(self) -> Tuple[Tuple[int, int], ...]:
+        return self.__stations
+
+    @property
+    def station_dist(self) -> Tuple[int, ...]:
+        return self.__station_dist
+
+    @property
+    def walkable(self) -> bytes:
+        return self.__walkable
+
+    @property
+    def all_pairs_max_cells(self) -> int:
+        return self.__all_pairs_max_cells
+
+    @property
+    def has_all_pairs(self) -> bool:
+        '''True if cell to cell rows are kept once computed'''
+        return len(self.__cells) <= self.__all_pairs_max_cells
+
+    def __cell(self, x: int, y: int) -> int:
+        if not (0 <= x < self.__width and 0 <= y < self.__height):
+            return UNREACHABLE
+        return self.__cell_index[x * self.__height + y]
+
+    def station_distance(self, x: int, y: int, station_x: int, station_y: int) -> Optional[int]:
+        '''moves from walkable (x, y) until the station at (station_x, station_y) is within reach'''
+        c = self.__cell(x, y)
+        s = self.__station_index.get((station_x, station_y))
+        if c == UNREACHABLE or s is None:
+            return None
+        d = self.__station_dist[s * len(self.__cells) + c]
+        return None if d == UNREACHABLE else d
+
+    def distances_from(self, x: int, y: int) -> Optional[List[int]]:
+        '''moves from walkable (x, y) to every walkable cell, by compact index; None if (x, y) is not walkable'''
+        c = self.__cell(x, y)
+        if c == UNREACHABLE:
+            return None
+        return list(self.__row(c))
+
+    def __row(self, c: int) -> Tuple[int, ...]:
+        row = self.__rows.get(c)
+        if row is not None:
+            return row
+        cx, cy = self.__cells[c]
+        h = self.__height
+        dist = bfs_distances(self.__walkable, self.__width, h, [cx * h + cy])
+        row = tuple(dist[x * h + y] for (x, y) in self.__cells)
+        if self.has_all_pairs:
+            self.__rows[c] = row
+        return row
+
+    def distance(self, x0: int, y0: int, x1: int, y1: int) -> Optional[int]:
+        '''moves from walkable (x0, y0) to walkable (x1, y1), None if there is no path'''
+        a, b = self.__cell(x0, y0), self.__cell(x1, y1)
+        if a == UNREACHABLE or b == UNREACHABLE:
+            return None
+        d = self.__row(a)[b]
+        return None if d == UNREACHABLE else d
+
+
+def build_distance_tables(m: Any, all_pairs_max_cells: int = ALL_PAIRS_MAX_CELLS) -> DistanceTables:
+    '''precomputes the static distance tables of a map layout'''
+    width, height = m.width, m.height
+    walkable = m.get_walkable_grid()
+
+    cell_index = array("i", [UNREACHABLE]) * (width * height)
+    cells: List[Tuple[int, int]] = []
+    for i, w in enumerate(walkable):
+        if w:
+            cell_index[i] = len(cells)
+            cells.append(divmod(i, height))
+
+    def compact(dist: List[int]) -> array:
+        return array("h", [dist[cx * height + cy] for (cx, cy) in cells])
+
+    #station -> every cell: BFS out of the walkable cells next to the station
+    stations = sorted(pos for t in STATION_TILE_TYPES for pos in m.get_tile_locations(t))
+    station_dist = array("h")
+    for (sx, sy) in stations:
+        sources = [
+            nx * height + ny
+            for nx in range(max(sx - 1, 0), min(sx + 2, width))
+            for ny in range(max(sy - 1, 0), min(sy + 2, height))
+            if walkable[nx * height + ny]
+        ]
+        station_dist.extend(compact(bfs_distances(walkable, width, height, sources)))
+
+    return DistanceTables(width, height, cell_index, cells, stations, station_dist, walkable, all_pairs_max_cells)
@@ -0,0 +1,171 @@
+# read_only.py
+"""
+Read-only views of maps, tiles and items, what RobotController.get_map / get_tile hand to bots.
+
+read_only(obj) turns a private copy of a Map, TileGrid, Tile or Item (and everything it holds) into
+a view in place: its class becomes a ReadOnly subclass of the original, so isinstance checks and
+every reading method keep working, while assigning or deleting an attribute raises ReadOnlyError.
+Lists and sets inside become tuples and frozensets (Plate.food, Shop.shop_items, Map.orders), and
+tiles[x][y] = tile, tiles[x][y] on a cell that was never stored, and peek all stay read-only too.
+
+    m = controller.get_map(team)
+    m.tiles[3][4].item = None          #ReadOnlyError
+    mine = copy.deepcopy(m)            #a normal, writable copy to simulate on
+
+Views pickle back into views (process bots get them over a pipe), copy.copy / copy.deepcopy give
+ordinary writable objects.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any, Callable, Dict, Tuple
+
+from item import Item, Plate, Pan, all_slots
+from map import Map
+from tile_grid import TileGrid
+from tiles import Tile, Shop
+
+
+class ReadOnlyError(AttributeError):
+    '''a bot tried to change a read-only snapshot'''
+    pass
+
+
+class ReadOnly:
+    '''marker base of the view classes made by read_only_class, which copy its methods in'''
+    __slots__ = ()
+
+    #attributes the class fills in lazily on reads (indexes, cached signatures), still writable
+    _caches: Tuple[str, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self._caches:
+            object.__setattr__(self, name, value)
+            return
+        raise ReadOnlyError(f"{_BASES[type(self)].__name__} is a read-only snapshot, copy.deepcopy it to change it")
+
+    def __delattr__(self, name: str) -> None:
+        raise ReadOnlyError(f"{_BASES[type(self)].__name__} is a read-only snapshot, copy.deepcopy it to change it")
+
+    def __copy__(self) -> Any:
+        #a shallow copy would still hold the read-only tiles/items, so copying always goes deep
+        return copy.deepcopy(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Any:
+        new = copy.deepcopy(_thawed(self), memo)
+        memo[id(self)] = new
+        return new
+
+    def __reduce__(self) -> Tuple[Callable[[Any], Any], Tuple[Any]]:
+        return read_only, (_thawed(self),)
+
+
+# ----------------------------
+# View classes
+# ----------------------------
+
+_VIEW_METHODS = ("__setattr__", "__delattr__", "__copy__", "__deepcopy__", "__reduce__")
+
+_VIEWS: Dict[type, type] = {} #class -> its view class
+_BASES: Dict[type, type] = {} #view class -> class
+
+_CACHES: Dict[type, Tuple[str, ...]] = {
+    Map: ("tile_locations", "tile_locations_src", "walkable_grid", "walkable_grid_src"),
+    Plate: ("_food_sigs", "_signature", "_sig_food"),
+}
+
+#shared views of the floor/wall stand-ins TileGrid.peek returns for cells with no tile object
+_PROTOTYPE_VIEWS: Dict[int, Tile] = {}
+
+
+def _tile_view(tile: Tile) -> Tile:
+    if isinstance(tile, ReadOnly):
+        return tile
+    view = _PROTOTYPE_VIEWS.get(tile.tile_id)
+    if view is None:
+        view = _PROTOTYPE_VIEWS[tile.tile_id] = read_only(copy.copy(tile))
+    return view
+
+
+def _grid_peek(self: TileGrid, x: int, y: int) -> Tile:
+    '''tile at (x, y), a view; never creates or dirties a cell'''
+    return _tile_view(TileGrid.peek(self, x, y))
+
+
+def _grid_set(self: TileGrid, x: int, y: int, tile: Tile) -> None:
+    raise ReadOnlyError("TileGrid is a read-only snapshot, copy.deepcopy it to change it")
+
+
+#methods a view class uses instead of the original's
+_OVERRIDES: Dict[type, Dict[str, Any]] = {
+    TileGrid: {"get": _grid_peek, "peek": _grid_peek, "set": _grid_set},
+}
+
+
+def read_only_class(cls: type) -> type:
+    '''the view class of cls, made on first use'''
+    view = _VIEWS.get(cls)
+    if view is None:
+        ns: Dict[str, Any] = {"__slots__": (), "__module__": __name__, "_caches": _CACHES.get(cls, ())}
+        #ReadOnly goes last so the instance layout stays the one of cls (needed to swap __class__),
+        #its methods are copied in to still win over cls's own __copy__ / __deepcopy__
+        ns.update({name: ReadOnly.__dict__[name] for name in _VIEW_METHODS})
+        ns.update(_OVERRIDES.get(cls, {}))
+        view = type(cls)(f"ReadOnly{cls.__name__}", (cls, ReadOnly), ns)
+        _VIEWS[cls] = view
+        _BASES[view] = cls
+    return view
+
+
+def _thawed(view: Any) -> Any:
+    '''shallow writable copy of a view, as an instance of the original class, with its lists and sets back'''
+    cls = _BASES[type(view)]
+    new = object.__new__(cls)
+    for name in all_slots(cls):
+        if hasattr(view, name):
+            object.__setattr__(new, name, getattr(view, name))
+    if hasattr(view, "__dict__"):
+        new.__dict__.update(view.__dict__)
+
+    #undo the container swaps of read_only
+    if isinstance(new, Map):
+        new.orders = list(new.orders)
+    elif isinstance(new, TileGrid):
+        new.ids = bytearray(new.ids)
+    elif isinstance(new, Shop):
+        new.shop_items = set(new.shop_items)
+    elif isinstance(new, Plate):
+        new.food = list(new.food)
+    return new
+
+
+# ----------------------------
+# Freezing
+# ----------------------------
+
+def read_only(obj: Any) -> Any:
+    '''turns obj (a private copy, nobody else may hold it) into a read-only view in place and returns it'''
+    if obj is None or isinstance(obj, ReadOnly):
+        return obj
+
+    if isinstance(obj, Map):
+        read_only(obj.tiles)
+        obj.orders = tuple(obj.orders)
+    elif isinstance(obj, TileGrid):
+        for _, tile in obj.stored_tiles():
+            read_only(tile)
+        obj.ids = bytes(obj.ids)
+    elif isinstance(obj, Tile):
+        read_only(obj.item)
+        if isinstance(obj, Shop):
+            obj.shop_items = frozenset(obj.shop_items)
+    elif isinstance(obj, Plate):
+        obj.food = tuple(read_only(f) for f in obj.food)
+    elif isinstance(obj, Pan):
+        read_only(obj.food)
+    elif not isinstance(obj, Item):
+        raise TypeError(f"no read-only view for {type(obj).__name__}")
+
+    object.__setattr__(obj, "__class__", read_only_class(type(obj)))
+    return obj
@@ -1,11 +1,22 @@
 # render.py
+"""
+Optional pygame renderer for game.py --render and the replay_reader viewer.
+
+Nothing in the engine imports this module at startup: Game and replay_reader import it only when
+rendering was asked for, so headless runs and bot workers never load pygame. Without pygame the
+module still imports and Renderer raises RenderException with install instructions.
+"""
+
 import os
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
 
 from dataclasses import dataclass
 from typing import Dict, Tuple, Optional, List
 
-import pygame
+try:
+    import pygame
+except ImportError: #optional, only rendering needs it
+    pygame = None
 
 from game_constants import Team
 from game_state import GameState, Order
@@ -13,6 +24,17 @@ from tiles import Floor, Wall, Counter, Box, Sink, SinkTable, Cooker, Trash, Sub
 from item import Food, Plate, Pan
 
 
+class RenderException(Exception):
+    pass
+
+
+def require_pygame():
+    '''the pygame module, RenderException if it is not installed'''
+    if pygame is None:
+        raise RenderException("rendering needs pygame (pip install -r requirements.txt), run without --render for a headless game")
+    return pygame
+
+
 # ----------------------------
 # Render config
 # ----------------------------
@@ -79,6 +101,7 @@ def _order_label(o: Order, turn: int) -> str:
 
 class Renderer:
     def __init__(self, game_state: GameState, cfg: RenderConfig = RenderConfig()):
+        require_pygame()
         self.gs = game_state
         self.cfg = cfg
 
@@ -96,6 +119,9 @@ class Renderer:
         self._font = None
         self._font_small = None
 
+        # optional callback for KEYDOWN events (pygame key code), used by the replay viewer
+        self.key_handler = None
+
     def init(self):
         pygame.init()
         pygame.display.set_caption("Competitive Cooking Game")
@@ -105,7 +131,7 @@ class Renderer:
         self.clock = pygame.time.Clock()
         self._inited = True
 
-    def _tile_rect(self, map_left: int, x: int, y: int) -> pygame.Rect:
+    def _tile_rect(self, map_left: int, x: int, y: int) -> "pygame.Rect":
         # y=0 is bottom in your Map, but pygame y=0 is top => invert
         ts = self.cfg.tile_size
         px = map_left + x * ts
@@ -123,7 +149,7 @@ class Renderer:
         # tiles
         for x in range(m.width):
             for y in range(m.height):
-                t = m.tiles[x][y]
+                t = m.tiles.peek(x, y)
                 rect = self._tile_rect(map_left, x, y)
                 col = TILE_COLORS.get(getattr(t, "tile_name", "FLOOR"), (220, 220, 220))
                 pygame.draw.rect(self.screen, col, rect)
@@ -150,7 +176,7 @@ class Renderer:
         #items (and box counts)
         for x in range(m.width):
             for y in range(m.height):
-                t = m.tiles[x][y]
+                t = m.tiles.peek(x, y)
 
                 if isinstance(t, Box) and getattr(t, "count", 0) > 0:
                     label = _item_label(getattr(t, "item", None))
@@ -245,6 +271,8 @@ class Renderer:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
+            if event.type == pygame.KEYDOWN and self.key_handler is not None:
+                self.key_handler(event.key)
 
         self.screen.fill((245, 245, 245))
 
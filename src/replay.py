@@ -0,0 +1,159 @@
+# replay.py
+"""
+Streaming delta replay format.
+
+A delta replay is a JSON lines file (gzip compressed when the path ends in .gz), one record per line:
+
+    {"type": "header", "version": 1, "switch_turn_start": ..., "switch_turn_end": ..., "keyframe_interval": k}
+    {"type": "keyframe", "turn": t, "state": <full GameState.to_dict()>}   first turn, then every k turns
+    {"type": "delta", "turn": t, ...only what changed since the previous turn...}
+    ...
+    {"type": "end", "winner": "RED" | "BLUE" | null, "turns": n, "warnings": {...}}   warnings: WarningLog.summary()
+
+Keyframes let replay_reader.py seek to any turn by replaying at most k - 1 deltas.
+
+A delta holds:
+    "team_money": {...}                       only if a team's money changed
+    "bots": [bot dict, ...]                   bots whose dict changed (matched by bot_id)
+    "orders": {"RED": [order dict, ...]}      orders that changed or are new (matched by order_id)
+    "tiles": {"red_map": [[x, y, tile dict], ...], "blue_map": [...]}
+
+Records are written as the match runs, so only the previous turn is kept in memory.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+from typing import Any, Dict, IO, List, Optional
+
+REPLAY_FORMAT_VERSION = 1
+
+DEFAULT_KEYFRAME_INTERVAL = 50
+
+MAP_KEYS = ("red_map", "blue_map")
+
+
+def open_replay_file(path: str, mode: str) -> IO[str]:
+    '''text mode open, gzip when the path ends with .gz'''
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, mode + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def diff_state(prev: Dict[str, Any], cur: Dict[str, Any]) -> Dict[str, Any]:
+    '''delta record that turns the GameState.to_dict() `prev` into `cur`'''
+    delta: Dict[str, Any] = {"type": "delta", "turn": cur["turn"]}
+
+    if cur["team_money"] != prev["team_money"]:
+        delta["team_money"] = cur["team_money"]
+
+    #GameState.to_dict reuses the dicts of unchanged parts, so `is` settles most comparisons
+    prev_bots = {b["bot_id"]: b for b in prev["bots"]}
+    bots = [b for b in cur["bots"] if prev_bots.get(b["bot_id"]) is not b and prev_bots.get(b["bot_id"]) != b]
+    if bots:
+        delta["bots"] = bots
+
+    orders: Dict[str, List[Dict[str, Any]]] = {}
+    for team, cur_orders in cur["orders"].items():
+        prev_orders = {o["order_id"]: o for o in prev["orders"].get(team, [])}
+        changed = [o for o in cur_orders if prev_orders.get(o["order_id"]) is not o and prev_orders.get(o["order_id"]) != o]
+        if changed:
+            orders[team] = changed
+    if orders:
+        delta["orders"] = orders
+
+    tiles: Dict[str, List[Any]] = {}
+    for key in MAP_KEYS:
+        changed_tiles = []
+        if prev[key] is cur[key]:
+            continue
+        for x, (prev_col, cur_col) in enumerate(zip(prev[key], cur[key])):
+            if prev_col is cur_col:
+                continue
+            for y, (prev_tile, cur_tile) in enumerate(zip(prev_col, cur_col)):
+                if prev_tile is not cur_tile and prev_tile != cur_tile:
+                    changed_tiles.append([x, y, cur_tile])
+        if changed_tiles:
+            tiles[key] = changed_tiles
+    if tiles:
+        delta["tiles"] = tiles
+
+    return delta
+
+
+def apply_delta(state: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    '''applies a delta record to a full state dict in place and returns it'''
+    state["turn"] = delta["turn"]
+
+    if "team_money" in delta:
+        state["team_money"] = dict(delta["team_money"])
+
+    if "bots" in delta:
+        index = {b["bot_id"]: i for i, b in enumerate(state["bots"])}
+        for b in delta["bots"]:
+            if b["bot_id"] in index:
+                state["bots"][index[b["bot_id"]]] = b
+            else:
+                state["bots"].append(b)
+
+    for team, changed in delta.get("orders", {}).items():
+        team_orders = state["orders"].setdefault(team, [])
+        index = {o["order_id"]: i for i, o in enumerate(team_orders)}
+        for o in changed:
+            if o["order_id"] in index:
+                team_orders[index[o["order_id"]]] = o
+            else:
+                team_orders.append(o)
+
+    for key, changed_tiles in delta.get("tiles", {}).items():
+        grid = state[key]
+        for x, y, tile in changed_tiles:
+            grid[x][y] = tile
+
+    return state
+
+
+class ReplayWriter:
+    '''writes a delta replay while the match runs'''
+
+    def __init__(self, path: str, switch_turn_start: int, switch_turn_end: int, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.turns = 0
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.__prev: Optional[Dict[str, Any]] = None
+        self.__f: Optional[IO[str]] = open_replay_file(path, "w")
+        self.__write({
+            "type": "header",
+            "version": REPLAY_FORMAT_VERSION,
+            "switch_turn_start": switch_turn_start,
+            "switch_turn_end": switch_turn_end,
+            "keyframe_interval": self.keyframe_interval,
+        })
+
+    def __write(self, record: Dict[str, Any]) -> None:
+        self.__f.write(json.dumps(record, separators=(",", ":")))
+        self.__f.write("\n")
+
+    def write_turn(self, state: Dict[str, Any]) -> None:
+        '''state is GameState.to_dict() for the turn that just finished'''
+        if self.__prev is None or self.turns % self.keyframe_interval == 0:
+            self.__write({"type": "keyframe", "turn": state["turn"], "state": state})
+        else:
+            self.__write(diff_state(self.__prev, state))
+        self.__prev = state
+        self.turns += 1
+
+    def close(self, winner: Optional[str] = None, warnings: Optional[Dict[str, Any]] = None) -> None:
+        '''writes the end record (once) and closes the file'''
+        if self.__f is None:
+            return
+        record: Dict[str, Any] = {"type": "end", "winner": winner, "turns": self.turns}
+        if warnings:
+            record["warnings"] = warnings
+        self.__write(record)
+        self.__f.close()
+        self.__f = None
@@ -0,0 +1,429 @@
+# replay_binary.py
+"""
+Compact binary replay format (python src/game.py ... --replay replay.bin).
+
+Holds exactly what a json replay holds (the export_replay payload: winner, switch window, one
+GameState.to_dict() per turn), with a fixed schema instead of json keys:
+
+    b"AWRB" + version (u8) + zlib(body)
+
+    body:   string tables   tile names, food names (+ food_id), team names, other item types
+            header          winner, switch_turn_start/end, turns, extra metadata (json, ie warnings)
+            turns           one fixed layout state per turn
+
+    state:  turn, money per team, bots, orders per team, then per map width, height, a byte per
+            cell (tile name index * 2 + is_walkable) and the station fields of every cell whose
+            tile has any (counter item, box item + count, sink plates/progress/using, ...)
+
+Names are interned into the tables, every number is a fixed width struct field and None is a
+sentinel, so decoding gives back dicts equal to the json ones. Only struct/array/zlib are used.
+
+    python src/replay_binary.py to-json replay.bin replay.json
+    python src/replay_binary.py from-json replay.json replay.bin     (json or delta replays)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"AWRB"
+BINARY_FORMAT_VERSION = 1
+
+MAP_KEYS = ("red_map", "blue_map")
+
+NONE_I32 = -(1 << 31) #stands in for None in optional int fields
+
+#item codes
+ITEM_NONE, ITEM_FOOD, ITEM_PLATE, ITEM_PAN, ITEM_OTHER = range(5)
+
+#station fields after tile_name / is_walkable, in to_dict order: (key, kind)
+TILE_FIELDS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "COUNTER": (("item", "item"),),
+    "BOX": (("item", "item"), ("count", "i32")),
+    "SINK": (("num_dirty_plates", "i32"), ("curr_dirty_plate_progress", "i32"), ("using", "bool")),
+    "SINKTABLE": (("num_clean_plates", "i32"),),
+    "COOKER": (("item", "item"), ("cook_progress", "i32")),
+}
+
+_I32 = struct.Struct("<i")
+_I64 = struct.Struct("<q")
+_U16 = struct.Struct("<H")
+_BOT = struct.Struct("<iBhhB") #bot_id, team, x, y, map_team
+_ORDER = struct.Struct("<iiiiiii") #order_id, created, expires, reward, penalty, claimed_by, completed
+
+
+class ReplayBinaryException(Exception):
+    pass
+
+
+def is_binary_replay(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _Interner:
+    '''string table, index by first use'''
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.names: List[str] = list(names or [])
+        self.index: Dict[str, int] = {n: i for i, n in enumerate(self.names)}
+
+    def __call__(self, name: str) -> int:
+        i = self.index.get(name)
+        if i is None:
+            i = self.index[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+
+def _opt(v: Optional[int]) -> int:
+    return NONE_I32 if v is None else v
+
+
+def _unopt(v: int) -> Optional[int]:
+    return None if v == NONE_I32 else v
+
+
+# ----------------------------
+# Encoding
+# ----------------------------
+
+class _Encoder:
+    def __init__(self):
+        self.out = bytearray()
+        self.tiles = _Interner()
+        self.foods = _Interner()
+        self.food_ids: Dict[int, int] = {} #food name index -> food_id
+        self.teams = _Interner(["RED", "BLUE"])
+        self.others = _Interner()
+
+    def u8(self, v: int) -> None:
+        self.out.append(v)
+
+    def i32(self, v: int) -> None:
+        self.out += _I32.pack(v)
+
+    def string(self, s: str) -> None:
+        b = s.encode("utf-8")
+        self.out += _U16.pack(len(b))
+        self.out += b
+
+    def food(self, d: Dict[str, Any]) -> None:
+        i = self.foods(d["food_name"])
+        self.food_ids.setdefault(i, d["food_id"])
+        self.out += bytes((i, 1 if d["chopped"] else 0, d["cooked_stage"]))
+
+    def item(self, d: Optional[Dict[str, Any]]) -> None:
+        if d is None:
+            self.u8(ITEM_NONE)
+            return
+        kind = d["type"]
+        if kind == "Food":
+            self.u8(ITEM_FOOD)
+            self.food(d)
+        elif kind == "Plate":
+            self.u8(ITEM_PLATE)
+            self.u8(1 if d["dirty"] else 0)
+            self.out += _U16.pack(len(d["food"]))
+            for f in d["food"]:
+                self.item(f)
+        elif kind == "Pan":
+            self.u8(ITEM_PAN)
+            self.item(d["food"])
+        else:
+            self.u8(ITEM_OTHER)
+            self.u8(self.others(kind))
+
+    def state(self, s: Dict[str, Any]) -> None:
+        self.i32(s["turn"])
+        money = s["team_money"]
+        self.u8(len(money))
+        for team, v in money.items():
+            self.u8(self.teams(team))
+            self.out += _I64.pack(v)
+
+        self.out += _U16.pack(len(s["bots"]))
+        for b in s["bots"]:
+            self.out += _BOT.pack(b["bot_id"], self.teams(b["team"]), b["x"], b["y"], self.teams(b["map_team"]))
+            self.item(b["holding"])
+
+        self.u8(len(s["orders"]))
+        for team, orders in s["orders"].items():
+            self.u8(self.teams(team))
+            self.out += _U16.pack(len(orders))
+            for o in orders:
+                self.out += _ORDER.pack(
+                    o["order_id"], o["created_turn"], o["expires_turn"], o["reward"], o["penalty"],
+                    _opt(o["claimed_by"]), _opt(o["completed_turn"]),
+                )
+                self.u8(len(o["required"]))
+                self.out += bytes(self.foods(name) for name in o["required"])
+
+        for key in MAP_KEYS:
+            self.grid(s[key])
+
+    def grid(self, columns: List[List[Dict[str, Any]]]) -> None:
+        width = len(columns)
+        height = len(columns[0]) if width else 0
+        self.out += _U16.pack(width) + _U16.pack(height)
+
+        codes = array("B")
+        stations = []
+        for col in columns:
+            for t in col:
+                name = t["tile_name"]
+                i = self.tiles(name)
+                if i >= 128:
+                    raise ReplayBinaryException("more than 128 tile names")
+                codes.append(i * 2 + (1 if t["is_walkable"] else 0))
+                fields = TILE_FIELDS.get(name, ())
+                if len(t) != 2 + len(fields):
+                    raise ReplayBinaryException(f"{name} tile does not match the binary schema: {sorted(t)}")
+                if fields:
+                    stations.append((t, fields))
+        self.out += codes.tobytes()
+
+        #station fields, in cell order
+        for t, fields in stations:
+            for key, kind in fields:
+                v = t[key]
+                if kind == "item":
+                    self.item(v)
+                elif kind == "i32":
+                    self.i32(v)
+                else:
+                    self.u8(1 if v else 0)
+
+
+def encode_replay(payload: Dict[str, Any]) -> bytes:
+    '''bytes of a binary replay for an export_replay style payload ({"winner", ..., "replay": [state, ...]})'''
+    states = payload.get("replay", [])
+    body = _Encoder()
+    for s in states:
+        body.state(s)
+
+    winner = payload.get("winner")
+    winner_index = -1 if winner is None else body.teams(winner)
+
+    head = _Encoder()
+    for table in (body.tiles, body.teams, body.others):
+        head.out += _U16.pack(len(table.names))
+        for name in table.names:
+            head.string(name)
+    head.out += _U16.pack(len(body.foods.names))
+    for i, name in enumerate(body.foods.names):
+        head.string(name)
+        head.i32(_opt(body.food_ids.get(i)))
+
+    head.i32(winner_index)
+    head.i32(_opt(payload.get("switch_turn_start")))
+    head.i32(_opt(payload.get("switch_turn_end")))
+    head.i32(len(states))
+    extra = {k: v for k, v in payload.items() if k not in ("winner", "turns", "switch_turn_start", "switch_turn_end", "replay")}
+    head.string(json.dumps(extra, separators=(",", ":")) if extra else "")
+
+    return MAGIC + bytes((BINARY_FORMAT_VERSION,)) + zlib.compress(bytes(head.out + body.out), 6)
+
+
+def write_binary_replay(path: str, payload: Dict[str, Any]) -> None:
+    with open(path, "wb") as f:
+        f.write(encode_replay(payload))
+
+
+# ----------------------------
+# Decoding
+# ----------------------------
+
+class _Decoder:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+        self.tiles: List[str] = []
+        self.teams: List[str] = []
+        self.others: List[str] = []
+        self.foods: List[str] = []
+        self.food_ids: List[Optional[int]] = []
+
+    def u8(self) -> int:
+        v = self.data[self.pos]
+        self.pos += 1
+        return v
+
+    def u16(self) -> int:
+        v = _U16.unpack_from(self.data, self.pos)[0]
+        self.pos += 2
+        return v
+
+    def i32(self) -> int:
+        v = _I32.unpack_from(self.data, self.pos)[0]
+        self.pos += 4
+        return v
+
+    def string(self) -> str:
+        n = self.u16()
+        s = self.data[self.pos:self.pos + n].decode("utf-8")
+        self.pos += n
+        return s
+
+    def strings(self) -> List[str]:
+        return [self.string() for _ in range(self.u16())]
+
+    def item(self) -> Optional[Dict[str, Any]]:
+        kind = self.u8()
+        if kind == ITEM_NONE:
+            return None
+        if kind == ITEM_FOOD:
+            i, chopped, stage = self.data[self.pos:self.pos + 3]
+            self.pos += 3
+            return {"type": "Food", "food_name": self.foods[i], "food_id": self.food_ids[i], "chopped": chopped == 1, "cooked_stage": stage}
+        if kind == ITEM_PLATE:
+            dirty = self.u8() == 1
+            return {"type": "Plate", "dirty": dirty, "food": [self.item() for _ in range(self.u16())]}
+        if kind == ITEM_PAN:
+            return {"type": "Pan", "food": self.item()}
+        if kind == ITEM_OTHER:
+            return {"type": self.others[self.u8()]}
+        raise ReplayBinaryException(f"bad item code {kind} at byte {self.pos - 1}")
+
+    def state(self) -> Dict[str, Any]:
+        turn = self.i32()
+        money = {}
+        for _ in range(self.u8()):
+            team = self.teams[self.u8()]
+            money[team] = _I64.unpack_from(self.data, self.pos)[0]
+            self.pos += 8
+
+        bots = []
+        for _ in range(self.u16()):
+            bot_id, team, x, y, map_team = _BOT.unpack_from(self.data, self.pos)
+            self.pos += _BOT.size
+            bots.append({"bot_id": bot_id, "team": self.teams[team], "x": x, "y": y, "holding": self.item(), "map_team": self.teams[map_team]})
+
+        orders: Dict[str, List[Dict[str, Any]]] = {}
+        for _ in range(self.u8()):
+            team_orders = orders[self.teams[self.u8()]] = []
+            for _ in range(self.u16()):
+                order_id, created, expires, reward, penalty, claimed_by, completed = _ORDER.unpack_from(self.data, self.pos)
+                self.pos += _ORDER.size
+                n = self.u8()
+                required = [self.foods[i] for i in self.data[self.pos:self.pos + n]]
+                self.pos += n
+                team_orders.append({
+                    "order_id": order_id,
+                    "required": required,
+                    "created_turn": created,
+                    "expires_turn": expires,
+                    "reward": reward,
+                    "penalty": penalty,
+                    "claimed_by": _unopt(claimed_by),
+                    "completed_turn": _unopt(completed),
+                })
+
+        state = {"turn": turn, "team_money": money, "bots": bots, "orders": orders}
+        for key in MAP_KEYS:
+            state[key] = self.grid()
+        return state
+
+    def grid(self) -> List[List[Dict[str, Any]]]:
+        width, height = self.u16(), self.u16()
+        codes = self.data[self.pos:self.pos + width * height]
+        self.pos += width * height
+
+        columns = []
+        for x in range(width):
+            col = []
+            for code in codes[x * height:(x + 1) * height]:
+                col.append({"tile_name": self.tiles[code >> 1], "is_walkable": code & 1 == 1})
+            columns.append(col)
+
+        for x in range(width):
+            for t in columns[x]:
+                for key, kind in TILE_FIELDS.get(t["tile_name"], ()):
+                    if kind == "item":
+                        t[key] = self.item()
+                    elif kind == "i32":
+                        t[key] = self.i32()
+                    else:
+                        t[key] = self.u8() == 1
+        return columns
+
+
+def decode_replay(data: bytes) -> Dict[str, Any]:
+    '''export_replay style payload back from binary replay bytes'''
+    if data[:len(MAGIC)] != MAGIC:
+        raise ReplayBinaryException("not a binary replay")
+    version = data[len(MAGIC)]
+    if version != BINARY_FORMAT_VERSION:
+        raise ReplayBinaryException(f"unsupported binary replay version {version}")
+
+    d = _Decoder(zlib.decompress(data[len(MAGIC) + 1:]))
+    d.tiles = d.strings()
+    d.teams = d.strings()
+    d.others = d.strings()
+    for _ in range(d.u16()):
+        d.foods.append(d.string())
+        d.food_ids.append(_unopt(d.i32()))
+
+    winner = d.i32()
+    switch_start = _unopt(d.i32())
+    switch_end = _unopt(d.i32())
+    turns = d.i32()
+    extra = d.string()
+
+    payload: Dict[str, Any] = {
+        "winner": None if winner < 0 else d.teams[winner],
+        "turns": turns,
+        "switch_turn_start": switch_start,
+        "switch_turn_end": switch_end,
+    }
+    if extra:
+        payload.update(json.loads(extra))
+    payload["replay"] = [d.state() for _ in range(turns)]
+    return payload
+
+
+def read_binary_replay(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return decode_replay(f.read())
+
+
+# ----------------------------
+# Converter
+# ----------------------------
+
+def main():
+    '''parse and convert'''
+    ap = argparse.ArgumentParser(description="convert replays between json and the binary format")
+    ap.add_argument("direction", choices=["to-json", "from-json"], help="to-json: binary -> json, from-json: json or delta replay -> binary")
+    ap.add_argument("src", help="input replay path")
+    ap.add_argument("dst", help="output replay path")
+    args = ap.parse_args()
+
+    if args.direction == "to-json":
+        payload = read_binary_replay(args.src)
+        with open(args.dst, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+    else:
+        from replay_reader import ReplayReader
+
+        reader = ReplayReader(args.src)
+        payload = {
+            "winner": reader.winner,
+            "turns": len(reader),
+            "switch_turn_start": reader.header.get("switch_turn_start"),
+            "switch_turn_end": reader.header.get("switch_turn_end"),
+        }
+        if reader.warnings:
+            payload["warnings"] = reader.warnings
+        payload["replay"] = [reader.state_at(t) for t in reader.turns]
+        write_binary_replay(args.dst, payload)
+    print(f"[REPLAY] wrote {args.dst}")
+
+
+if __name__ == "__main__":
+    main()
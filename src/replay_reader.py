@@ -0,0 +1,368 @@
+# replay_reader.py
+"""
+python src/replay_reader.py replay_path.jsonl.gz --turn 400
+
+Loads replay files back and rebuilds the GameState at any turn.
+
+Works on every replay format written by game.py:
+- delta replays (.jsonl / .jsonl.gz, see replay.py): seeking starts from the nearest keyframe
+  at or before the turn, so turn 400 never replays turns 1-399
+- full json replays (--replay-format json): every turn is already a full state
+- binary replays (--replay-format binary, see replay_binary.py): decoded to the json payload
+
+With pygame installed the CLI opens the renderer on the replay and lets you scrub through it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from game_constants import Team, TileType, FoodType
+from map import Map
+from item import Item, Food, Plate, Pan
+from game_state import GameState, BotState, Order, tile_factory
+from replay import open_replay_file, apply_delta
+from replay_binary import is_binary_replay, read_binary_replay
+
+
+class ReplayException(Exception):
+    pass
+
+
+# ----------------------------
+# dict -> engine objects
+# ----------------------------
+
+def item_from_dict(d: Optional[Dict[str, Any]]) -> Optional[Item]:
+    '''inverse of the item serialization in GameState.to_dict'''
+    if d is None:
+        return None
+    kind = d.get("type")
+    if kind == "Food" or (kind is None and "food_name" in d):
+        food = Food(FoodType[d["food_name"]])
+        food.chopped = d.get("chopped", False)
+        food.cooked_stage = d.get("cooked_stage", 0)
+        return food
+    if kind == "Plate":
+        return Plate(food=[item_from_dict(f) for f in d.get("food", [])], dirty=d.get("dirty", False))
+    if kind == "Pan":
+        return Pan(item_from_dict(d.get("food")))
+    return None
+
+
+#tile dict keys that carry state, everything else is fixed by the tile type
+TILE_STATE_KEYS = ("count", "num_dirty_plates", "curr_dirty_plate_progress", "using", "num_clean_plates", "cook_progress")
+
+
+def map_from_2d_list(grid: List[List[Dict[str, Any]]], team: Team) -> Map:
+    '''inverse of Map.to_2d_list'''
+    width = len(grid)
+    height = len(grid[0]) if width else 0
+    tiles = []
+    for col in grid:
+        tile_col = []
+        for d in col:
+            tile = tile_factory(TileType[d["tile_name"]])
+            if "item" in d:
+                tile.item = item_from_dict(d["item"])
+            for key in TILE_STATE_KEYS:
+                if key in d:
+                    setattr(tile, key, d[key])
+            tile_col.append(tile)
+        tiles.append(tile_col)
+    return Map(width=width, height=height, tiles=tiles, team=team, orders=[])
+
+
+def game_state_from_dict(state: Dict[str, Any], switch_turn: Optional[int] = None, switch_duration: Optional[int] = None) -> GameState:
+    '''builds a GameState from a GameState.to_dict() snapshot (for rendering and analysis, not for resuming bots)'''
+    gs = GameState(
+        red_map=map_from_2d_list(state["red_map"], Team.RED),
+        blue_map=map_from_2d_list(state["blue_map"], Team.BLUE),
+    )
+    gs.turn = state["turn"]
+    gs.team_money = {Team[k]: v for k, v in state["team_money"].items()}
+
+    if switch_turn is not None:
+        gs.switch_turn = switch_turn
+    if switch_duration is not None:
+        gs.switch_duration = switch_duration
+
+    for team_name, orders in state["orders"].items():
+        team_orders = []
+        for o in orders:
+            order = Order(
+                order_id=o["order_id"],
+                required=[FoodType[n] for n in o["required"]],
+                created_turn=o["created_turn"],
+                expires_turn=o["expires_turn"],
+                reward=o["reward"],
+                penalty=o["penalty"],
+                claimed_by=o["claimed_by"],
+                completed_turn=o["completed_turn"],
+            )
+            order.penalized = order.completed_turn is None and order.is_expired(gs.turn)
+            team_orders.append(order)
+        gs.orders[Team[team_name]] = team_orders
+        gs.next_order_id = max([gs.next_order_id] + [o.order_id + 1 for o in team_orders])
+
+    for b in state["bots"]:
+        bot = BotState(
+            bot_id=b["bot_id"],
+            team=Team[b["team"]],
+            x=b["x"],
+            y=b["y"],
+            holding=item_from_dict(b["holding"]),
+            map_team=Team[b["map_team"]],
+        )
+        gs.bots[bot.bot_id] = bot
+        gs.occupancy[bot.map_team][bot.x][bot.y] = bot.bot_id
+        if bot.map_team != bot.team:
+            gs.switched[bot.team] = True
+
+    return gs
+
+
+# ----------------------------
+# Reader
+# ----------------------------
+
+class ReplayReader:
+    '''
+    random access over a replay file
+
+    the file is read once; records stay as raw lines and are only parsed when a seek needs them
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header: Dict[str, Any] = {}
+        self.winner: Optional[str] = None
+        self.warnings: Optional[Dict[str, Any]] = None #rejected action counts, if the match recorded them
+
+        self.__records: List[Union[str, Dict[str, Any]]] = [] #one per turn, raw json line or full state dict
+        self.__turns: List[int] = []
+        self.__keyframes: List[int] = [] #record indices that are full states
+
+        #last state built, so stepping forward one turn applies one delta
+        self.__cursor: Optional[Tuple[int, Dict[str, Any]]] = None
+
+        if path.endswith((".jsonl", ".jsonl.gz")):
+            self.__load_delta()
+        elif is_binary_replay(path):
+            self.__load_payload(read_binary_replay(path))
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                self.__load_payload(json.load(f))
+
+        if not self.__records:
+            raise ReplayException(f"{path}: replay has no turns")
+
+    def __load_delta(self) -> None:
+        with open_replay_file(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                #only peek at the small records, keep turn records as raw text
+                if line.startswith('{"type":"header"') or line.startswith('{"type":"end"'):
+                    rec = json.loads(line)
+                    if rec["type"] == "header":
+                        self.header = rec
+                    else:
+                        self.winner = rec.get("winner")
+                        self.warnings = rec.get("warnings")
+                    continue
+
+                is_keyframe = line.startswith('{"type":"keyframe"')
+                turn = self.__peek_turn(line)
+                if is_keyframe:
+                    self.__keyframes.append(len(self.__records))
+                elif not self.__keyframes:
+                    raise ReplayException(f"{self.path}: delta before the first keyframe")
+                self.__records.append(line)
+                self.__turns.append(turn)
+
+    @staticmethod
+    def __peek_turn(line: str) -> int:
+        '''turn of a keyframe/delta line without parsing the whole record'''
+        start = line.index('"turn":') + len('"turn":')
+        end = start
+        while line[end] not in ",}":
+            end += 1
+        return int(line[start:end])
+
+    def __load_payload(self, payload: Dict[str, Any]) -> None:
+        '''json replay payload (also what the binary format decodes to), every turn is a full state'''
+        self.header = {
+            "switch_turn_start": payload.get("switch_turn_start"),
+            "switch_turn_end": payload.get("switch_turn_end"),
+        }
+        self.winner = payload.get("winner")
+        self.warnings = payload.get("warnings")
+        for i, state in enumerate(payload.get("replay", [])):
+            self.__records.append(state)
+            self.__turns.append(state["turn"])
+            self.__keyframes.append(i)
+
+    # -------------
+    # Turn index
+    # -------------
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    @property
+    def turns(self) -> List[int]:
+        return list(self.__turns)
+
+    @property
+    def first_turn(self) -> int:
+        return self.__turns[0]
+
+    @property
+    def last_turn(self) -> int:
+        return self.__turns[-1]
+
+    def index_of(self, turn: int) -> int:
+        '''record index for a turn, clamped to the recorded range'''
+        i = bisect.bisect_right(self.__turns, turn) - 1
+        return min(max(i, 0), len(self.__turns) - 1)
+
+    # -------------
+    # Seeking
+    # -------------
+
+    def __parse(self, i: int) -> Dict[str, Any]:
+        rec = self.__records[i]
+        if isinstance(rec, dict):
+            return copy.deepcopy(rec)
+        return json.loads(rec)
+
+    def __state_at_index(self, i: int) -> Dict[str, Any]:
+        '''builds the state for record i; the result is owned by the reader cursor'''
+        k = self.__keyframes[bisect.bisect_right(self.__keyframes, i) - 1]
+
+        #continue from the cursor when it sits between the keyframe and the target
+        if self.__cursor is not None and k <= self.__cursor[0] <= i:
+            j, state = self.__cursor
+        else:
+            rec = self.__parse(k)
+            j, state = k, rec["state"] if "state" in rec else rec
+
+        for n in range(j + 1, i + 1):
+            apply_delta(state, self.__parse(n))
+
+        self.__cursor = (i, state)
+        return state
+
+    def state_at(self, turn: int) -> Dict[str, Any]:
+        '''GameState.to_dict() as recorded at `turn` (clamped to the recorded range)'''
+        return copy.deepcopy(self.__state_at_index(self.index_of(turn)))
+
+    def game_state_at(self, turn: int) -> GameState:
+        '''rebuilds a GameState at `turn`'''
+        state = self.__state_at_index(self.index_of(turn))
+
+        switch_turn = self.header.get("switch_turn_start")
+        switch_end = self.header.get("switch_turn_end")
+        switch_duration = None if switch_turn is None or switch_end is None else switch_end - switch_turn
+        return game_state_from_dict(state, switch_turn, switch_duration)
+
+
+# ----------------------------
+# Viewer
+# ----------------------------
+
+def view(reader: ReplayReader, start_turn: int, fps_cap: int = 30, turns_per_sec: float = 10.0) -> None:
+    '''
+    scrub through a replay with the pygame renderer
+
+    left/right: 1 turn, down/up: 10 turns, page down/up: 100 turns, home/end, space: play/pause
+    '''
+    from render import Renderer, require_pygame
+
+    pygame = require_pygame()
+
+    state = {"i": reader.index_of(start_turn), "playing": False}
+    steps = {
+        pygame.K_LEFT: -1, pygame.K_RIGHT: 1,
+        pygame.K_DOWN: -10, pygame.K_UP: 10,
+        pygame.K_PAGEDOWN: -100, pygame.K_PAGEUP: 100,
+    }
+
+    def on_key(key: int) -> None:
+        if key == pygame.K_SPACE:
+            state["playing"] = not state["playing"]
+        elif key == pygame.K_HOME:
+            state["i"] = 0
+        elif key == pygame.K_END:
+            state["i"] = len(reader) - 1
+        elif key in steps:
+            state["i"] = min(max(state["i"] + steps[key], 0), len(reader) - 1)
+
+    turns = reader.turns
+    shown = state["i"]
+    renderer = Renderer(reader.game_state_at(turns[shown]))
+    renderer.key_handler = on_key
+
+    frames_per_turn = max(1, int(round(fps_cap / turns_per_sec)))
+    frame = 0
+    try:
+        while renderer.render_once(fps_cap=fps_cap):
+            frame += 1
+            if state["playing"] and frame % frames_per_turn == 0:
+                if state["i"] < len(reader) - 1:
+                    state["i"] += 1
+                else:
+                    state["playing"] = False
+            if state["i"] != shown:
+                shown = state["i"]
+                renderer.gs = reader.game_state_at(turns[shown])
+    finally:
+        renderer.close()
+
+
+def main():
+    '''parse and run'''
+    ap = argparse.ArgumentParser(description="inspect or view a replay file")
+    ap.add_argument("replay", help="replay path (.json, .jsonl or .jsonl.gz)")
+    ap.add_argument("--turn", type=int, default=None, help="turn to start at (default: first)")
+    ap.add_argument("--dump", action="store_true", help="print the state at --turn as json instead of viewing")
+    ap.add_argument("--info", action="store_true", help="print a summary instead of viewing")
+    ap.add_argument("--fps", type=int, default=30, help="fps cap when viewing")
+    ap.add_argument("--speed", type=float, default=10.0, help="turns per second when playing")
+    args = ap.parse_args()
+
+    reader = ReplayReader(args.replay)
+    turn = reader.first_turn if args.turn is None else args.turn
+
+    if args.info:
+        final = reader.state_at(reader.last_turn)
+        print(json.dumps({
+            "turns": len(reader),
+            "first_turn": reader.first_turn,
+            "last_turn": reader.last_turn,
+            "winner": reader.winner,
+            "warnings": reader.warnings,
+            "final_money": final["team_money"],
+            "header": reader.header,
+        }, indent=2))
+        return
+    if args.dump:
+        print(json.dumps(reader.state_at(turn)))
+        return
+
+    from render import RenderException
+
+    try:
+        view(reader, turn, fps_cap=args.fps, turns_per_sec=args.speed)
+    except RenderException as e:
+        ap.error(f"{e} (or use --info / --dump)")
+
+
+if __name__ == "__main__":
+    main()
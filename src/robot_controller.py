@@ -12,15 +12,21 @@ Rules enforced here:
 from __future__ import annotations
 
 import copy
+import functools
+import operator
+import threading
 from collections import deque
 from typing import Any, Dict, List, Optional, Tuple
 
-from game_constants import Team, FoodType, ShopCosts, GameConstants
+from game_constants import Team, TileType, FoodType, ShopCosts, GameConstants
 from map import Map
 from tiles import Tile, Counter, Sink, SinkTable, Cooker, Trash, Submit, Shop, Box
 from item import Item, Food, Plate, Pan
 
 from game_state import GameState
+from pathfinding import DistanceField, STATION_TILE_TYPES, bfs, station_distances
+from read_only import read_only
+from warning_log import WarningLog
 
 from typing import Union
 
@@ -31,15 +37,43 @@ Buyable = Union[FoodType, ShopCosts]
 class RobotController:
     '''Class where robots can call the specified PUBLIC actions to alter game state'''
 
-    def __init__(self, team: Team, game_state: GameState):
+    def __init__(self, team: Team, game_state: GameState, verbose: bool = True, warnings: Optional[WarningLog] = None):
         self.__team = team
         self.__game_state = game_state
 
+        #rejected actions go to a WarningLog; without one, verbose prints them all and False (sandboxes) drops them
+        self.__warnings = warnings if warnings is not None else WarningLog("full" if verbose else "off")
+
+        self.__revoked = False #set by the engine when the bot times out, every action fails after that
+        self.__action_lock = threading.Lock() #held while an action changes the game, revoke waits for it
+
         self.__last_seen_turn: int = game_state.turn #curr turn
         self.__moves_left: Dict[int, int] = {}
         self.__actions_left: Dict[int, int] = {}
         self.__refresh_turn_budgets()
 
+        #read-only snapshots handed to the bot, rebuilt at most once per turn (or after an action)
+        self.__map_snapshots: Dict[Team, Map] = {}
+        self.__tile_snapshots: Dict[Tuple[Team, int, int], Tile] = {}
+
+        #BFS results per (map, start cell), valid while GameState.occupancy_version is unchanged
+        self.__path_fields: Dict[Tuple[Team, int, int], DistanceField] = {}
+        self.__path_version: int = -1
+
+    # ----------------------------
+    # Atomic actions
+    # ----------------------------
+    def __atomic(action):
+        '''
+        runs an action under the controller's lock, so revoke() waits until it is fully applied:
+        a timed out thread bot is revoked before it is killed, and can never be stopped halfway
+        '''
+        @functools.wraps(action)
+        def locked(self, *args, **kwargs):
+            with self.__action_lock:
+                return action(self, *args, **kwargs)
+        return locked
+
     # ----------------------------
     # Turn helpers
     # ----------------------------
@@ -54,13 +88,19 @@ class RobotController:
         if self.__game_state.turn != self.__last_seen_turn:
             self.__last_seen_turn = self.__game_state.turn
             self.__refresh_turn_budgets()
+            self.__invalidate_snapshots()
+
+    def __invalidate_snapshots(self) -> None:
+        '''drop the cached snapshots, the next read makes a fresh copy'''
+        self.__map_snapshots.clear()
+        self.__tile_snapshots.clear()
 
     def __consume_move(self, bot_id: int) -> bool:
         '''make a movement action'''
         self.__ensure_turn() #refresh
         
         if self.__moves_left.get(bot_id, 0) <= 0:
-            self.__warn(f"bot {bot_id} has already moved this turn")
+            self.__warn("budget", bot_id, f"bot {bot_id} has already moved this turn")
             return False
         
         self.__moves_left[bot_id] -= 1
@@ -71,10 +111,13 @@ class RobotController:
         self.__ensure_turn() #refresh
 
         if self.__actions_left.get(bot_id, 0) <= 0:
-            self.__warn(f"bot {bot_id} has already acted this turn")
+            self.__warn("budget", bot_id, f"bot {bot_id} has already acted this turn")
             return False
         
         self.__actions_left[bot_id] -= 1
+
+        #an action may change tiles, so snapshots taken earlier this turn are stale
+        self.__invalidate_snapshots()
         return True
 
     # ----------------------------
@@ -91,8 +134,19 @@ class RobotController:
         return Team.RED if self.__team == Team.BLUE else Team.BLUE
 
     def get_map(self, team: Team) -> Map:
-        '''Deep copy for the user'''
-        return copy.deepcopy(self.__game_state.get_map(team))
+        '''
+        Read-only snapshot of the map for the user
+
+        The deep copy is made at most once per turn (and again after one of your actions),
+        so repeated calls in the same turn return the same object. Changing it (or its tiles
+        and items) raises ReadOnlyError, copy.deepcopy it for a map you can change.
+        '''
+        self.__ensure_turn()
+        snap = self.__map_snapshots.get(team)
+        if snap is None:
+            snap = read_only(copy.deepcopy(self.__game_state.get_map(team)))
+            self.__map_snapshots[team] = snap
+        return snap
 
     def get_orders(self, team: Team) -> List[Dict[str, Any]]:
         '''returns list of dictionaries (each order is represented by the dictionary)'''
@@ -126,7 +180,7 @@ class RobotController:
         try:
             b = self.__game_state.get_bot(bot_id)
         except Exception:
-            self.__warn(f"Invalid bot_id {bot_id}")
+            self.__warn("bot_id", bot_id, f"Invalid bot_id {bot_id}")
             return None
 
         if b is None:
@@ -143,14 +197,29 @@ class RobotController:
         }
 
     def get_tile(self, team: Team, x: int, y: int) -> Optional[Tile]:
-        '''Get the tile at a specific x, y'''
+        '''Get a read-only snapshot of the tile at a specific x, y (cached like get_map), None for bad coordinates'''
         try:
-            t = self.__game_state.get_tile(team, x, y)
-            return copy.deepcopy(t)
-        
-        except Exception:
+            #1.0 or None are not coordinates (1.0 would also find the cached (1, y) tile)
+            x, y = operator.index(x), operator.index(y)
+        except TypeError:
+            return None
+
+        self.__ensure_turn()
+        key = (team, x, y)
+        snap = self.__tile_snapshots.get(key)
+        if snap is not None:
+            return snap
+
+        m = self.__game_state.get_map(team)
+        if not m.in_bounds(x, y):
             return None
 
+        #reuse the map snapshot if we already paid for one this turn
+        snap_map = self.__map_snapshots.get(team)
+        snap = snap_map.tiles[x][y] if snap_map is not None else read_only(copy.deepcopy(m.tiles.peek(x, y)))
+        self.__tile_snapshots[key] = snap
+        return snap
+
     # ----------------------------
     # targeting helpers
     # ----------------------------
@@ -171,12 +240,12 @@ class RobotController:
         target_y = b.y if target_y is None else target_y
 
         if self.__chebyshev_dist(b.x, b.y, target_x, target_y) > 1:
-            self.__warn(f"{label} failed: target ({target_x},{target_y}) too far from bot {bot_id} at ({b.x},{b.y})")
+            self.__warn("target", bot_id, f"{label} failed: target ({target_x},{target_y}) too far from bot {bot_id} at ({b.x},{b.y})")
             return None
 
         m = self.__game_state.get_map(b.map_team)
         if not m.in_bounds(target_x, target_y):
-            self.__warn(f"{label} failed : target ({target_x},{target_y}) is out of bounds")
+            self.__warn("target", bot_id, f"{label} failed : target ({target_x},{target_y}) is out of bounds")
             return None
 
         tile = self.__game_state.get_tile(b.map_team, target_x, target_y)
@@ -199,6 +268,7 @@ class RobotController:
         return self.__can_move_internal(b.map_team, b.x, b.y, dx, dy)
 
 
+    @__atomic
     def move(self, bot_id: int, dx: int, dy: int) -> bool:
         '''actually moves, True if move succeeds; False otherwise'''
         b = self.__safe_get_bot(bot_id)
@@ -210,24 +280,109 @@ class RobotController:
             return False
         
         if max(abs(dx), abs(dy)) > 1 or (dx == 0 and dy == 0):
-            self.__warn(f"move() failed: bot {bot_id} illegal step ({dx},{dy}); must be chebyshev distance 1")
+            self.__warn("move", bot_id, f"move() failed: bot {bot_id} illegal step ({dx},{dy}); must be chebyshev distance 1")
             return False
         
         if not self.__can_move_internal(b.map_team, b.x, b.y, dx, dy):
-            self.__warn(f"move() failed: illegal move bot {bot_id} from ({b.x},{b.y}) by ({dx},{dy})")
+            self.__warn("move", bot_id, f"move() failed: illegal move bot {bot_id} from ({b.x},{b.y}) by ({dx},{dy})")
             return False
         
         #move the bot through game state
         if not self.__game_state.move_bot(bot_id, dx, dy):
-            self.__warn(f"move() failed: occupied/blocked with movement of bot {bot_id} to ({b.x+dx},{b.y+dy})")
+            self.__warn("move", bot_id, f"move() failed: occupied/blocked with movement of bot {bot_id} to ({b.x+dx},{b.y+dy})")
 
         return True
 
 
+    # ----------------------------
+    # Pathfinding
+    # ----------------------------
+
+    def get_distance(self, bot_id: int, target_x: int, target_y: int, adjacent: bool = True) -> Optional[int]:
+        '''
+        number of moves bot_id needs to reach the target, None if it can't get there
+
+        adjacent=True (default) means within Chebyshev distance 1 of the target, where actions can reach it;
+        adjacent=False means standing on the target. Other bots block the way.
+        '''
+        field = self.__path_field(bot_id)
+        if field is None:
+            return None
+        return field.distance_to(target_x, target_y, adjacent)
+
+    def get_next_step(self, bot_id: int, target_x: int, target_y: int, adjacent: bool = True) -> Optional[Tuple[int, int]]:
+        '''(dx, dy) for move() on a shortest path to the target, (0, 0) if already there, None if unreachable'''
+        field = self.__path_field(bot_id)
+        if field is None:
+            return None
+        return field.next_step(target_x, target_y, adjacent)
+
+    def get_station_distances(self, bot_id: int, tile_name: Optional[Union[str, TileType]] = None) -> Dict[Tuple[int, int], int]:
+        '''
+        {(x, y): moves until the station is within reach} for every reachable station on the bot's map
+
+        stations are all non floor/wall tiles, or only tiles of kind tile_name (ie "COOKER") if given
+        '''
+        field = self.__path_field(bot_id)
+        if field is None:
+            return {}
+        m = self.__game_state.get_map(self.__game_state.get_bot(bot_id).map_team)
+        kinds = STATION_TILE_TYPES if tile_name is None else (tile_name,)
+        res: Dict[Tuple[int, int], int] = {}
+        for kind in kinds:
+            res.update(station_distances(field, m.get_tile_locations(kind)))
+        return res
+
+    def __path_field(self, bot_id: int) -> Optional[DistanceField]:
+        '''BFS from the bot over its current map, reused until any bot moves'''
+        b = self.__safe_get_bot(bot_id)
+        if b is None:
+            return None
+
+        version = self.__game_state.occupancy_version
+        if version != self.__path_version:
+            self.__path_fields.clear()
+            self.__path_version = version
+
+        key = (b.map_team, b.x, b.y)
+        field = self.__path_fields.get(key)
+        if field is None:
+            m = self.__game_state.get_map(b.map_team)
+            blocked = {
+                o.x * m.height + o.y
+                for o in self.__game_state.bots.values()
+                if o.map_team == b.map_team and o.bot_id != b.bot_id
+            }
+            field = bfs(m.get_walkable_grid(), m.width, m.height, (b.x, b.y), blocked)
+            self.__path_fields[key] = field
+        return field
+
+    # ----------------------------
+    # Lookahead
+    # ----------------------------
+
+    def get_sandbox(self) -> Optional["Sandbox"]:
+        '''
+        private copy of the current game to try actions on (see sandbox.py), the real game is untouched
+
+        your bots keep the moves/actions they have left this turn inside the sandbox
+        '''
+        from sandbox import Sandbox
+
+        if self.__revoked:
+            return None
+        self.__ensure_turn()
+        sb = Sandbox(self.__game_state)
+        rc = sb.controller(self.__team)
+        rc.__moves_left = dict(self.__moves_left)
+        rc.__actions_left = dict(self.__actions_left)
+        return sb
+
     # ----------------------------
     # botwise inventory interactions
     # ----------------------------
 
+    @__atomic
     def pickup(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''bot picks up from target x, target y location; box pickup special'''
 
@@ -238,7 +393,7 @@ class RobotController:
         if not self.__consume_action(bot_id):
             return False
         if b.holding is not None:
-            self.__warn(f"pickup() failed: bot {bot_id} already holding something")
+            self.__warn("pickup", bot_id, f"pickup() failed: bot {bot_id} already holding something")
             return False
 
         #check validity
@@ -253,7 +408,7 @@ class RobotController:
                 # enforce invariant
                 tile.count = 0
                 tile.item = None
-                self.__warn(f"pickup() failed: BOX at ({target_x},{target_y}) is empty for bot {bot_id}")
+                self.__warn("pickup", bot_id, f"pickup() failed: BOX at ({target_x},{target_y}) is empty for bot {bot_id}")
                 return False
 
             #give bot a new deepcopy of the stored prototype
@@ -266,7 +421,7 @@ class RobotController:
 
         item = getattr(tile, "item", None)
         if item is None:
-            self.__warn(f"pickup() failed: nothing to pick up at ({target_x},{target_y}) for bot {bot_id}")
+            self.__warn("pickup", bot_id, f"pickup() failed: nothing to pick up at ({target_x},{target_y}) for bot {bot_id}")
             return False
 
         b.holding = item
@@ -274,6 +429,7 @@ class RobotController:
 
         return True
 
+    @__atomic
     def place(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''bot places to target x, target y location; box place and food on pan in cooker is special'''
         b = self.__safe_get_bot(bot_id)
@@ -283,7 +439,7 @@ class RobotController:
         if not self.__consume_action(bot_id):
             return False
         if b.holding is None:
-            self.__warn(f"place() failed: bot {bot_id} holding nothing")
+            self.__warn("place", bot_id, f"place() failed: bot {bot_id} holding nothing")
             return False
 
         tgt = self.__resolve_target_tile(bot_id, "place()", target_x, target_y)
@@ -304,7 +460,7 @@ class RobotController:
 
                 # DON'T ALLOW SWAP if it is currently cooking right now
                 if isinstance(old_pan, Pan) and old_pan.food is not None:
-                    self.__warn(f"place() failed: cooker at ({target_x},{target_y}) is busy; old pan has food")
+                    self.__warn("place", bot_id, f"place() failed: cooker at ({target_x},{target_y}) is busy; old pan has food")
                     return False
 
                 #else, just swap
@@ -316,6 +472,7 @@ class RobotController:
                     self.__set_cook_progress_for_food(tile, tile.item.food)
                 else:
                     tile.cook_progress = 0
+                self.__game_state.mark_timed_tile(b.map_team, target_x, target_y)
 
                 return True
 
@@ -324,17 +481,17 @@ class RobotController:
                 pan = tile.item
                 #is there pan?
                 if not isinstance(pan, Pan):
-                    self.__warn(f"place() failed: cooker at ({target_x},{target_y}) missing pan for food")
+                    self.__warn("place", bot_id, f"place() failed: cooker at ({target_x},{target_y}) missing pan for food")
                     return False
                 
                 #is pan empty
                 if pan.food is not None:
-                    self.__warn(f"place() failed: pan at ({target_x},{target_y}) is already occupied")
+                    self.__warn("place", bot_id, f"place() failed: pan at ({target_x},{target_y}) is already occupied")
                     return False
                 
                 #is food valid for cooking?
                 if not b.holding.can_cook:
-                    self.__warn(f"place() failed: food {b.holding.food_name} cannot be cooked")
+                    self.__warn("place", bot_id, f"place() failed: food {b.holding.food_name} cannot be cooked")
                     return False
 
                 #move food from hand to pan
@@ -343,10 +500,11 @@ class RobotController:
 
                 #init cook progress based on teh food
                 self.__set_cook_progress_for_food(tile, pan.food)
+                self.__game_state.mark_timed_tile(b.map_team, target_x, target_y)
                 return True
 
             #not the cases above, so fail
-            self.__warn(f"place() failed: must hold Pan or cookable Food for cooker at ({target_x},{target_y})")
+            self.__warn("place", bot_id, f"place() failed: must hold Pan or cookable Food for cooker at ({target_x},{target_y})")
             return False
 
         #BOX SPECIAL CASE HERE WHERE WE PLACE THE BOX
@@ -369,7 +527,7 @@ class RobotController:
                 return True
 
             if self.__item_signature(tile.item) != self.__item_signature(b.holding):
-                self.__warn(f"place() failed: box tile at ({target_x},{target_y}) stores a different item type")
+                self.__warn("place", bot_id, f"place() failed: box tile at ({target_x},{target_y}) stores a different item type")
                 return False
 
             tile.count += 1
@@ -377,16 +535,17 @@ class RobotController:
             return True
 
         if not hasattr(tile, "item"):
-            self.__warn(f"place() failed: tile at ({target_x},{target_y}) cannot hold items for bot {bot_id}")
+            self.__warn("place", bot_id, f"place() failed: tile at ({target_x},{target_y}) cannot hold items for bot {bot_id}")
             return False
         if getattr(tile, "item") is not None:
-            self.__warn(f"place() failed: tile at ({target_x},{target_y}) already has an item for bot {bot_id}")
+            self.__warn("place", bot_id, f"place() failed: tile at ({target_x},{target_y}) already has an item for bot {bot_id}")
             return False
 
         tile.item = b.holding
         b.holding = None
         return True
 
+    @__atomic
     def trash(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         b = self.__safe_get_bot(bot_id)
 
@@ -395,7 +554,7 @@ class RobotController:
         if not self.__consume_action(bot_id):
             return False
         if b.holding is None:
-            self.__warn(f"trash() failed: bot {bot_id} holding onto nothing")
+            self.__warn("trash", bot_id, f"trash() failed: bot {bot_id} holding onto nothing")
             return False
 
         tgt = self.__resolve_target_tile(bot_id, "trash()", target_x, target_y)
@@ -404,7 +563,7 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Trash):
-            self.__warn(f"trash() failed: target ({target_x},{target_y}) is not trash tile for bot {bot_id}")
+            self.__warn("trash", bot_id, f"trash() failed: target ({target_x},{target_y}) is not trash tile for bot {bot_id}")
             return False
 
         if isinstance(b.holding, Plate):
@@ -437,7 +596,7 @@ class RobotController:
             return False
         
         if b.holding is not None:
-            self.__warn(f'buy() failed: bot {bot_id} needs to be holding nothing to buy')
+            self.__warn("buy", bot_id, f'buy() failed: bot {bot_id} needs to be holding nothing to buy')
             return False
 
         if isinstance(item, FoodType):
@@ -451,10 +610,10 @@ class RobotController:
             if item == ShopCosts.PAN:
                 b.holding = Pan(None)
                 return True
-            self.__warn(f"buy() failed: no shop item {item}")
+            self.__warn("buy", bot_id, f"buy() failed: no shop item {item}")
             return False
 
-        self.__warn(f"buy() failed: no item type {type(item).__name__}")
+        self.__warn("buy", bot_id, f"buy() failed: no item type {type(item).__name__}")
         return False
 
 
@@ -484,6 +643,7 @@ class RobotController:
 
 
 
+    @__atomic
     def buy(self, bot_id: int, item: Buyable, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''buys the item; bot needs to not be holding anything'''
 
@@ -499,22 +659,22 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Shop):
-            self.__warn(f"buy() failed: target ({target_x},{target_y}) is not a shop tile for bot {bot_id}")
+            self.__warn("buy", bot_id, f"buy() failed: target ({target_x},{target_y}) is not a shop tile for bot {bot_id}")
             return False
         if b.holding is not None:
-            self.__warn(f"buy() failed: bot {bot_id} must not carry anything when buying")
+            self.__warn("buy", bot_id, f"buy() failed: bot {bot_id} must not carry anything when buying")
             return False
 
         # enforce shop menu if present
         if not self.__shop_has_item(tile, item):
             name = getattr(item, "food_name", getattr(item, "item_name", str(item)))
-            self.__warn(f"buy() failed: {name} not in shop menu")
+            self.__warn("buy", bot_id, f"buy() failed: {name} not in shop menu")
             return False
 
         cost = self.__buyable_cost(item)
         if self.__game_state.get_team_money(self.__team) < cost:
             name = getattr(item, "food_name", getattr(item, "item_name", str(item)))
-            self.__warn(f"buy() failed: team {self.__team.name} insufficient funds for {name}")
+            self.__warn("buy", bot_id, f"buy() failed: team {self.__team.name} insufficient funds for {name}")
             return False
 
         # spend money
@@ -533,6 +693,7 @@ class RobotController:
     # Food processing
     # ----------------------------
 
+    @__atomic
     def chop(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''chop on a counter'''
 
@@ -548,22 +709,22 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Counter):
-            self.__warn(f"chop() failed: target ({target_x},{target_y}) must be COUNTER for bot {bot_id}")
+            self.__warn("chop", bot_id, f"chop() failed: target ({target_x},{target_y}) must be COUNTER for bot {bot_id}")
             return False
         
         if b.holding is not None:
-            self.__warn(f"chop() failed: bot {bot_id} must be holding nothing")
+            self.__warn("chop", bot_id, f"chop() failed: bot {bot_id} must be holding nothing")
             return False
 
         item = getattr(tile, "item", None)
         if isinstance(item, Food):
             if not item.can_chop:
-                self.__warn(f"chop() failed: tile food not choppable bot {bot_id}")
+                self.__warn("chop", bot_id, f"chop() failed: tile food not choppable bot {bot_id}")
                 return False
             item.chopped = True
             return True
 
-        self.__warn(f"chop() failed: nothing choppable at ({target_x},{target_y}) for bot {bot_id}")
+        self.__warn("chop", bot_id, f"chop() failed: nothing choppable at ({target_x},{target_y}) for bot {bot_id}")
         return False
 
     def can_start_cook(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
@@ -590,6 +751,7 @@ class RobotController:
         
         return isinstance(b.holding, Food) and b.holding.can_cook
 
+    @__atomic
     def start_cook(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''start cooking (ticks are environmental)'''
 
@@ -605,19 +767,19 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Cooker):
-            self.__warn(f"start_cook() failed: target ({target_x},{target_y}) must be cooker tile for bot {bot_id}")
+            self.__warn("start_cook", bot_id, f"start_cook() failed: target ({target_x},{target_y}) must be cooker tile for bot {bot_id}")
             return False
         
         pan = tile.item
         if not isinstance(pan, Pan):
-            self.__warn(f"start_cook() failed: cooker at ({target_x},{target_y}) is missing pan for bot {bot_id}")
+            self.__warn("start_cook", bot_id, f"start_cook() failed: cooker at ({target_x},{target_y}) is missing pan for bot {bot_id}")
             return False
         
         if pan.food is not None:
-            self.__warn(f"start_cook() failed: pan already occupied at ({target_x},{target_y}) bot {bot_id}")
+            self.__warn("start_cook", bot_id, f"start_cook() failed: pan already occupied at ({target_x},{target_y}) bot {bot_id}")
             return False
         if not (isinstance(b.holding, Food) and b.holding.can_cook):
-            self.__warn(f"start_cook() failed: bot={bot_id} must hold cookable food")
+            self.__warn("start_cook", bot_id, f"start_cook() failed: bot={bot_id} must hold cookable food")
             return False
 
         pan.food = b.holding
@@ -631,8 +793,10 @@ class RobotController:
         else: 
             tile.cook_progress = GameConstants.BURN_PROGRESS
 
+        self.__game_state.mark_timed_tile(b.map_team, target_x, target_y)
         return True
 
+    @__atomic
     def take_from_pan(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''take food from the pan'''
 
@@ -642,7 +806,7 @@ class RobotController:
         if not self.__consume_action(bot_id):
             return False
         if b.holding is not None:
-            self.__warn(f"take_from_pan(): bot={bot_id} already holding something")
+            self.__warn("take_from_pan", bot_id, f"take_from_pan(): bot={bot_id} already holding something")
             return False
 
         tgt = self.__resolve_target_tile(bot_id, "take_from_pan()", target_x, target_y)
@@ -651,11 +815,11 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Cooker):
-            self.__warn(f"take_from_pan(): target ({target_x},{target_y}) must be COOKER bot={bot_id}")
+            self.__warn("take_from_pan", bot_id, f"take_from_pan(): target ({target_x},{target_y}) must be COOKER bot={bot_id}")
             return False
         pan = tile.item
         if not isinstance(pan, Pan) or pan.food is None:
-            self.__warn(f"take_from_pan(): nothing in pan at ({target_x},{target_y}) bot={bot_id}")
+            self.__warn("take_from_pan", bot_id, f"take_from_pan(): nothing in pan at ({target_x},{target_y}) bot={bot_id}")
             return False
 
         #take the food and resest the pan
@@ -669,6 +833,7 @@ class RobotController:
     # Plates and sink helpers
     # ----------------------------
 
+    @__atomic
     def take_clean_plate(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''take a clean plate from the sink table'''
 
@@ -678,7 +843,7 @@ class RobotController:
         if not self.__consume_action(bot_id):
             return False
         if b.holding is not None:
-            self.__warn(f"take_clean_plate() failed: bot {bot_id} must not carry anything")
+            self.__warn("take_clean_plate", bot_id, f"take_clean_plate() failed: bot {bot_id} must not carry anything")
             return False
 
         tgt = self.__resolve_target_tile(bot_id, "take_clean_plate()", target_x, target_y)
@@ -687,16 +852,17 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, SinkTable):
-            self.__warn(f"take_clean_plate() failed: target ({target_x},{target_y}) must be a sinktable for bot {bot_id}")
+            self.__warn("take_clean_plate", bot_id, f"take_clean_plate() failed: target ({target_x},{target_y}) must be a sinktable for bot {bot_id}")
             return False
         if tile.num_clean_plates <= 0:
-            self.__warn(f"take_clean_plate() failed: no clean plates available for bot={bot_id}")
+            self.__warn("take_clean_plate", bot_id, f"take_clean_plate() failed: no clean plates available for bot={bot_id}")
             return False
 
         tile.num_clean_plates -= 1
         b.holding = Plate(food=[], dirty=False)
         return True
 
+    @__atomic
     def put_dirty_plate_in_sink(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''user carry a dirty plate, put it in the sink for washing'''
 
@@ -706,7 +872,7 @@ class RobotController:
         if not self.__consume_action(bot_id):
             return False
         if not isinstance(b.holding, Plate) or not b.holding.dirty:
-            self.__warn(f"put_dirty_plate_in_sink() failed: bot {bot_id} isn't holding dirty plate")
+            self.__warn("put_dirty_plate_in_sink", bot_id, f"put_dirty_plate_in_sink() failed: bot {bot_id} isn't holding dirty plate")
             return False
 
         tgt = self.__resolve_target_tile(bot_id, "put_dirty_plate_in_sink()", target_x, target_y)
@@ -715,14 +881,16 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Sink):
-            self.__warn(f"put_dirty_plate_in_sink() failed: target ({target_x},{target_y}) must be a sink tile for bot {bot_id}")
+            self.__warn("put_dirty_plate_in_sink", bot_id, f"put_dirty_plate_in_sink() failed: target ({target_x},{target_y}) must be a sink tile for bot {bot_id}")
             return False
 
         #add dirty plate to sink
         tile.num_dirty_plates += 1
         b.holding = None
+        self.__game_state.mark_timed_tile(b.map_team, target_x, target_y)
         return True
 
+    @__atomic
     def wash_sink(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''perform washing action, action is handled at the start of next turn's environmental tick'''
         b = self.__safe_get_bot(bot_id)
@@ -737,15 +905,17 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Sink):
-            self.__warn(f"wash_sink(): target ({target_x},{target_y}) must be sink tile bot {bot_id}")
+            self.__warn("wash_sink", bot_id, f"wash_sink(): target ({target_x},{target_y}) must be sink tile bot {bot_id}")
             return False
         if tile.num_dirty_plates <= 0:
-            self.__warn(f"wash_sink(): no dirty plates to wash at ({target_x},{target_y}) bot {bot_id}")
+            self.__warn("wash_sink", bot_id, f"wash_sink(): no dirty plates to wash at ({target_x},{target_y}) bot {bot_id}")
             return False
 
         tile.using = True
+        self.__game_state.mark_timed_tile(b.map_team, target_x, target_y)
         return True
 
+    @__atomic
     def add_food_to_plate(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''plate a food'''
         b = self.__safe_get_bot(bot_id)
@@ -762,29 +932,29 @@ class RobotController:
         #plate if user is holidng a plate and is targetting food
         if isinstance(b.holding, Plate):
             if b.holding.dirty:
-                self.__warn(f"add_food_to_plate() failed: plate is dirty for bot {bot_id}")
+                self.__warn("add_food_to_plate", bot_id, f"add_food_to_plate() failed: plate is dirty for bot {bot_id}")
                 return False
             if isinstance(getattr(tile, "item", None), Food):
                 food = tile.item
-                b.holding.food.append(food)
+                b.holding.add_food(food)
                 tile.item = None
                 return True
-            self.__warn(f"add_food_to_plate() failed: no food from target ({target_x},{target_y}) for bot {bot_id}")
+            self.__warn("add_food_to_plate", bot_id, f"add_food_to_plate() failed: no food from target ({target_x},{target_y}) for bot {bot_id}")
             return False
 
         #plate if user is holding food and is targetting plate
         if isinstance(b.holding, Food) and isinstance(getattr(tile, "item", None), Plate):
             plate = tile.item
             if plate.dirty:
-                self.__warn(f"add_food_to_plate() failed: target plate is dirty at ({target_x},{target_y}) bot {bot_id}")
+                self.__warn("add_food_to_plate", bot_id, f"add_food_to_plate() failed: target plate is dirty at ({target_x},{target_y}) bot {bot_id}")
                 return False
             
 
-            plate.food.append(b.holding)
+            plate.add_food(b.holding)
             b.holding = None
             return True
 
-        self.__warn(f"add_food_to_plate() failed: need a plate and food for bot {bot_id} targeting ({target_x},{target_y})")
+        self.__warn("add_food_to_plate", bot_id, f"add_food_to_plate() failed: need a plate and food for bot {bot_id} targeting ({target_x},{target_y})")
         return False
 
     # --------------
@@ -804,6 +974,7 @@ class RobotController:
         _, _, tile = tgt
         return isinstance(tile, Submit)
 
+    @__atomic
     def submit(self, bot_id: int, target_x: Optional[int] = None, target_y: Optional[int] = None) -> bool:
         '''perform the submission action'''
         if not self.__consume_action(bot_id):
@@ -819,16 +990,16 @@ class RobotController:
         target_x, target_y, tile = tgt
 
         if not isinstance(tile, Submit):
-            self.__warn(f"submit() failed: target ({target_x},{target_y}) must be submit station bot {bot_id}")
+            self.__warn("submit", bot_id, f"submit() failed: target ({target_x},{target_y}) must be submit station bot {bot_id}")
             return False
         if not isinstance(b.holding, Plate) or b.holding.dirty:
-            self.__warn(f"submit() failed: bot {bot_id} must have a clean Plate")
+            self.__warn("submit", bot_id, f"submit() failed: bot {bot_id} must have a clean Plate")
             return False
 
         #let game state handle the submission logic
         succ = self.__game_state.submit_plate(bot_id, target_x, target_y)
         if not succ:
-            self.__warn(f"submit() failed: no matching order for bot {bot_id}")
+            self.__warn("submit", bot_id, f"submit() failed: no matching order for bot {bot_id}")
         return succ
 
     # ----------------------------
@@ -852,9 +1023,12 @@ class RobotController:
 
     def can_switch_maps(self) -> bool:
         '''Can switch ANY TIME during the map'''
+        if self.__revoked:
+            return False
         info = self.get_switch_info()
         return bool(info["window_active"]) and (not info["my_team_switched"])
 
+    @__atomic
     def switch_maps(self) -> bool:
         '''
         if this is called during the switch window, it tps all the bots
@@ -865,30 +1039,42 @@ class RobotController:
         this does not consume a bot's move or action, so they can still move this turn
         '''
         if not self.can_switch_maps():
-            self.__warn("switch_maps() failed: not allowed now (outside window or already switched).")
+            self.__warn("switch_maps", None, "switch_maps() failed: not allowed now (outside window or already switched).")
             return False
 
         success = self.__game_state.request_switch(self.__team)
 
         if not success:
-            self.__warn("switch_maps() failed: request rejected by GameState")
+            self.__warn("switch_maps", None, "switch_maps() failed: request rejected by GameState")
 
         return success
 
 
+    # ----------------------------
+    # Engine hooks
+    # ----------------------------
+
+    def revoke(self) -> None:
+        '''used by the engine when a bot times out: from now on every action on this controller fails
+        (an action already running finishes first)'''
+        with self.__action_lock:
+            self.__revoked = True
+
     # ----------------------------
     # Internal helpers
     # ----------------------------
 
     def __safe_get_bot(self, bot_id: int):
         '''get bot checkers'''
+        if self.__revoked:
+            return None
         try:
             b = self.__game_state.get_bot(bot_id)
         except Exception:
-            self.__warn(f"Invalid bot_id {bot_id}")
+            self.__warn("bot_id", bot_id, f"Invalid bot_id {bot_id}")
             return None
         if b.team != self.__team:
-            self.__warn(f"Cannot control enemy bot_id {bot_id}")
+            self.__warn("bot_id", bot_id, f"Cannot control enemy bot_id {bot_id}")
             return None
         return b
 
@@ -902,13 +1088,7 @@ class RobotController:
 
         #plate signature with foods on top of it
         if isinstance(it, Plate):
-            foods = []
-            for f in it.food:
-                if isinstance(f, Food):
-                    foods.append((f.food_name, bool(f.chopped), int(f.cooked_stage)))
-                else:
-                    foods.append((type(f).__name__,))
-            return ("Plate", bool(it.dirty), tuple(foods))
+            return ("Plate", bool(it.dirty), it.food_signatures) #cached on the plate
 
         #pan signature also by the foods
         if isinstance(it, Pan):
@@ -920,9 +1100,12 @@ class RobotController:
         return (type(it).__name__,)
 
 
-    def __warn(self, msg: str) -> None:
-        '''warn string'''
-        print(f"[RC for {self.__team.name} WARN]: {msg}")
+    def __warn(self, category: str, bot_id: Optional[int], msg: str) -> None:
+        '''report a rejected action to the warning log'''
+        log = self.__warnings
+        if not log.enabled:
+            return
+        log.record(self.__game_state.turn, self.__team, bot_id, category, msg)
 
     def __can_move_internal(self, map_team: Team, x: int, y: int, dx: int, dy: int) -> bool:
         '''private helper to see if we can move by dx, dy from x, y on map_team or not'''
@@ -0,0 +1,78 @@
+# sandbox.py
+"""
+Sandboxed lookahead for search based bots.
+
+A Sandbox owns a GameState.clone() and one RobotController per team on it, so actions run through
+exactly the same rules as the real game without touching it:
+
+    sb = controller.get_sandbox()
+    sb.simulate(controller.get_team(), [("move", bot_id, 1, 0), ("pickup", bot_id, 5, 3)])
+    sb.end_turn()                       #start_turn: money, cooking, washing, order expiry
+    sb.get_team_money(controller.get_team())
+
+    child = sb.fork()                   #branch a rollout, sb is left as it was
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from game_constants import Team
+from game_state import GameState
+from robot_controller import RobotController
+
+
+class SandboxException(Exception):
+    pass
+
+
+def run_actions(rc: RobotController, actions: Iterable[Sequence[Any]]) -> List[Any]:
+    '''
+    runs controller calls in order, each action is (method_name, *args) ie ("move", bot_id, 1, 0)
+
+    returns what each call returned (False for actions the rules reject)
+    '''
+    results = []
+    for action in actions:
+        name, args = action[0], action[1:]
+        if name.startswith("_") or name in ("revoke", "get_sandbox"):
+            raise SandboxException(f"{name!r} is not a controller action")
+        method = getattr(rc, name, None)
+        if method is None:
+            raise SandboxException(f"RobotController has no method {name!r}")
+        results.append(method(*args))
+    return results
+
+
+class Sandbox:
+    '''private copy of a game state that bots can step with the controller rules'''
+
+    def __init__(self, game_state: GameState, verbose: bool = False):
+        self.state = game_state.clone()
+        self.verbose = verbose
+        self.__controllers: Dict[Team, RobotController] = {
+            team: RobotController(team, self.state, verbose=verbose) for team in Team
+        }
+
+    def controller(self, team: Team) -> RobotController:
+        '''RobotController for team inside the sandbox (never the real game)'''
+        return self.__controllers[team]
+
+    def simulate(self, team: Team, actions: Iterable[Sequence[Any]]) -> List[Any]:
+        '''runs controller calls for team, see run_actions'''
+        return run_actions(self.__controllers[team], actions)
+
+    def end_turn(self, turns: int = 1) -> None:
+        '''advances the sandbox like the engine does between turns (fresh move/action budgets included)'''
+        for _ in range(turns):
+            self.state.start_turn()
+
+    def fork(self) -> "Sandbox":
+        '''independent copy of this sandbox for branching rollouts'''
+        return Sandbox(self.state, verbose=self.verbose)
+
+    def get_turn(self) -> int:
+        return self.state.turn
+
+    def get_team_money(self, team: Team) -> int:
+        return self.state.get_team_money(team)
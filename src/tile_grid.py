@@ -0,0 +1,251 @@
+# tile_grid.py
+"""
+Compact tile storage behind Map.tiles.
+
+Every cell's TileType id lives in one flat bytearray (index x * height + y). Tile objects are only
+kept, in a sparse dict, for cells that can hold state: every station, plus any floor/wall cell
+that code actually asked for through tiles[x][y] (bots can place items on floors). Untouched
+floors and walls have no object at all.
+
+tiles[x][y], tiles[x][a:b] and tiles[x][y] = tile keep working as before; read-only code (rendering,
+serialization, walkability) should use peek / tile_type_at / is_walkable_at, which never create tiles.
+Iterating a column (for tile in tiles[x]) is read-only too and yields the same tiles as peek.
+
+Cells fetched through tiles[x][y] / get / set are remembered as dirty (the caller may mutate
+them) until take_dirty(), which is what lets GameState.to_dict rebuild only those tile dicts.
+
+cow_copy() makes a copy-on-write clone for GameState.clone: both grids keep sharing tile objects
+until one of them fetches a tile through tiles[x][y] / get, which then gets its own deep copy.
+Tiles returned by peek may be shared, so never mutate them.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from game_constants import TileType
+from tiles import Tile, Floor, Wall, Counter, Box, Sink, SinkTable, Cooker, Trash, Submit, Shop
+
+TILE_TYPE_BY_ID: Dict[int, TileType] = {t.tile_id: t for t in TileType}
+
+TILE_CLASSES: Dict[TileType, type] = {
+    TileType.FLOOR: Floor,
+    TileType.WALL: Wall,
+    TileType.COUNTER: Counter,
+    TileType.BOX: Box,
+    TileType.SINK: Sink,
+    TileType.SINKTABLE: SinkTable,
+    TileType.COOKER: Cooker,
+    TileType.TRASH: Trash,
+    TileType.SUBMIT: Submit,
+    TileType.SHOP: Shop,
+}
+
+#kinds with no state of their own; cells of these kinds are only materialized on demand
+STATELESS_TILE_TYPES = (TileType.FLOOR, TileType.WALL)
+
+#tile id -> 1 if walkable
+WALKABLE_BY_ID = bytearray(256)
+for _t in TileType:
+    WALKABLE_BY_ID[_t.tile_id] = 1 if _t.is_walkable else 0
+
+#shared read-only stand-ins returned by peek for cells that were never materialized
+_PROTOTYPES: Dict[int, Tile] = {t.tile_id: TILE_CLASSES[t]() for t in STATELESS_TILE_TYPES}
+
+
+def new_tile(tile_type: TileType) -> Tile:
+    '''fresh tile object for a tile kind'''
+    cls = TILE_CLASSES.get(tile_type)
+    return cls() if cls is not None else Tile(tile_type)
+
+
+def is_pristine(tile: Tile) -> bool:
+    '''True for a plain floor/wall with nothing on it, which does not need to be stored'''
+    return type(tile) in (Floor, Wall) and tile.item is None and not tile.using
+
+
+class TileColumn:
+    '''tiles[x] view so tiles[x][y] reads and writes the grid'''
+
+    def __init__(self, grid: "TileGrid", x: int):
+        self.__grid = grid
+        self.__x = x
+
+    def __len__(self) -> int:
+        return self.__grid.height
+
+    def __getitem__(self, y: Union[int, slice]) -> Union[Tile, List[Tile]]:
+        if isinstance(y, slice):
+            #like a list slice: the same (writable) tiles tiles[x][y] would return
+            return [self.__grid.get(self.__x, i) for i in range(*y.indices(self.__grid.height))]
+        if y < 0:
+            y += self.__grid.height
+        if not 0 <= y < self.__grid.height:
+            raise IndexError("tile column index out of range")
+        return self.__grid.get(self.__x, y)
+
+    def __setitem__(self, y: int, tile: Tile) -> None:
+        if y < 0:
+            y += self.__grid.height
+        if not 0 <= y < self.__grid.height:
+            raise IndexError("tile column index out of range")
+        self.__grid.set(self.__x, y, tile)
+
+    def __iter__(self) -> Iterator[Tile]:
+        '''read only, like peek: index tiles[x][y] to get a tile you can mutate'''
+        for y in range(self.__grid.height):
+            yield self.__grid.peek(self.__x, y)
+
+
+class TileGrid:
+    '''tile ids in a bytearray + sparse dict of tile objects, indexed like a [x][y] list of lists'''
+
+    def __init__(self, width: int, height: int, fill: TileType = TileType.FLOOR):
+        self.width = width
+        self.height = height
+        self.ids = bytearray([fill.tile_id]) * (width * height)
+        self.__tiles: Dict[int, Tile] = {}
+        self.__owned: Optional[Set[int]] = None #copy-on-write: cells this grid has its own tile for, None if it owns all
+        self.__dirty: Set[int] = set() #cells handed out for writing since the last take_dirty()
+        if fill not in STATELESS_TILE_TYPES:
+            for i in range(width * height):
+                self.__tiles[i] = new_tile(fill)
+        self.__columns = [TileColumn(self, x) for x in range(width)]
+
+    @classmethod
+    def from_columns(cls, columns: List[List[Any]]) -> "TileGrid":
+        '''builds a grid from a [x][y] list of lists of Tile or TileType'''
+        width = len(columns)
+        height = len(columns[0]) if width else 0
+        grid = cls(width, height)
+        for x, col in enumerate(columns):
+            for y, cell in enumerate(col):
+                if isinstance(cell, TileType):
+                    cell = new_tile(cell)
+                i = x * height + y
+                grid.ids[i] = cell.tile_id
+                if not is_pristine(cell):
+                    grid.__tiles[i] = cell
+        return grid
+
+    # -------------
+    # list of lists surface
+    # -------------
+
+    def __len__(self) -> int:
+        return self.width
+
+    def __getitem__(self, x: int) -> TileColumn:
+        return self.__columns[x]
+
+    def __iter__(self) -> Iterator[TileColumn]:
+        return iter(self.__columns)
+
+    # -------------
+    # Cells
+    # -------------
+
+    def get(self, x: int, y: int) -> Tile:
+        '''tile object at (x, y), created (and kept) if the cell did not have one yet'''
+        i = x * self.height + y
+        self.__dirty.add(i)
+        tile = self.__tiles.get(i)
+        if tile is None:
+            tile = new_tile(TILE_TYPE_BY_ID[self.ids[i]])
+            self.__tiles[i] = tile
+            if self.__owned is not None:
+                self.__owned.add(i)
+        elif self.__owned is not None and i not in self.__owned:
+            #still shared with a clone, the caller may mutate it
+            tile = copy.deepcopy(tile)
+            self.__tiles[i] = tile
+            self.__owned.add(i)
+        return tile
+
+    def set(self, x: int, y: int, tile: Tile) -> None:
+        i = x * self.height + y
+        if self.__owned is not None:
+            self.ids = bytearray(self.ids) if self.ids is self.__shared_ids else self.ids
+            self.__owned.add(i)
+        self.ids[i] = tile.tile_id
+        self.__tiles[i] = tile
+        self.__dirty.add(i)
+
+    def cow_copy(self) -> "TileGrid":
+        '''copy-on-write clone, O(stored tiles) instead of a deep copy'''
+        new = TileGrid.__new__(TileGrid)
+        new.width = self.width
+        new.height = self.height
+        new.ids = self.ids #tile kinds never change in play, set() copies before writing
+        new.__shared_ids = self.ids
+        new.__tiles = dict(self.__tiles)
+        new.__owned = set()
+        new.__dirty = set()
+        new.__columns = [TileColumn(new, x) for x in range(new.width)]
+
+        #from now on this grid shares its tiles too
+        self.__shared_ids = self.ids
+        self.__owned = set()
+        return new
+
+    def take_dirty(self) -> Set[int]:
+        '''cell indices (x * height + y) fetched for writing since the last call, and resets them'''
+        dirty = self.__dirty
+        self.__dirty = set()
+        return dirty
+
+    def peek(self, x: int, y: int) -> Tile:
+        '''tile at (x, y) for reading only: untouched floors/walls return a shared stand-in'''
+        i = x * self.height + y
+        tile = self.__tiles.get(i)
+        return tile if tile is not None else _PROTOTYPES[self.ids[i]]
+
+    def tile_type_at(self, x: int, y: int) -> TileType:
+        return TILE_TYPE_BY_ID[self.ids[x * self.height + y]]
+
+    def is_walkable_at(self, x: int, y: int) -> bool:
+        return WALKABLE_BY_ID[self.ids[x * self.height + y]] == 1
+
+    def stored_tiles(self) -> Iterator[Tuple[Tuple[int, int], Tile]]:
+        '''((x, y), tile) for every cell that has a tile object, in x-major order'''
+        for i in sorted(self.__tiles):
+            yield divmod(i, self.height), self.__tiles[i]
+
+    def to_2d_list(self) -> List[List[Dict[str, Any]]]:
+        '''[x][y] tile dicts like Map.to_2d_list, without materializing untouched cells'''
+        h = self.height
+        tiles = self.__tiles
+        ids = self.ids
+        return [
+            [(tiles[i] if i in tiles else _PROTOTYPES[ids[i]]).to_dict() for i in range(x * h, (x + 1) * h)]
+            for x in range(self.width)
+        ]
+
+    # -------------
+    # Copying
+    # -------------
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "TileGrid":
+        new = TileGrid.__new__(TileGrid)
+        memo[id(self)] = new
+        new.width = self.width
+        new.height = self.height
+        new.ids = bytearray(self.ids)
+        new.__tiles = {i: copy.deepcopy(t, memo) for i, t in self.__tiles.items()}
+        new.__owned = None
+        new.__dirty = set(self.__dirty) #a copied GameState's to_dict cache still needs these rebuilt
+        new.__columns = [TileColumn(new, x) for x in range(new.width)]
+        return new
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"width": self.width, "height": self.height, "ids": self.ids, "tiles": self.__tiles, "dirty": self.__dirty}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.width = state["width"]
+        self.height = state["height"]
+        self.ids = state["ids"]
+        self.__tiles = state["tiles"]
+        self.__owned = None
+        self.__dirty = set(state.get("dirty", ()))
+        self.__columns = [TileColumn(self, x) for x in range(self.width)]
@@ -1,11 +1,15 @@
 '''tiles.py'''
 
+import copy
+
 from game_constants import TileType, FoodType, ShopCosts
-from item import Item, Pan, Food, Plate 
+from item import Item, Pan, Food, Plate, all_slots
  
 '''Each class describes the current STATE of a tile. Robot controller describes how the state changes through bot actions'''
 
 class Tile:
+  __slots__ = ("tile_name", "tile_id", "is_walkable", "is_dangerous", "is_placeable", "is_interactable", "item", "using")
+
   def __init__(self, tile_type: TileType):
     self.tile_name = tile_type.tile_name
     self.tile_id = tile_type.tile_id
@@ -25,16 +29,35 @@ class Tile:
           #no using
       }
 
+  #tiles are copied for every get_map/get_tile snapshot, so copy the slots directly
+  def __copy__(self):
+      new = object.__new__(type(self))
+      for name in all_slots(type(self)):
+          object.__setattr__(new, name, getattr(self, name))
+      return new
+
+  def __deepcopy__(self, memo):
+      #everything but the item is immutable (Shop also copies its item set)
+      new = self.__copy__()
+      memo[id(self)] = new
+      if self.item is not None:
+          new.item = copy.deepcopy(self.item, memo)
+      return new
+
 class Placeable(Tile):
   '''
   Tiles that we can place objects on (ie counters)
   '''
+  __slots__ = ("placeable",)
+
   def __init__(self, tile_type: TileType):
     super().__init__(tile_type)
     self.placeable = True
 
 class Interactable(Tile):
   '''Tiles that we can interact with (ie cooker)'''
+  __slots__ = ("placeable", "interactable")
+
   def __init__(self, tile_type: TileType):
     super().__init__(tile_type)
     self.placeable = True
@@ -42,16 +65,22 @@ class Interactable(Tile):
 
 
 class Floor(Tile):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(TileType.FLOOR)
 
 
 class Wall(Tile):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(TileType.WALL)
 
 
 class Counter(Interactable):
+   __slots__ = ()
+
    def __init__(self):
         super().__init__(TileType.COUNTER)
         self.item = None #only 1 item can be on a counter, None = no item on counter 
@@ -62,6 +91,8 @@ class Counter(Interactable):
        return d
 
 class Box(Interactable):
+    __slots__ = ("count",)
+
     def __init__(self):
         super().__init__(TileType.BOX)
         self.item = None #this is the item to put in that needs to match
@@ -79,6 +110,8 @@ class Box(Interactable):
        return d
 
 class Sink(Interactable):
+    __slots__ = ("num_dirty_plates", "curr_dirty_plate_progress")
+
     def __init__(self):
         super().__init__(TileType.SINK)
         self.num_dirty_plates = 0
@@ -92,6 +125,8 @@ class Sink(Interactable):
        return d
 
 class SinkTable(Interactable):
+    __slots__ = ("num_clean_plates",)
+
     def __init__(self):
         super().__init__(TileType.SINKTABLE)
         self.num_clean_plates = 0 #user can take clean plates
@@ -102,6 +137,8 @@ class SinkTable(Interactable):
        return d
 
 class Cooker(Interactable):
+    __slots__ = ("cook_progress",)
+
     def __init__(self):
         super().__init__(TileType.COOKER)
         self.item = Pan() #empty pan
@@ -114,14 +151,20 @@ class Cooker(Interactable):
        return d
 
 class Trash(Interactable):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(TileType.TRASH)
 
 class Submit(Interactable):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(TileType.SUBMIT)
         
 class Shop(Interactable):
+    __slots__ = ("shop_items",)
+
     def __init__(self):
         super().__init__(TileType.SHOP)
         self.shop_items = set()
@@ -132,6 +175,11 @@ class Shop(Interactable):
         for shop_item in ShopCosts:
             self.shop_items.add(shop_item)
     
+    def __deepcopy__(self, memo):
+       new = super().__deepcopy__(memo)
+       new.shop_items = set(self.shop_items)
+       return new
+
     def to_dict(self):
        d = super().to_dict()
        #scooby doo
@@ -0,0 +1,183 @@
+# warning_log.py
+"""
+Structured channel for the warnings RobotController raises when a bot action is rejected.
+
+Every warning is a WarnEvent (turn, team, bot_id, category, message); the category is the
+controller action that failed ("move", "place", ...) or one of "budget" (already moved/acted),
+"bot_id" (bad or enemy bot id) and "target" (target tile too far / out of bounds).
+
+A WarningLog keeps, for the whole match:
+- counts per team, bot and category
+- the last `capacity` events in a ring buffer, for full detail on demand (events())
+- optionally every event in a JSON lines file, written in batches of `flush_every` events
+
+and prints according to its mode:
+
+    "full"      every warning as it happens (what the engine always did)
+    "summary"   at most `per_turn_limit` lines per team per turn, then one "N more" line
+    "count"     nothing while playing, only print_summary() at the end (headless and batch games)
+    "off"       nothing is printed, counted or kept (sandboxes, quiet batch workers)
+
+    python src/game.py ... --warnings full --warnings-log logs/warnings.jsonl
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, IO, List, Optional, Tuple
+
+from game_constants import Team
+
+WARNING_MODES = ("full", "summary", "count", "off")
+
+
+@dataclass(slots=True)
+class WarnEvent:
+    turn: int
+    team: Team
+    bot_id: Optional[int]
+    category: str
+    message: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "turn": self.turn,
+            "team": self.team.name,
+            "bot_id": self.bot_id,
+            "category": self.category,
+            "message": self.message,
+        }
+
+
+class WarningLog:
+    '''counts, ring buffer and rate limited printing for controller warnings, see the module docstring'''
+
+    def __init__(
+        self,
+        mode: str = "summary",
+        capacity: int = 1024,
+        per_turn_limit: int = 5,
+        log_path: Optional[str] = None,
+        flush_every: int = 256,
+    ):
+        if mode not in WARNING_MODES:
+            raise ValueError(f"unknown warning mode {mode!r}")
+        self.mode = mode
+        self.enabled = mode != "off" #checked by the controller before anything else
+        self.per_turn_limit = per_turn_limit
+
+        self.counts: Dict[Tuple[Team, Optional[int], str], int] = {}
+        self.__recent: Deque[WarnEvent] = deque(maxlen=capacity)
+
+        #summary mode: what was printed / held back in the current turn
+        self.__turn = -1
+        self.__printed: Dict[Team, int] = {}
+        self.__suppressed: Dict[Team, int] = {}
+
+        #log file, written in batches
+        self.log_path = log_path
+        self.flush_every = flush_every
+        self.__pending: List[WarnEvent] = []
+        self.__file: Optional[IO[str]] = None
+
+    # ----------------------------
+    # Recording
+    # ----------------------------
+
+    def record(self, turn: int, team: Team, bot_id: Optional[int], category: str, message: str) -> None:
+        if not self.enabled:
+            return
+        key = (team, bot_id, category)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+        event = WarnEvent(turn, team, bot_id, category, message)
+        self.__recent.append(event)
+        if self.log_path is not None:
+            self.__pending.append(event)
+            if len(self.__pending) >= self.flush_every:
+                self.flush()
+
+        if self.mode == "full":
+            self.__print(event)
+            return
+        if self.mode == "count":
+            return
+
+        if turn != self.__turn:
+            self.end_turn()
+            self.__turn = turn
+        printed = self.__printed.get(team, 0)
+        if printed < self.per_turn_limit:
+            self.__printed[team] = printed + 1
+            self.__print(event)
+        else:
+            self.__suppressed[team] = self.__suppressed.get(team, 0) + 1
+
+    def __print(self, event: WarnEvent) -> None:
+        print(f"[RC for {event.team.name} WARN]: {event.message}")
+
+    def end_turn(self) -> None:
+        '''summary mode: prints how many warnings of the turn were held back'''
+        for team, n in self.__suppressed.items():
+            if n:
+                print(f"[RC for {team.name} WARN]: ... {n} more warnings on turn {self.__turn} (--warnings full to see them)")
+        self.__printed.clear()
+        self.__suppressed.clear()
+
+    # ----------------------------
+    # Reading
+    # ----------------------------
+
+    def events(self, team: Optional[Team] = None, bot_id: Optional[int] = None, category: Optional[str] = None) -> List[WarnEvent]:
+        '''the most recent events (up to capacity), oldest first, optionally filtered'''
+        return [
+            e for e in self.__recent
+            if (team is None or e.team == team)
+            and (bot_id is None or e.bot_id == bot_id)
+            and (category is None or e.category == category)
+        ]
+
+    def total(self, team: Optional[Team] = None) -> int:
+        return sum(n for (t, _, _), n in self.counts.items() if team is None or t == team)
+
+    def summary(self) -> Dict[str, Any]:
+        '''{team: {"total", "by_category", "by_bot"}} for teams with warnings, json friendly'''
+        out: Dict[str, Any] = {}
+        for (team, bot_id, category), n in sorted(self.counts.items(), key=lambda kv: (kv[0][0].value, str(kv[0][1]), kv[0][2])):
+            t = out.setdefault(team.name, {"total": 0, "by_category": {}, "by_bot": {}})
+            t["total"] += n
+            t["by_category"][category] = t["by_category"].get(category, 0) + n
+            per_bot = t["by_bot"].setdefault(str(bot_id), {})
+            per_bot[category] = n
+        return out
+
+    def print_summary(self) -> None:
+        for team, t in self.summary().items():
+            cats = sorted(t["by_category"].items(), key=lambda kv: -kv[1])
+            top = ", ".join(f"{c} {n}" for c, n in cats[:5])
+            print(f"[WARN] {team}: {t['total']} rejected actions ({top})")
+
+    # ----------------------------
+    # Log file
+    # ----------------------------
+
+    def flush(self) -> None:
+        '''writes the pending events to the log file'''
+        if self.log_path is None or not self.__pending:
+            return
+        if self.__file is None:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            self.__file = open(self.log_path, "w", encoding="utf-8")
+        self.__file.write("".join(json.dumps(e.to_dict()) + "\n" for e in self.__pending))
+        self.__pending.clear()
+
+    def close(self) -> None:
+        if self.mode == "summary":
+            self.end_turn()
+        self.flush()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None